@@ -0,0 +1,314 @@
+import os
+import sqlite3
+import argparse
+import concurrent.futures
+import urllib.parse
+from datetime import datetime
+
+from colorama import Style, Fore
+try:
+    from azure.storage.blob import ContainerClient
+    from azure.core.exceptions import ResourceNotFoundError
+except ImportError:
+    # Delta sync is optional. azcopy sync still works w/o the Azure SDK installed.
+    ContainerClient = None
+
+try:
+    from export_manifest import hash_file
+except ModuleNotFoundError:
+    from ctrl_export_preprocessor.export_manifest import hash_file
+
+
+UPLOAD_MANIFEST_FILENAME = "upload_manifest.sqlite3"
+UPLOAD_WORKERS = 8 # Blobs uploaded/deleted at once.
+EXCLUDE_DIRS = ["tmp", "parquet"] # Top-level dirs not uploaded (also azcopy --exclude-path).
+# tmp: manifests and intermediate TSVs. parquet: local Parquet mirror (parquet_mirror.PARQUET_DIR_NAME).
+
+AZURITE_CONNECTION_STRING = ("DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;"
+    "AccountKey=Eby8vdM02xNOcqFlqUwJPLlmEtlCDXJ1OUzFT50uSRZ6IFsuFq2UVErCz4I6tq/K1SZFPTOtr/KBHBeksoGMGw==;"
+    "BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;")
+# Well-known local emulator account. For testing w/o touching real storage.
+# https://learn.microsoft.com/en-us/azure/storage/common/storage-use-azurite#connection-strings
+
+
+def is_available():
+    return ContainerClient is not None
+
+
+def split_blob_url(dest_url):
+    """Splits "https://<acct>.blob.core.windows.net/<container>/<dir>?<SAS>"
+    (as passed to azcopy) into (container URL w/ SAS, blob-name prefix).
+    """
+    parsed_url = urllib.parse.urlsplit(dest_url)
+    path_parts = parsed_url.path.lstrip("/").split("/", 1)
+    if parsed_url.port == 10000 or parsed_url.hostname in ("127.0.0.1", "localhost"):
+        # Emulator URLs carry account name as first path segment.
+        account, path_parts = path_parts[0], path_parts[1].split("/", 1)
+        container_path = "/%s/%s" % (account, path_parts[0])
+    else:
+        container_path = "/" + path_parts[0]
+    prefix = path_parts[1].strip("/") + "/" if len(path_parts) > 1 and path_parts[1].strip("/") else ""
+    container_url = urllib.parse.urlunsplit((parsed_url.scheme, parsed_url.netloc,
+                                    container_path, parsed_url.query, ""))
+    return container_url, prefix
+
+
+def open_container(dest_url=None, connection_string=None, container_name=None):
+    """Returns (ContainerClient, blob-name prefix) for a SAS dest_url, or for
+    connection_string + container_name (e.g. Azurite).
+    """
+    if not is_available():
+        raise Exception("azure-storage-blob not installed. Can't run delta upload.")
+    if connection_string:
+        Container = ContainerClient.from_connection_string(connection_string, container_name)
+        prefix = ""
+    else:
+        container_url, prefix = split_blob_url(dest_url)
+        Container = ContainerClient.from_container_url(container_url)
+    return Container, prefix
+
+
+def manifest_dest_key(dest_url=None, connection_string=None, container_name=None):
+    """Identifies destination in upload manifest. SAS token left out, since it rotates."""
+    if connection_string:
+        account = dict(part.split("=", 1) for part in connection_string.split(";")
+                                            if "=" in part).get("AccountName", "")
+        return "%s/%s" % (account, container_name)
+    parsed_url = urllib.parse.urlsplit(dest_url)
+    return urllib.parse.urlunsplit((parsed_url.scheme, parsed_url.netloc,
+                                            parsed_url.path.rstrip("/"), "", ""))
+
+
+class UploadManifest(object):
+    """Record of what each local file looked like when last uploaded to a
+    destination: size, mtime, content hash, and the blob's etag after upload.
+    Lets each run upload and delete only what changed, w/o listing the container.
+    """
+    def __init__(self, manifest_path):
+        manifest_dir = os.path.dirname(manifest_path)
+        if manifest_dir and not os.path.exists(manifest_dir):
+            os.makedirs(manifest_dir, exist_ok=True)
+
+        self.manifest_path = manifest_path
+        self.connection = sqlite3.connect(manifest_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS uploads (
+                                            dest TEXT,
+                                            rel_path TEXT,
+                                            size INTEGER,
+                                            mtime_ns INTEGER,
+                                            content_hash TEXT,
+                                            etag TEXT,
+                                            uploaded TEXT,
+                                            PRIMARY KEY (dest, rel_path))""")
+
+    def get_entries(self, dest):
+        """Returns {rel_path: entry dict} of everything recorded as uploaded to dest."""
+        rows = self.connection.execute("SELECT * FROM uploads WHERE dest = ?", (dest,))
+        return {row["rel_path"]: dict(row) for row in rows}
+
+    def record(self, dest, rel_path, size, mtime_ns, content_hash, etag):
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO uploads VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (dest, rel_path, size, mtime_ns, content_hash, etag,
+                         datetime.now().strftime("%Y-%m-%dT%H%M%S")))
+
+    def update_mtime(self, dest, rel_path, mtime_ns):
+        with self.connection:
+            self.connection.execute("UPDATE uploads SET mtime_ns = ? WHERE dest = ? AND rel_path = ?",
+                                                            (mtime_ns, dest, rel_path))
+
+    def forget(self, dest, rel_path):
+        with self.connection:
+            self.connection.execute("DELETE FROM uploads WHERE dest = ? AND rel_path = ?",
+                                                                    (dest, rel_path))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return "UploadManifest '%s'" % self.manifest_path
+
+
+def list_local_files(src_dir, exclude_dirs=EXCLUDE_DIRS):
+    """Returns {rel_path: stat_result} for files under src_dir. Paths use "/" like blob names."""
+    local_files = dict()
+    for dirpath, dirnames, filenames in os.walk(src_dir):
+        if dirpath == src_dir:
+            dirnames[:] = [dirname for dirname in dirnames if dirname not in exclude_dirs]
+        for filename in filenames:
+            file_path = os.path.join(dirpath, filename)
+            rel_path = os.path.relpath(file_path, src_dir).replace(os.sep, "/")
+            local_files[rel_path] = os.stat(file_path)
+    return local_files
+
+
+def plan_delta(local_files, uploaded_entries, src_dir, reconcile_etags=None):
+    """Compares local files against manifest entries.
+    Returns (to_upload [rel_path], to_delete [rel_path], touched {rel_path: mtime_ns}).
+    Only files whose size/mtime changed are hashed. touched holds files w/ new
+    mtime but same content (manifest updated, nothing uploaded).
+    reconcile_etags ({blob rel_path: etag}, from listing container) also
+    re-uploads files whose blob is missing or was changed by someone else.
+    """
+    to_upload = []
+    touched = dict()
+    for rel_path, stat_result in sorted(local_files.items()):
+        entry = uploaded_entries.get(rel_path)
+        if entry is None:
+            to_upload.append(rel_path)
+            continue
+        if reconcile_etags is not None and reconcile_etags.get(rel_path) != entry["etag"]:
+            to_upload.append(rel_path)
+            continue
+        if stat_result.st_size == entry["size"] and stat_result.st_mtime_ns == entry["mtime_ns"]:
+            continue
+        if (stat_result.st_size == entry["size"] and hash_file(os.path.join(src_dir,
+                                *rel_path.split("/"))) == entry["content_hash"]):
+            touched[rel_path] = stat_result.st_mtime_ns
+            continue
+        to_upload.append(rel_path)
+
+    to_delete = sorted(set(uploaded_entries) - set(local_files))
+    if reconcile_etags is not None:
+        # Blobs never recorded (e.g. uploaded by an azcopy sync) w/ no local file.
+        to_delete = sorted(set(to_delete) | (set(reconcile_etags) - set(local_files)))
+    return to_upload, to_delete, touched
+
+
+def delta_sync(src_dir, Container, prefix, Manifest, dest_key, delete=True,
+                reconcile=False, workers=UPLOAD_WORKERS, progress_callback=None):
+    """Mirrors src_dir to blobs under prefix in Container, like
+    `azcopy sync --delete-destination true`, but uploading and deleting only
+    what changed since the last run according to Manifest.
+    reconcile=True lists the container once to catch blobs changed or removed
+    outside this tool, and removes blobs w/ no local file that were never
+    recorded (e.g. left by azcopy syncs).
+    progress_callback(done_count, total_count) called as blobs are handled.
+    Returns dict of counts plus list of per-file errors.
+    """
+    if not os.path.exists(src_dir):
+        raise Exception("Can't find src dir '%s'" % src_dir)
+
+    local_files = list_local_files(src_dir)
+    uploaded_entries = Manifest.get_entries(dest_key)
+    reconcile_etags = None
+    if reconcile:
+        reconcile_etags = {blob.name[len(prefix):]: blob.etag
+                            for blob in Container.list_blobs(name_starts_with=prefix or None)}
+
+    to_upload, to_delete, touched = plan_delta(local_files, uploaded_entries, src_dir, reconcile_etags)
+    if not delete:
+        # Leave blobs in place, just stop tracking them.
+        for rel_path in to_delete:
+            if rel_path in uploaded_entries:
+                Manifest.forget(dest_key, rel_path)
+        to_delete = []
+    for rel_path, mtime_ns in touched.items():
+        Manifest.update_mtime(dest_key, rel_path, mtime_ns)
+
+    def upload(rel_path):
+        file_path = os.path.join(src_dir, *rel_path.split("/"))
+        # Fresh stat, taken before hashing: file may have changed since listing. Any
+        # change after this shows as a new size/mtime next run, so it gets rechecked.
+        stat_result = os.stat(file_path)
+        content_hash = hash_file(file_path)
+        with open(file_path, "rb") as file_obj:
+            blob_props = Container.upload_blob(prefix + rel_path, file_obj, overwrite=True)
+        return rel_path, stat_result, content_hash, blob_props["etag"]
+
+    def delete_blob(rel_path):
+        try:
+            Container.delete_blob(prefix + rel_path)
+        except ResourceNotFoundError:
+            pass # Already gone. Same end result.
+        return rel_path
+
+    results = {"uploaded": 0, "uploaded_bytes": 0, "deleted": 0,
+               "unchanged": len(local_files) - len(to_upload), "errors": []}
+    total_count = len(to_upload) + len(to_delete)
+    done_count = 0
+    if progress_callback:
+        progress_callback(done_count, total_count)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        upload_futures = {executor.submit(upload, rel_path): rel_path for rel_path in to_upload}
+        delete_futures = {executor.submit(delete_blob, rel_path): rel_path for rel_path in to_delete}
+        for future in concurrent.futures.as_completed(list(upload_futures) + list(delete_futures)):
+            # Manifest only written from this thread.
+            try:
+                result = future.result()
+            except Exception as exception_text:
+                rel_path = upload_futures.get(future) or delete_futures.get(future)
+                results["errors"].append("%s: %s" % (rel_path, exception_text))
+            else:
+                if future in upload_futures:
+                    rel_path, stat_result, content_hash, etag = result
+                    Manifest.record(dest_key, rel_path, stat_result.st_size,
+                                    stat_result.st_mtime_ns, content_hash, etag)
+                    results["uploaded"] += 1
+                    results["uploaded_bytes"] += stat_result.st_size
+                else:
+                    Manifest.forget(dest_key, result)
+                    results["deleted"] += 1
+            done_count += 1
+            if progress_callback:
+                progress_callback(done_count, total_count)
+
+    return results
+
+
+def sync_dir_to_blob(src_dir, manifest_path, dest_url=None, connection_string=None,
+                        container_name=None, delete=True, reconcile=False, progress_callback=None):
+    """Opens destination and manifest and runs delta_sync(). Returns results dict."""
+    Container, prefix = open_container(dest_url, connection_string, container_name)
+    dest_key = manifest_dest_key(dest_url, connection_string, container_name)
+    with UploadManifest(manifest_path) as Manifest:
+        return delta_sync(src_dir, Container, prefix, Manifest, dest_key, delete=delete,
+                            reconcile=reconcile, progress_callback=progress_callback)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upload only what changed in a "
+                                        "local dir to Azure blob storage.")
+    parser.add_argument("-s", "--src", help="Specify local dir to upload.", type=str, required=True)
+    parser.add_argument("-u", "--url", help="Specify destination container (or "
+                                        "container dir) URL w/ SAS token.", type=str)
+    parser.add_argument("--azurite", help="Upload to this container in local Azurite "
+                                    "emulator instead (for testing).", type=str)
+    parser.add_argument("-m", "--manifest", help="Specify upload manifest path.",
+                                                    type=str, default=UPLOAD_MANIFEST_FILENAME)
+    parser.add_argument("--reconcile", help="List destination once to catch blobs "
+                                    "changed outside this tool.", action="store_true")
+    parser.add_argument("--no-delete", help="Don't delete blobs whose local file is gone.",
+                                                                    action="store_true")
+    args = parser.parse_args()
+
+    if not is_available():
+        parser.error("azure-storage-blob not installed (pip install azure-storage-blob)")
+    if args.azurite:
+        Container = ContainerClient.from_connection_string(AZURITE_CONNECTION_STRING, args.azurite)
+        if not Container.exists():
+            Container.create_container()
+        results = sync_dir_to_blob(args.src, args.manifest, connection_string=AZURITE_CONNECTION_STRING,
+                            container_name=args.azurite, delete=not args.no_delete,
+                                                            reconcile=args.reconcile)
+    elif args.url:
+        results = sync_dir_to_blob(args.src, args.manifest, dest_url=args.url,
+                            delete=not args.no_delete, reconcile=args.reconcile)
+    else:
+        parser.error("Specify --url or --azurite")
+
+    print(Fore.MAGENTA + "%d uploaded (%.1f MB), %d deleted, %d unchanged"
+            % (results["uploaded"], results["uploaded_bytes"] / 1e6, results["deleted"],
+                                            results["unchanged"]) + Style.RESET_ALL)
+    if results["errors"]:
+        print(Fore.RED + Style.BRIGHT + "%d error(s):\n\t%s" % (len(results["errors"]),
+                                "\n\t".join(results["errors"])) + Style.RESET_ALL)
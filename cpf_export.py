@@ -1,11 +1,13 @@
 import os
 import time
-import re
-import subprocess
 import shutil
+import concurrent.futures
+import collections
+import json
+import threading
 
 import argparse
-import pandas as pd
+import openpyxl
 from tqdm import tqdm
 from colorama import Style, Fore, Back
 import xlwings as xw
@@ -19,6 +21,18 @@ if os.name == "nt":
 
 try:
     import fix_cpf_export_format as fixcpf
+    import export_manifest as manifest
+    import parquet_mirror
+    import gui_actions
+    import field_parsing as parsing
+    import snapshot_store
+    import blob_delta_sync
+    import sync_engine
+    import sync_metrics
+    import stage_graph
+    import screen_locator
+    from field_parsing import DATE_REGEX_1, DATE_REGEX_2, DATE_FORMAT_1, DATE_FORMAT_2, \
+                              DATE_FORMAT_3, DATE_FORMATS, SN_REGEX, CDF_SW_PN_REGEX, SW_PN_REGEX
     from sw_rev_mapping import REV_MAP_ALL_F
     from dir_names import DIR_REMOTE_SRC, \
                           DIR_FIELD_DATA, \
@@ -29,6 +43,19 @@ try:
                           ERROR_HISTORY_SAVE_IMG, ERROR_HISTORY_BLANK
 except ModuleNotFoundError:
     import ctrl_export_preprocessor.fix_cpf_export_format as fixcpf
+    import ctrl_export_preprocessor.export_manifest as manifest
+    import ctrl_export_preprocessor.parquet_mirror as parquet_mirror
+    import ctrl_export_preprocessor.gui_actions as gui_actions
+    import ctrl_export_preprocessor.field_parsing as parsing
+    import ctrl_export_preprocessor.snapshot_store as snapshot_store
+    import ctrl_export_preprocessor.blob_delta_sync as blob_delta_sync
+    import ctrl_export_preprocessor.sync_engine as sync_engine
+    import ctrl_export_preprocessor.sync_metrics as sync_metrics
+    import ctrl_export_preprocessor.stage_graph as stage_graph
+    import ctrl_export_preprocessor.screen_locator as screen_locator
+    from ctrl_export_preprocessor.field_parsing import DATE_REGEX_1, DATE_REGEX_2, DATE_FORMAT_1, \
+                                                DATE_FORMAT_2, DATE_FORMAT_3, DATE_FORMATS, \
+                                                SN_REGEX, CDF_SW_PN_REGEX, SW_PN_REGEX
     from ctrl_export_preprocessor.sw_rev_mapping import REV_MAP_ALL_F
     from ctrl_export_preprocessor.dir_names import DIR_REMOTE_SRC, \
                                                 DIR_FIELD_DATA, \
@@ -39,153 +66,521 @@ except ModuleNotFoundError:
                                                 ERROR_HISTORY_SAVE_IMG, ERROR_HISTORY_BLANK
 
 
-DATE_REGEX_1 = r"(20\d{2}[0-1]\d[0-3]\d)"
-DATE_REGEX_2 = r"(20\d{2}-[0-1]\d-[0-3]\d)"
-# Could catch some invalid dates like 20231131. Further validated below in find_in_string()
-DATE_FORMAT_1 = "%Y%m%d"
-DATE_FORMAT_2 = "%Y-%m-%d"
-DATE_FORMAT_3 = "%m%d%Y"
-DATE_FORMATS = [DATE_FORMAT_1, DATE_FORMAT_2, DATE_FORMAT_3]
-
-SN_REGEX = r"(3\d{6}|5\d{6}|8\d{6})"
-# Any "3" or "5" or "8" followed by six more digits
-CDF_SW_PN_REGEX = r"\d{6}\.\d{2}|\d{8}\.\d{2}"
-SW_PN_REGEX = r"\d{6}G\d{2}|\d{8}G\d{2}"
-
+# Regex and date-format constants live in field_parsing (re-exported above).
+MIN_VALID_MOD_DATE = time.strptime("20200101", DATE_FORMAT_1)
+# Some files (CDF at least) have bogus mod dates - usually in 1999 or 2000.
 
 CDF_EXPORT_SUFFIX = "_CDF.xlsx"
 CPF_PARAM_EXPORT_SUFFIX = "_cpf-params.tsv"
 CPF_FAULT_EXPORT_SUFFIX = "_cpf-faults.tsv"
 CPF_COMBINED_EXPORT_SUFFIX = "_cpf.xlsx"
 
-ERROR_HISTORY_SAVE_BUTTON_LOC = None # Will be modified below
+# CDF-export parameter rows validated after conversion, w/ expected VCL Alias.
+CDF_SN_VAR_NAME = "nvuser4"
+CDF_SN_VCL_ALIAS = "NV_VehicleSerialNumber"
+CDF_SW_PN_VAR_NAME = "user119"
+CDF_SW_PN_VCL_ALIAS = "ApplicationNameAsInt32"
+
+SCREEN_LOCATOR = None # screen_locator.TemplateLocator set up in main. Finds Error History Save icon.
+ERROR_HISTORY_REGION = (0, 0, 960, 1080) # (left, top, width, height) searched before full screen
+# for ERROR_HISTORY_SAVE_IMG/_BLANK. 1314 program kept on left half of screen (CIT snapped to
+# right half; see "refocus_cit" script). Adjust if screen layout differs.
+
+DATESTAMP_WORKERS = 8 # Threads for listing, stat, and rename calls on remote share.
+
+LOCAL_STATE_DIR = os.path.join(os.path.expanduser("~"), ".ctrl_export_preprocessor")
+# Machine-specific state kept between runs (e.g. tuned GUI timing).
+DATESTAMP_JOURNAL_FILENAME = "datestamp_journal.json"
+DATESTAMP_QUEUE_FILENAME = "datestamp_pending.json" # Files batch runs couldn't rename on their own
+
+NATIVE_SYNC = False # Use built-in sync_engine instead of robocopy/rsync. Set from --native-sync in main.
+
+BACKUP_MODE = "union" # Set from --backup-mode in main. "union", "snapshot", or "both".
+# union: every file ever seen, hardlinked from mirror. snapshot: dated, deduplicated
+# manifests in DIR_REMOTE_BU/store (see snapshot_store.py) for point-in-time restore.
+
+AZCOPY_MAX_CONCURRENT = 1 # Azure sync jobs run at once. Set from --azure-jobs in main.
+AZURE_DELTA_SYNC = False  # Upload only files changed since last run (blob_delta_sync) instead
+                          # of azcopy sync listing both sides. Set from --azure-delta in main.
+
+UNATTENDED = False # Set from --auto in main. No prompts; issues needing a person are
+                   # logged to UNATTENDED_NOTICES (printed at end) or raise NeedsOperator.
+UNATTENDED_NOTICES = []
+AUTO_STAGE_WORKERS = 4 # Non-GUI --auto stages (syncs, backup) run at once.
+
+CDF_VALIDATION_WORKERS = 1 # Threads validating CDF exports while GUI exports next CDF.
+                           # One is plenty, since validating takes far less time than a GUI export.
+CPF_COMBINE_WORKERS = 2 # Threads combining CPF TSVs into .xlsx while GUI exports next CPF.
+
+GUI_RUNNER = None # gui_actions.ActionScriptRunner set up in main. Runs all GUI command sequences.
+GUI_PAUSE_MULT = 1 # Set from --slow in main.
+
+# Upper limits on waits for GUI exports to appear (scaled by GUI_PAUSE_MULT).
+# Exports are picked up as soon as they're complete, so these only matter on failure.
+CPF_PARAM_EXPORT_TIMEOUT = 10
+CPF_FAULT_EXPORT_TIMEOUT = 3 # No file appears if fault history empty, so keep short.
+CDF_EXPORT_TIMEOUT = 60
+EXCEL_OPEN_TIMEOUT = 10 # CIT opens each CDF export in Excel after writing it.
+FILE_POLL_INTERVAL = 0.25 # Seconds b/w checks for export file.
+FILE_SETTLE_TIME = 0.5    # Seconds file size must hold steady to count as fully written.
 
 
 class UserCancel(Exception):
     pass
 
 
-def find_in_string(regex_pattern, string_to_search, prompt, date_target=False, allow_none=False):
+class NeedsOperator(Exception):
+    """Raised in unattended mode where work can't continue w/o a person."""
+    pass
+
+
+def pause_for_user(message):
+    """Shows message and waits for Enter. Unattended, logs it and continues instead."""
+    if UNATTENDED:
+        UNATTENDED_NOTICES.append(message)
+        print(message + Style.RESET_ALL)
+    else:
+        input(message + Style.RESET_ALL)
+
+
+def print_unattended_notices():
+    if not UNATTENDED_NOTICES:
+        return
+    print(Fore.RED + Style.BRIGHT + "\n%d issue(s) need review:" % len(UNATTENDED_NOTICES)
+                                                                    + Style.RESET_ALL)
+    for message in UNATTENDED_NOTICES:
+        print("\t" + message.strip().replace("\n", "\n\t\t"))
+
+
+def find_in_string(regex_pattern, string_to_search, prompt, date_target=False, allow_none=False,
+                                                                            interactive=True):
     """Finds single match in string_to_search or presents prompt to user.
     If allow_none set to True, prompt only given upon multiple matches.
     date_target=True adds date validation.
+    interactive=False (or unattended mode) raises NeedsOperator instead of prompting.
+    Interactive layer over field_parsing, which does the (cached) matching.
     """
-    found = None # Initialize variable for loop
     prompted = False
-    while not found:
-        matches = re.findall(regex_pattern, string_to_search, flags=re.IGNORECASE)
-        if len(matches) == 1 and date_target:
-            # If looking for a date, check for valid date value (regex doesn't fully validate)
-            # print("\t\tmatches[0]: " + matches[0]) # DEBUG
-            for date_format in DATE_FORMATS:
-                try:
-                    time.strptime(matches[0], date_format)
-                except ValueError:
-                    continue
-                else:
-                    # Valid date
-                    return matches[0], prompted
-        elif len(matches) == 1:
-            return matches[0], prompted
-            # loop exits
-        elif len(matches) == 0 and allow_none:
+    while True:
+        match = parsing.find_single(regex_pattern, string_to_search, date_target)
+        if match is not None:
+            return match, prompted
+        elif allow_none and not parsing.find_matches(regex_pattern, string_to_search):
             # print("\t\t%s: no matches; returning None" % string_to_search) # DEBUG
             return None, prompted
 
         # No matches, multiple matches, or invalid date found:
+        if UNATTENDED or not interactive:
+            raise NeedsOperator(prompt)
         prompted = True
         print(Fore.GREEN + Style.BRIGHT + prompt)
         string_to_search = input(">" + Style.RESET_ALL)
 
 
-def datestamp_remote(remote=DIR_REMOTE_SRC):
+def parse_filename_sn_and_date(filename):
+    """Returns (S/N, datestamp) found in filename w/o prompting user.
+    Either is None if not found exactly once.
+    """
+    return parsing.parse_filename_sn_and_date(os.path.splitext(os.path.basename(filename))[0])
+
+
+def mirror_export(mirror_func, export_dir, source_path, vehicle_sn=None, **kwargs):
+    """Writes Parquet mirror of an export under export_dir, partitioned by
+    datestamp and S/N. Failure is reported but doesn't stop conversion.
+    """
+    sn_from_filename, export_date = parse_filename_sn_and_date(source_path)
+    try:
+        mirror_func(dataset_root=os.path.join(export_dir, parquet_mirror.PARQUET_DIR_NAME),
+                    source_name=os.path.splitext(os.path.basename(source_path))[0],
+                    vehicle_sn=vehicle_sn or sn_from_filename,
+                    export_date=export_date, **kwargs)
+    except Exception as exception_text:
+        tqdm.write(Fore.YELLOW + "Parquet mirror of %s failed: %s"
+                % (os.path.basename(source_path), exception_text) + Style.RESET_ALL)
+
+
+def _scan_dir(dir_path, journal_entry=None):
+    """Lists dir_path once. Returns its mtime (ns), subdir paths, and file DirEntry objects.
+    If dir's mtime matches journal_entry from a previous run, nothing in it has been
+    added, removed, or renamed since. Listing is skipped, subdirs come from the
+    journal, and None is returned for the file entries.
+    """
+    mtime_ns = os.stat(dir_path).st_mtime_ns
+    if journal_entry is not None and journal_entry["mtime_ns"] == mtime_ns:
+        return mtime_ns, [os.path.join(dir_path, name) for name in journal_entry["subdirs"]], None
+
+    subdir_paths = []
+    file_entries = []
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdir_paths.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                file_entries.append(entry)
+    return mtime_ns, subdir_paths, file_entries
+
+
+def scan_tree(root, executor, journal_dirs=None):
+    """Lists every file under root in a single traversal, listing dirs concurrently
+    in executor's threads to overlap network round trips.
+    journal_dirs maps dir paths (relative to root) to entries saved by a previous
+    run. Dirs unchanged since then aren't listed (their subdirs still are checked).
+    Returns (found_files, dir_states):
+        found_files: (dirpath, DirEntry) tuples sorted by dir then filename. DirEntry
+            objects keep the stat info the listing already fetched (on Windows).
+        dir_states: maps each visited dir's relative path to its mtime (ns),
+            subdir names, and whether it was listed this time.
+    """
+    if journal_dirs is None:
+        journal_dirs = dict()
+
+    found_files = []
+    dir_states = dict()
+    pending = {executor.submit(_scan_dir, root, journal_dirs.get(".")): root}
+    while pending:
+        done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            dir_path = pending.pop(future)
+            mtime_ns, subdir_paths, file_entries = future.result()
+            rel_dir = os.path.relpath(dir_path, root)
+            dir_states[rel_dir] = {"mtime_ns": mtime_ns, "listed": file_entries is not None,
+                        "subdirs": sorted(os.path.basename(path) for path in subdir_paths)}
+            if file_entries is not None:
+                found_files.extend((dir_path, entry) for entry in file_entries)
+            for subdir_path in subdir_paths:
+                rel_subdir = os.path.relpath(subdir_path, root)
+                pending[executor.submit(_scan_dir, subdir_path,
+                                        journal_dirs.get(rel_subdir))] = subdir_path
+    return sorted(found_files, key=lambda found: (found[0], found[1].name)), dir_states
+
+
+def load_datestamp_journal(journal_path, remote):
+    """Returns dir entries journaled by last datestamp_remote() run on remote,
+    or empty dict if none (or journal was for a different remote)."""
+    if not os.path.exists(journal_path):
+        return dict()
+    with open(journal_path, "r") as journal_file:
+        journal = json.load(journal_file)
+    if journal.get("remote") != os.path.abspath(remote):
+        return dict()
+    return journal["dirs"]
+
+
+def save_datestamp_journal(journal_path, remote, journal_dirs):
+    journal_dir = os.path.dirname(journal_path)
+    if journal_dir and not os.path.exists(journal_dir):
+        os.makedirs(journal_dir, exist_ok=True)
+    # Write to temp file first so an interrupted save doesn't corrupt journal.
+    with open(journal_path + ".tmp", "w") as journal_file:
+        json.dump({"remote": os.path.abspath(remote), "dirs": journal_dirs}, journal_file)
+    os.replace(journal_path + ".tmp", journal_path)
+
+
+class AmbiguousFilename(Exception):
+    """Raised in batch mode when S/N or date in a filename can't be resolved w/o user."""
+    def __init__(self, file_name, issue, sn_candidates, date_candidates):
+        super(AmbiguousFilename, self).__init__("%s: %s" % (file_name, issue))
+        self.file_name = file_name
+        self.issue = issue
+        self.sn_candidates = sn_candidates
+        self.date_candidates = date_candidates
+
+    def queue_entry(self, filepath):
+        return {"path": filepath, "file_name": self.file_name, "issue": self.issue,
+                "sn_candidates": self.sn_candidates,
+                "date_candidates": self.date_candidates,
+                "queued": time.strftime("%Y-%m-%dT%H%M%S")}
+
+
+def datestamped_filename(file_name, get_stat, batch=False):
+    """Returns normalized "YYYYMMDD_snNNNNNNN.ext" name for a .cpf/.cdf file.
+    Uses datestamp in existing name if present, otherwise file's mod date
+    (from get_stat(), called only if needed).
+    If S/N or date can't be resolved, prompts user, or in batch mode raises
+    AmbiguousFilename w/ candidate values instead.
+    """
+    item_name = os.path.splitext(file_name)[0]
+    ext = os.path.splitext(file_name)[-1]
+
+    # Find S/N in filename
+    if batch:
+        sn_candidates = parsing.find_candidates(SN_REGEX, item_name)
+        if len(sn_candidates) != 1:
+            raise AmbiguousFilename(file_name, "Found %d possible S/Ns" % len(sn_candidates),
+                        sn_candidates, parsing.find_candidates(DATE_REGEX_1, item_name, date_target=True))
+        serial_num = sn_candidates[0]
+    else:
+        prompt_str = "Can't parse S/N from import filename \"%s\".\n" \
+                                        "Type S/N manually: " % file_name
+        # print("\n\tS/N:") # DEBUG
+        serial_num, _ = find_in_string(SN_REGEX, item_name, prompt_str)
+    # Now look for date in remaining string. Will add later if not present.
+    # print("\tReceived %s as S/N back from find_in_string()" % serial_num) # DEBUG
+    remaining_str = item_name.split(serial_num)
+    date_found = False
+    for substring in remaining_str:
+        if batch:
+            # Same rule as interactive prompt below: a substring w/ dates must have exactly one valid one.
+            date_matches = parsing.find_candidates(DATE_REGEX_1, substring)
+            date_candidates = parsing.find_candidates(DATE_REGEX_1, substring, date_target=True)
+            if not date_matches:
+                continue
+            if len(date_matches) != 1 or len(date_candidates) != 1:
+                raise AmbiguousFilename(file_name, "Can't find single valid date",
+                                        [serial_num], date_candidates)
+            date_match = date_candidates[0]
+        else:
+            prompt_str = "Can't find single valid date match in import " \
+                                            "filename \"%s\".\n" \
+                    "Type manually (YYYYMMDD format): " % file_name
+            # print("\tDate:") # DEBUG
+            date_match, _ = find_in_string(DATE_REGEX_1, substring,
+                        prompt_str, date_target=True, allow_none=True)
+            # print("\tReceived %s as date back from find_in_string()" % date_match) # DEBUG
+
+        if date_match is not None:
+            date_found = True
+            existing_datestamp = date_match
+            break
+
+    if date_found:
+        datestamp = existing_datestamp
+    else:
+        # Find file last-modified time. Precise enough for our needs.
+        mod_date = time.localtime(get_stat().st_mtime)
+
+        # Some files have bogus mod dates. In that case, use today's date.
+        if mod_date < MIN_VALID_MOD_DATE:
+            # Substitute in today's date
+            date_to_use = time.localtime()
+        else:
+            date_to_use = mod_date
+
+        datestamp = time.strftime(DATE_FORMAT_1, date_to_use)
+
+    return "%s_sn%s%s" % (datestamp, serial_num, ext)
+
+
+def load_datestamp_queue(queue_path):
+    if not os.path.exists(queue_path):
+        return []
+    with open(queue_path, "r") as queue_file:
+        return json.load(queue_file)
+
+
+def save_datestamp_queue(queue_path, queued_files):
+    queue_dir = os.path.dirname(queue_path)
+    if queue_dir and not os.path.exists(queue_dir):
+        os.makedirs(queue_dir, exist_ok=True)
+    with open(queue_path + ".tmp", "w") as queue_file:
+        json.dump(queued_files, queue_file, indent=4)
+    os.replace(queue_path + ".tmp", queue_path)
+
+
+def resolve_datestamp_queue(queue_path=None):
+    """Walks operator through files batch-mode datestamp_remote() couldn't rename,
+    prompting for S/N and date as an interactive run would, then renames them.
+    Files still unresolved (e.g. rename failed) stay queued.
+    """
+    if queue_path is None:
+        queue_path = os.path.join(LOCAL_STATE_DIR, DATESTAMP_QUEUE_FILENAME)
+    queued_files = load_datestamp_queue(queue_path)
+    if not queued_files:
+        print("No files pending datestamp decisions.")
+        return
+
+    print("%d file(s) pending datestamp decisions:" % len(queued_files))
+    still_queued = []
+    for queue_entry in queued_files:
+        filepath = queue_entry["path"]
+        if not os.path.exists(filepath):
+            print(Fore.WHITE + Style.DIM + "\t%s no longer exists. Dropping from queue."
+                                    % queue_entry["file_name"] + Style.RESET_ALL)
+            continue
+        print(Fore.MAGENTA + "\n%s (in %s)\n\t%s\n\tS/N candidates: %s\n\tDate candidates: %s"
+                % (queue_entry["file_name"], os.path.dirname(filepath), queue_entry["issue"],
+                    ", ".join(queue_entry["sn_candidates"]) or "[None]",
+                    ", ".join(queue_entry["date_candidates"]) or "[None]") + Style.RESET_ALL)
+        new_filename = datestamped_filename(queue_entry["file_name"],
+                                            lambda: os.stat(filepath), batch=False)
+        try:
+            if new_filename != queue_entry["file_name"]:
+                os.rename(filepath, os.path.join(os.path.dirname(filepath), new_filename))
+                print(Fore.MAGENTA + "\t%s\t->\t%s" % (queue_entry["file_name"], new_filename)
+                                                                    + Style.RESET_ALL)
+        except OSError as exception_text:
+            print(Fore.RED + "\tRename failed: %s" % exception_text + Style.RESET_ALL)
+            still_queued.append(queue_entry)
+
+    save_datestamp_queue(queue_path, still_queued)
+
+
+def datestamp_remote(remote=DIR_REMOTE_SRC, workers=DATESTAMP_WORKERS,
+                        journal_path=None, full_scan=False, batch=False, queue_path=None):
+    """Renames .cpf/.cdf files under remote to "YYYYMMDD_snNNNNNNN" form.
+    A journal (journal_path, default in LOCAL_STATE_DIR) records each dir's mtime
+    and already-normalized filenames, so later runs skip unchanged dirs and only
+    parse new names. full_scan=True ignores the journal (it's still rewritten).
+    batch=True never waits on user: files whose S/N or date is ambiguous are
+    added to a pending-decisions queue (queue_path, default in LOCAL_STATE_DIR)
+    for resolve_datestamp_queue(). Returns number of files queued.
+    """
+    if journal_path is None:
+        journal_path = os.path.join(LOCAL_STATE_DIR, DATESTAMP_JOURNAL_FILENAME)
+    if queue_path is None:
+        queue_path = os.path.join(LOCAL_STATE_DIR, DATESTAMP_QUEUE_FILENAME)
+
     while not os.path.exists(remote):
+        if batch:
+            raise Exception('"%s" not found. Network drive not mounted?' % remote)
         # Prompt user to mount network drives if not found.
         print(Fore.GREEN + Style.BRIGHT + '\n"%s" not found. Mount '
-                                'and press Enter to try again.' % src)
+                                'and press Enter to try again.' % remote)
         input("> " + Style.RESET_ALL)
 
     # Keep track of renames for display later.
     old_names = []
     new_names = []
 
-    file_count = sum(len(files) for _, _, files in os.walk(remote))
-    # https://stackoverflow.com/questions/35969433/using-tqdm-on-a-for-loop-inside-a-function-to-check-progress
-    with tqdm(total=file_count, colour="#05e4ab") as pbar:
-        for dirpath, dirnames, filenames in os.walk(remote):
-            for file_name in sorted(filenames):
+    journal_dirs = dict() if full_scan else load_datestamp_journal(journal_path, remote)
+    queued_files = []
+    normalized_names = collections.defaultdict(set) # Final filenames in each listed dir
+    rename_failed_dirs = set()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        found_files, dir_states = scan_tree(remote, executor, journal_dirs)
+
+        # Names already normalized on a previous run don't need parsing again.
+        new_files = []
+        for dirpath, entry in found_files:
+            rel_dir = os.path.relpath(dirpath, remote)
+            if entry.name in journal_dirs.get(rel_dir, {}).get("files", ()):
+                normalized_names[rel_dir].add(entry.name)
+            else:
+                new_files.append((dirpath, entry))
+        found_files = new_files
+
+        # Stat files w/o a datestamp in their names in background. Only those need mod dates.
+        # Free on Windows (DirEntry caches stat from listing), one round trip each otherwise.
+        stat_futures = dict()
+        for dirpath, entry in found_files:
+            if (os.path.splitext(entry.name)[-1].lower() in (".cpf", ".cdf")
+                                    and not parsing.find_matches(DATE_REGEX_1, entry.name)):
+                stat_futures[entry.path] = executor.submit(entry.stat)
+
+        rename_futures = []
+        # https://stackoverflow.com/questions/35969433/using-tqdm-on-a-for-loop-inside-a-function-to-check-progress
+        with tqdm(total=len(found_files), colour="#05e4ab") as pbar:
+            for dirpath, entry in found_files:
                 pbar.update(1)
-                filepath = os.path.join(dirpath, file_name)
-                item_name = os.path.splitext(file_name)[0]
+                file_name = entry.name
+                filepath = entry.path
                 ext = os.path.splitext(file_name)[-1]
 
                 if ext.lower() in (".cpf", ".cdf"):
-                    # Find S/N in filename
-                    prompt_str = "Can't parse S/N from import filename \"%s\".\n" \
-                                                    "Type S/N manually: " % file_name
-                    # print("\n\tS/N:") # DEBUG
-                    serial_num, _ = find_in_string(SN_REGEX, item_name, prompt_str)
-                    # Now look for date in remaining string. Will add later if not present.
-                    # print("\tReceived %s as S/N back from find_in_string()" % serial_num) # DEBUG
-                    remaining_str = item_name.split(serial_num)
-                    date_found = False
-                    for substring in remaining_str:
-                        prompt_str = "Can't find single valid date match in import " \
-                                                            "filename \"%s\".\n" \
-                                "Type manually (YYYYMMDD format): " % file_name
-                        # print("\tDate:") # DEBUG
-                        date_match, _ = find_in_string(DATE_REGEX_1, substring,
-                                    prompt_str, date_target=True, allow_none=True)
-                        # print("\tReceived %s as date back from find_in_string()" % date_match) # DEBUG
-
-                        if date_match is not None:
-                            date_found = True
-                            existing_datestamp = date_match
-                            break
-
-                    if date_found:
-                        datestamp = existing_datestamp
-                    else:
-                        # Find file last-modified time. Precise enough for our needs.
-                        mod_date = time.localtime(os.path.getmtime(filepath))
-
-                        # Some files (CDF at least) have bogus mod dates - usually in 1999 or 2000.
-                        # In that case, use today's date.
-                        if mod_date < time.strptime("20200101", DATE_FORMAT_1):
-                            # Substitute in today's date
-                            date_to_use = time.localtime()
-                        else:
-                            date_to_use = mod_date
-
-                        datestamp = time.strftime(DATE_FORMAT_1, date_to_use)
-
-                    new_filename = "%s_sn%s%s" % (datestamp, serial_num, ext)
+                    # Stat only if needed (date missing from name after all). Called lazily.
+                    get_stat = stat_futures[filepath].result if filepath in stat_futures else entry.stat
+                    try:
+                        new_filename = datestamped_filename(file_name, get_stat, batch=batch)
+                    except AmbiguousFilename as ambiguity:
+                        # Leave for operator to resolve later instead of blocking run.
+                        queued_files.append(ambiguity.queue_entry(filepath))
+                        continue
                     new_filepath = os.path.join(dirpath, new_filename)
 
                     if file_name != new_filename:
-                        os.rename(filepath, new_filepath)
-
-                        old_names.append(file_name)
-                        new_names.append(new_filename)
+                        # Rename in background so network round trips overlap w/ parsing.
+                        rename_futures.append((dirpath, file_name, new_filename,
+                                    executor.submit(os.rename, filepath, new_filepath)))
+                    else:
+                        normalized_names[os.path.relpath(dirpath, remote)].add(file_name)
                 # input("> ") # DEBUG
 
+        rename_errors = []
+        for dirpath, file_name, new_filename, future in rename_futures:
+            try:
+                future.result()
+            except OSError as exception_text:
+                rename_errors.append("%s: %s" % (file_name, exception_text))
+                rename_failed_dirs.add(os.path.relpath(dirpath, remote))
+            else:
+                old_names.append(file_name)
+                new_names.append(new_filename)
+                normalized_names[os.path.relpath(dirpath, remote)].add(new_filename)
+
+    # Journal dirs as of when they were listed. Renames above change their mtimes,
+    # so they'll be listed once more next run, but no names in them will need parsing.
+    # Dirs w/ failed renames left out so those files get retried.
+    new_journal_dirs = dict()
+    for rel_dir, dir_state in dir_states.items():
+        if rel_dir in rename_failed_dirs:
+            continue
+        if dir_state["listed"]:
+            dir_files = normalized_names[rel_dir]
+        else:
+            dir_files = journal_dirs[rel_dir]["files"]
+        new_journal_dirs[rel_dir] = {"mtime_ns": dir_state["mtime_ns"],
+                                     "subdirs": dir_state["subdirs"],
+                                     "files": sorted(dir_files)}
+    save_datestamp_journal(journal_path, remote, new_journal_dirs)
+
+    if batch:
+        # Replace any earlier entries for same files w/ this run's findings.
+        queued_paths = set(queue_entry["path"] for queue_entry in queued_files)
+        queued_files = [queue_entry for queue_entry in load_datestamp_queue(queue_path)
+                        if queue_entry["path"] not in queued_paths
+                        and os.path.exists(queue_entry["path"])] + queued_files
+        save_datestamp_queue(queue_path, queued_files)
+
     print("Renames:")
     if len(old_names) > 0:
         for i, name in enumerate(old_names):
             print(Fore.MAGENTA + "\t%s\t->\t%s" % (old_names[i], new_names[i]))
-        input(Fore.GREEN + Style.BRIGHT + "\nPress Enter to continue"
-                                                    + Style.RESET_ALL)
+        if not batch:
+            input(Fore.GREEN + Style.BRIGHT + "\nPress Enter to continue"
+                                                        + Style.RESET_ALL)
     else:
         print(Fore.MAGENTA + "\t[None]" + Style.RESET_ALL)
-        time.sleep(2) # Pause for user to see that no files were renamed.
+        if not batch:
+            time.sleep(2) # Pause for user to see that no files were renamed.
+
+    if batch and queued_files:
+        print(Fore.YELLOW + "%d file(s) need S/N or date decisions. Queued in %s"
+                        % (len(queued_files), queue_path) + Style.RESET_ALL)
+
+    if rename_errors:
+        raise Exception("Failed to rename %d file(s):\n\t%s"
+                        % (len(rename_errors), "\n\t".join(rename_errors)))
+    return len(queued_files)
 
 
-def sync_remote(src, dest, multilevel=True, purge=False, silent=False):
+def sync_remote(src, dest, multilevel=True, purge=False, silent=False, native=None):
     if not os.path.exists(src):
         raise Exception("Can't find src dir '%s'" % src)
     if not os.path.exists(dest):
         raise Exception("Can't find dest dir '%s'" % dest)
 
+    if native is None:
+        native = NATIVE_SYNC
+    if native:
+        # Same semantics on every OS. State file lets later runs skip re-copying touched files.
+        metrics = sync_metrics.SyncMetrics("native", src, dest)
+        results = sync_engine.sync_tree(src, dest, multilevel=multilevel, purge=purge,
+                    silent=silent, state_path=os.path.join(LOCAL_STATE_DIR,
+                                                sync_engine.state_filename(src, dest)))
+        metrics.files_done = results["copied"]
+        metrics.bytes_done = results["copied_bytes"]
+        metrics.files_failed = len(results["errors"])
+        metrics.files_total = results["copied"] + results["restamped"] + results["unchanged"]
+        metrics.output_tail.extend(results["errors"])
+        metrics.finish(1 if results["errors"] else 0)
+        log_sync_metrics(metrics)
+        if results["errors"]:
+            raise Exception("SYNC to '%s' FAILED" % os.path.basename(dest))
+        if not silent:
+            print("Sync to '%s' successful\n" % os.path.basename(dest))
+        return metrics
+
     flags = []
     if multilevel and os.name=="nt":
         flags.append("/s")
@@ -198,51 +593,131 @@ def sync_remote(src, dest, multilevel=True, purge=False, silent=False):
     elif purge and os.name=="posix":
         flags.append("--delete-before")
 
-    if silent and os.name=="nt":
-        flags.extend(["/NFL", "/NDL", "/NJH", "/NJS", "/nc", "/ns", "/np"])
-        # https://stackoverflow.com/questions/3898127/how-can-i-make-robocopy-silent-in-the-command-line-except-for-progress
-    elif silent and os.name=="posix":
-        flags.append("-q")
-        # https://serverfault.com/questions/547106/run-totally-silent-rsync
-
+    # Output is captured and parsed for metrics (not passed through), so silent
+    # only needs to hide the progress bar and messages.
     if os.name=="nt":
         if not silent:
-            print("Attempting to run robocopy..." + Fore.YELLOW)
-        returncode = subprocess.call(["robocopy", src, dest, "/compress"] + flags)
+            print("Attempting to run robocopy...")
+        metrics = sync_metrics.SyncMetrics("robocopy", src, dest)
+        command = ["robocopy", src, dest, "/compress", "/bytes", "/np", "/NDL", "/NJH"] + flags
+        # /bytes gives exact sizes in per-file lines and job summary. /np drops per-file %.
         # https://learn.microsoft.com/en-us/windows-server/administration/windows-commands/robocopy
         # https://stackoverflow.com/questions/13161659/how-can-i-call-robocopy-within-a-python-script-to-bulk-copy-multiple-folders
 
     elif os.name=="posix":
         if not silent:
-            print("Attempting to run rsync..." + Fore.YELLOW)
-        CompProc = subprocess.run(["rsync", "-azivh"] + flags + ["%s/" % src,
-                                        "%s/" % dest], stderr=subprocess.STDOUT)
+            print("Attempting to run rsync...")
+        metrics = sync_metrics.SyncMetrics("rsync", src, dest)
+        command = ["rsync", "-az", "--no-h", "--info=progress2,stats2"] + flags + ["%s/" % src,
+                                                                            "%s/" % dest]
+        # progress2 gives whole-transfer progress instead of per file.
 
-    if not silent:
-        print(Style.RESET_ALL)
+    sync_metrics.run_with_progress(command, metrics, desc=os.path.basename(dest), silent=silent)
+    log_sync_metrics(metrics)
 
     # Check for success
-    if (os.name=="nt" and returncode < 8) or (os.name=="posix" and CompProc.returncode == 0):
+    if metrics.succeeded():
         # https://superuser.com/questions/280425/getting-robocopy-to-return-a-proper-exit-code
         # https://learn.microsoft.com/en-us/windows-server/administration/windows-commands/robocopy
         if not silent:
-            print("Sync to '%s' successful\n" % os.path.basename(dest))
+            print("Sync to '%s' successful: %s in %.1f s\n" % (os.path.basename(dest),
+                                sync_metrics.progress_postfix(metrics), metrics.elapsed))
     else:
+        print(Fore.RED + "\n".join(metrics.output_tail) + Style.RESET_ALL)
         raise Exception("SYNC to '%s' FAILED" % os.path.basename(dest))
+    return metrics
+
+
+def log_sync_metrics(metrics):
+    """Appends run's metrics to log in LOCAL_STATE_DIR (summarize w/ sync_metrics.py)."""
+    try:
+        sync_metrics.append_record(os.path.join(LOCAL_STATE_DIR, sync_metrics.METRICS_FILENAME), metrics)
+    except OSError as exception_text:
+        # Metrics are informational. Don't fail a sync over them.
+        tqdm.write(Fore.YELLOW + "Couldn't log sync metrics: %s" % exception_text + Style.RESET_ALL)
 
 
-def back_up_remote(src=DIR_REMOTE_SRC, dest_root=DIR_REMOTE_BU):
+def link_or_copy(src_path, dest_path):
+    """Makes dest_path a hardlink to src_path, replacing any existing file.
+    Falls back to a copy where hardlinks aren't supported (e.g. across volumes
+    or on FAT/exFAT drives). Returns True if linked, False if copied.
+    """
+    tmp_path = dest_path + ".linktmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(src_path, tmp_path)
+        linked = True
+    except OSError:
+        shutil.copy2(src_path, tmp_path)
+        linked = False
+    os.replace(tmp_path, dest_path)
+    return linked
+
+
+def update_union_from_mirror(mirror, union):
+    """Adds/updates every file in mirror to union w/o removing anything from union.
+    Runs entirely on local disk. Files are hardlinked, so union costs no extra
+    space for files still in mirror. Once a file is purged from mirror (or
+    replaced by a new version), union's link keeps the old content.
+    Returns (linked_count, copied_count).
+    """
+    if not os.path.exists(mirror):
+        raise Exception("Can't find mirror dir '%s'" % mirror)
+
+    linked_count = 0
+    copied_count = 0
+    for dirpath, dirnames, filenames in os.walk(mirror):
+        union_dir = os.path.join(union, os.path.relpath(dirpath, mirror))
+        os.makedirs(union_dir, exist_ok=True)
+        for filename in filenames:
+            mirror_path = os.path.join(dirpath, filename)
+            union_path = os.path.join(union_dir, filename)
+            if os.path.exists(union_path):
+                mirror_stat = os.stat(mirror_path)
+                union_stat = os.stat(union_path)
+                if os.path.samestat(mirror_stat, union_stat):
+                    continue # Already linked
+                if (mirror_stat.st_size == union_stat.st_size
+                            and mirror_stat.st_mtime_ns == union_stat.st_mtime_ns):
+                    continue # Same file copied in by an earlier sync. Same test robocopy uses.
+            if link_or_copy(mirror_path, union_path):
+                linked_count += 1
+            else:
+                copied_count += 1
+    return linked_count, copied_count
+
+
+def back_up_remote(src=DIR_REMOTE_SRC, dest_root=DIR_REMOTE_BU, backup_mode=None):
+    if backup_mode is None:
+        backup_mode = BACKUP_MODE
+    if backup_mode not in ("union", "snapshot", "both"):
+        raise Exception("Invalid backup_mode '%s'" % backup_mode)
     if not os.path.exists(src):
         raise Exception("Can't find src dir '%s'" % src)
     if not os.path.exists(dest_root):
         raise Exception("Can't find dest_root dir '%s'" % dest_root)
 
     # Back up remote source contents before datestamping files on remote.
+    # Only pass over the network.
+    os.makedirs(os.path.join(dest_root, "mirror"), exist_ok=True) # First run
     sync_remote(src, os.path.join(dest_root, "mirror"), purge=True, silent=True)
     # Removes any extraneous files from local import folder that don't exist in remote.
 
-    sync_remote(src, os.path.join(dest_root, "union"), silent=True)
-    # Leaves all in place
+    if backup_mode in ("union", "both"):
+        # Union built from local mirror instead of a 2nd sync from remote.
+        union = os.path.join(dest_root, "union")
+        linked_count, copied_count = update_union_from_mirror(os.path.join(dest_root, "mirror"), union)
+        # Leaves all in place
+        if copied_count:
+            print(Fore.YELLOW + "%d file(s) copied into '%s' (hardlinks not supported)."
+                                    % (copied_count, union) + Style.RESET_ALL)
+
+    if backup_mode in ("snapshot", "both"):
+        # Also snapshotted from local mirror. Only new/changed files are read.
+        Store = snapshot_store.SnapshotStore(os.path.join(dest_root, "store"))
+        snapshot_name = Store.create_snapshot(os.path.join(dest_root, "mirror"), silent=True)
+        print("Backup snapshot %s saved." % snapshot_name)
 
 
 def update_from_remote_dirs(src=DIR_REMOTE_SRC, dest=DIR_IMPORT):
@@ -264,6 +739,10 @@ def update_from_remote_dirs(src=DIR_REMOTE_SRC, dest=DIR_IMPORT):
             back_up_remote()
             print("...done")
 
+            # Settle anything scheduled (batch) runs left for user first.
+            if load_datestamp_queue(os.path.join(LOCAL_STATE_DIR, DATESTAMP_QUEUE_FILENAME)):
+                resolve_datestamp_queue()
+
             print("Updating remote filenames...")
             datestamp_remote()
         except KeyboardInterrupt:
@@ -296,11 +775,10 @@ def update_from_remote_dirs(src=DIR_REMOTE_SRC, dest=DIR_IMPORT):
         print("Skipping import-dir update from remote.\n")
 
 
-def convert_file(cpf_path, target_dir, check_sn=False, gui_in_focus=False):
-    """
-    Converts a CPF to Excel format.
-    temp_dir path required for processing CPFs.
-    check_sn indicates whether to validate vehicle S/N in filename.
+def export_cpf_tsvs(cpf_path, target_dir, ActiveGUI_Driver, check_sn=False):
+    """GUI part of CPF conversion. Exports CPF's params and faults as TSVs to
+    target_dir/tmp (unless already there from previous processing).
+    Returns (cpf_params_path, cpf_faults_path). cpf_faults_path None if no faults.
     """
     if not os.path.exists(cpf_path):
         raise Exception("Can't find src file '%s'" % cpf_path)
@@ -314,16 +792,16 @@ def convert_file(cpf_path, target_dir, check_sn=False, gui_in_focus=False):
     if not os.path.exists(temp_dir):
         os.mkdir(temp_dir) # Will leave in place after processing finished.
 
-    if not gui_in_focus:
-        select_program(os.path.splitext(cpf_path)[-1][1:])
+    if not ActiveGUI_Driver.gui_is_in_focus():
+        ActiveGUI_Driver.select_program(os.path.splitext(cpf_path)[-1][1:])
 
     cpf_open = False
     # Open CPF in GUI and export parameters if export doesn't exist already.
     cpf_param_export_filename = os.path.splitext(cpf_name)[0] + CPF_PARAM_EXPORT_SUFFIX
     if not os.path.exists(os.path.join(temp_dir, cpf_param_export_filename)):
-        cpf_open = open_cpf(cpf_path)
-        cpf_params_path = export_cpf_params(temp_dir, cpf_param_export_filename,
-                                                        validate_sn=check_sn)
+        cpf_open = ActiveGUI_Driver.open_cpf(cpf_path)
+        cpf_params_path = ActiveGUI_Driver.export_cpf_params(temp_dir,
+                                cpf_param_export_filename, validate_sn=check_sn)
     else:
         cpf_params_path = os.path.join(temp_dir, cpf_param_export_filename)
 
@@ -331,24 +809,80 @@ def convert_file(cpf_path, target_dir, check_sn=False, gui_in_focus=False):
     cpf_fault_export_filename = os.path.splitext(cpf_name)[0] + CPF_FAULT_EXPORT_SUFFIX
     if not os.path.exists(os.path.join(temp_dir, cpf_fault_export_filename)):
         if not cpf_open:
-            cpf_open = open_cpf(cpf_path)
+            cpf_open = ActiveGUI_Driver.open_cpf(cpf_path)
 
         # Export faults
-        cpf_faults_path = export_cpf_faults(temp_dir, cpf_fault_export_filename)
+        cpf_faults_path = ActiveGUI_Driver.export_cpf_faults(temp_dir, cpf_fault_export_filename)
 
     else:
         # If it already exists in temp dir from previous processing.
         cpf_faults_path = os.path.join(temp_dir, cpf_fault_export_filename)
 
-    # Combine both tsvs to single export file.
+    return cpf_params_path, cpf_faults_path
+
+
+def combine_cpf_export(cpf_path, target_dir, cpf_params_path, cpf_faults_path):
+    """Non-GUI part of CPF conversion. Combines both TSVs into single .xlsx
+    export in target_dir and mirrors them to Parquet. No GUI or manifest access,
+    so can run in a worker thread. Returns combined export path.
+    """
+    cpf_name = os.path.basename(cpf_path)
     cpf_combined_export_filename = os.path.splitext(cpf_name)[0] + CPF_COMBINED_EXPORT_SUFFIX
     cpf_combined_export_path = os.path.join(target_dir, cpf_combined_export_filename)
     fixcpf.combine_param_and_fault_export(cpf_params_path, cpf_faults_path, cpf_combined_export_path)
-    return True
+    mirror_export(parquet_mirror.mirror_cpf_tsvs, target_dir, cpf_path,
+                  cpf_params_path=cpf_params_path, cpf_faults_path=cpf_faults_path)
+    return cpf_combined_export_path
+
+
+def wait_for_file(file_path, timeout, poll_interval=FILE_POLL_INTERVAL,
+                                                settle_time=FILE_SETTLE_TIME):
+    """Polls until file_path exists and its size has stopped changing for
+    settle_time seconds. Returns True once that happens, or False if timeout
+    (seconds) passes first.
+    """
+    deadline = time.monotonic() + timeout
+    last_size = None
+    stable_since = None
+    while True:
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = None # Doesn't exist yet (or locked mid-write on Windows).
+
+        now = time.monotonic()
+        if size is None or size != last_size:
+            last_size = size
+            stable_since = now
+        elif now - stable_since >= settle_time:
+            return True
+
+        if now >= deadline:
+            return False
+        time.sleep(poll_interval)
+
+
+def wait_for_excel_book(file_path, timeout, poll_interval=FILE_POLL_INTERVAL):
+    """Polls running Excel instances until a workbook w/ file_path's name is open.
+    Returns the xlwings Book, or None if timeout (seconds) passes first.
+    """
+    book_name = os.path.basename(file_path).lower()
+    deadline = time.monotonic() + timeout
+    while True:
+        for app in xw.apps:
+            for book in app.books:
+                if book.name.lower() == book_name:
+                    return book
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(poll_interval)
 
 
 def select_program(filetype):
     # Brings conversion program into focus.
+    if UNATTENDED:
+        # --auto expects CPF program left open in front (see run_auto_pipeline()).
+        return
     proj_file_msg = ""
     answer = gui.confirm("%sBring %s-conversion GUI into focus, make sure CAPSLOCK "
                     "is off, then click OK." % (proj_file_msg, filetype.upper()))
@@ -365,19 +899,8 @@ def open_cpf(file_path):
         raise Exception("Can't find file_path '%s'" % file_path)
 
     # Assumes 1314 program already in focus.
-    # Get to import folder
-    gui.hotkey("ctrl", "o")
-
-    gui.hotkey("ctrl", "l") # Select address bar
-
-    gui.typewrite(os.path.dirname(file_path)) # Navigate to import folder.
-    gui.press(["enter"])
-
-    gui.hotkey("alt", "n") # Select filename field
-    gui.typewrite(os.path.basename(file_path))
-    gui.press(["enter"]) # Confirm filename to open.
-    time.sleep(1 * GUI_PAUSE_MULT) # Allow time for to open.
-
+    GUI_RUNNER.run("open_cpf", dir_path=os.path.dirname(file_path),
+                                filename=os.path.basename(file_path))
     return True
 
 
@@ -386,21 +909,13 @@ def export_cpf_params(target_dir, output_filename, validate_sn):
         raise Exception("Can't find target_dir '%s'" % target_dir)
 
     # Assumes 1314 program already in focus.
-    gui.hotkey("alt", "f") # Open File menu (toolbar).
-    gui.press(["e"]) # Select Export from File menu.
-
-    gui.hotkey("alt", "n") # Select filename field
-    gui.typewrite(output_filename)
-
-    gui.hotkey("ctrl", "l") # Select address bar
-    gui.typewrite(target_dir) # Navigate to target export folder.
-    gui.press(["enter"])
-    gui.hotkey("alt", "s") # Save
-    time.sleep(0.2 * GUI_PAUSE_MULT)
+    GUI_RUNNER.run("export_cpf_params", dir_path=target_dir, filename=output_filename)
 
     # Check if new file exists in exported location as expected after conversion.
     export_path = os.path.join(target_dir, output_filename)
-    assert os.path.exists(export_path), "Can't confirm output file existence."
+    export_found = wait_for_file(export_path, CPF_PARAM_EXPORT_TIMEOUT * GUI_PAUSE_MULT)
+    GUI_RUNNER.record_result(export_found) # Covers open_cpf too if run since last result.
+    assert export_found, "Can't confirm output file existence."
 
     if validate_sn:
         match = check_cpf_vehicle_sn(export_path)
@@ -436,89 +951,80 @@ def check_cpf_vehicle_sn(cpf_param_path):
         return False
     elif vehicle_sn_stored != vehicle_sn_from_filename:
         print(Fore.RED + Style.BRIGHT)
-        input("S/N mismatch: %s in \"%s\".\nEvaluate and fix filenames if needed "
+        pause_for_user("S/N mismatch: %s in \"%s\".\nEvaluate and fix filenames if needed "
                                 "(import and export).\nPress Enter to continue."
-                % (vehicle_sn_stored, cpf_param_filename) + Style.RESET_ALL)
+                % (vehicle_sn_stored, cpf_param_filename))
         return False
     else:
         return True
 
 
 def export_cpf_faults(target_dir, output_filename):
-    global ERROR_HISTORY_SAVE_BUTTON_LOC # Allow modification of global variable
-
     if not os.path.exists(target_dir):
         raise Exception("Can't find target_dir '%s'" % target_dir)
 
     # Assumes 1314 program already in focus.
 
-    gui.hotkey("ctrl", "4") # Diagnostics tab
+    GUI_RUNNER.run("open_cpf_diagnostics")
 
     # Click on Save button inside Error History tab (different than Ctrl+S save)
-    # Mouse hovering over Save icon from previous export changes button appearance.
-    if ERROR_HISTORY_SAVE_BUTTON_LOC is None:
-        loc_tuple = gui.locateCenterOnScreen(ERROR_HISTORY_SAVE_IMG)
-        if loc_tuple is None:
-            print(Fore.GREEN + Style.BRIGHT)
-            print("\nCan't find Error History save button for (\"%s\").\n"
-                                "Empty fault history [Y/N]?" % output_filename)
-            answer = input("> " + Style.RESET_ALL)
-            if answer.upper() == "Y":
-                select_program("cpf")
-                gui.hotkey("ctrl", "f4") # Close CPF file.
-                return None
-            else:
-                # Accept anything other than a blank input or 'Y' as a No.
-                raise Exception("Can't find Error History save button.")
+    # If no faults present in CPF, greyed-out (blank) Save icon shown in its place.
+    icon_name, icon_box = SCREEN_LOCATOR.locate_any(["error_history_save", "error_history_blank"])
+    if icon_name == "error_history_blank":
+        GUI_RUNNER.record_result(None) # Not a timing issue.
+        GUI_RUNNER.run("close_cpf")
+        return None
+    elif icon_name is None:
+        if UNATTENDED:
+            raise NeedsOperator("Can't find Error History save button for (\"%s\")."
+                                                                    % output_filename)
+        print(Fore.GREEN + Style.BRIGHT)
+        print("\nCan't find Error History save button for (\"%s\").\n"
+                            "Empty fault history [Y/N]?" % output_filename)
+        answer = input("> " + Style.RESET_ALL)
+        if answer.upper() == "Y":
+            GUI_RUNNER.record_result(None) # Not a timing issue.
+            select_program("cpf")
+            GUI_RUNNER.run("close_cpf")
+            return None
         else:
-            ERROR_HISTORY_SAVE_BUTTON_LOC = loc_tuple # Update global variable.
-    else:
-        # Use previously-found button if coordinates stored already.
-        loc_tuple = ERROR_HISTORY_SAVE_BUTTON_LOC
-
-    # If no faults present in CPF, Save button will be absent. Will fail to export cpf-faults file.
-
-    # loc_tuple = gui.locateCenterOnScreen(ERROR_HISTORY_SAVE_IMG)
-    # if loc_tuple is None:
-    #     # If no faults present in CPF, Save button will be absent.
-    #     # Look for greyed-out Save icon.
-    #     loc_tuple = gui.locateCenterOnScreen(ERROR_HISTORY_BLANK)
-    #     if loc_tuple is None:
-    #         raise Exception("Can't find Error History save button.")
-    #     else:
-    #         print("\nNo faults present in %s" % output_filename)
-    #         return None
-
-    x, y = loc_tuple
-    gui.click(x, y)
-
-    gui.hotkey("alt", "n") # Select filename field
-    gui.typewrite(output_filename)
-
-    gui.hotkey("ctrl", "l") # Select address bar
-    gui.typewrite(target_dir) # Navigate to target export folder.
-    gui.press(["enter"])
-    gui.hotkey("alt", "s") # Save
-    time.sleep(0.2 * GUI_PAUSE_MULT)
+            # Accept anything other than a blank input or 'Y' as a No.
+            raise Exception("Can't find Error History save button.")
+
+    x, y = SCREEN_LOCATOR.center(icon_box)
+    GUI_RUNNER.run("export_cpf_faults", x=x, y=y, dir_path=target_dir, filename=output_filename)
 
     # Check if new file exists in exported location as expected after conversion.
     export_path = os.path.join(target_dir, output_filename)
-    if not os.path.exists(export_path):
+    if wait_for_file(export_path, CPF_FAULT_EXPORT_TIMEOUT * GUI_PAUSE_MULT):
+        GUI_RUNNER.record_result(True)
+    elif UNATTENDED:
+        # Save icon was found and clicked (empty fault history shows blank icon instead),
+        # so export should have appeared. Leave CPF unconverted to retry next run.
+        GUI_RUNNER.record_result(False)
+        raise Exception("Can't find cpf_faults file '%s'" % output_filename)
+    else:
         print(Fore.GREEN + Style.BRIGHT)
         print("\nCan't confirm output file existence (\"%s\").\nEmpty fault history [Y/N]?" % output_filename)
         answer = input("> " + Style.RESET_ALL)
         if answer.upper() == "Y":
+            GUI_RUNNER.record_result(None) # Not a timing issue.
             select_program("cpf")
             export_path = None
         else:
             # Accept anything other than a blank input or 'Y' as a No.
+            GUI_RUNNER.record_result(False)
             raise Exception("Can't find cpf_faults file '%s'" % output_filename)
 
-    gui.hotkey("ctrl", "f4") # Close CPF file.
+    GUI_RUNNER.run("close_cpf")
     return export_path
 
 
 class GUI_Driver(object):
+    """Conversion backend. Drives the CPF-conversion program and CIT through
+    pyautogui. Subclasses (e.g. simulated_backend.SimulatedGUI_Driver) can
+    replace these methods to convert w/o the GUI programs.
+    """
     def __init__(self):
         self.gui_in_focus = False
 
@@ -534,6 +1040,12 @@ class GUI_Driver(object):
             proj_file_msg = "Check intended project file is loaded in CIT.\n"
         else:
             proj_file_msg = ""
+        if UNATTENDED:
+            if filetype.upper() == "CDF":
+                GUI_RUNNER.run("refocus_cit")
+                GUI_RUNNER.record_result(None) # No direct check of refocus.
+            self.gui_in_focus = True
+            return
         answer = gui.confirm("%sBring %s-conversion GUI into focus, make sure CAPSLOCK "
                         "is off, then click OK." % (proj_file_msg, filetype.upper()))
         if answer == "OK":
@@ -545,6 +1057,23 @@ class GUI_Driver(object):
             self.gui_in_focus = False
             raise UserCancel()
 
+    def load_cprj(self, cprj_rev):
+        # Have user switch CIT project file before converting CDFs needing another rev.
+        self.lose_focus()
+        if UNATTENDED:
+            raise NeedsOperator("CDFs remain that need cprj w/ rev %s loaded in CIT." % cprj_rev)
+        print(Fore.GREEN + Style.BRIGHT)
+        input("Load cprj w/ rev %s into CIT then press Enter to continue." % cprj_rev + Style.RESET_ALL)
+
+    def open_cpf(self, file_path):
+        return open_cpf(file_path)
+
+    def export_cpf_params(self, target_dir, output_filename, validate_sn):
+        return export_cpf_params(target_dir, output_filename, validate_sn)
+
+    def export_cpf_faults(self, target_dir, output_filename):
+        return export_cpf_faults(target_dir, output_filename)
+
     def open_cdf(self, file_path):
         if not os.path.exists(file_path):
             raise Exception("Can't find file_path '%s'" % file_path)
@@ -554,22 +1083,8 @@ class GUI_Driver(object):
             self.select_program("CDF")
 
         # Import file
-        gui.press(["alt"])
-        gui.press(["f"])
-        gui.press(["i"])
-        gui.press(["c"])
-
-        gui.press(["enter"]) # Confirm node to use.
-
-        gui.hotkey("ctrl", "l") # Select address bar
-        gui.typewrite(os.path.dirname(file_path)) # Navigate to import folder.
-        gui.press(["enter"])
-
-        gui.hotkey("alt", "n") # Select filename field
-        gui.typewrite(os.path.basename(file_path))
-        gui.press(["enter"]) # Confirm filename to open.
-        time.sleep(1 * GUI_PAUSE_MULT) # Allow time for file to open.
-
+        GUI_RUNNER.run("open_cdf", dir_path=os.path.dirname(file_path),
+                                    filename=os.path.basename(file_path))
         return True
 
 
@@ -585,34 +1100,26 @@ class GUI_Driver(object):
             self.select_program("CDF")
 
         # Export spreadsheet
-        gui.press(["alt"])
-        gui.press(["f"])
-        gui.press(["e"])
-        gui.press(["s"])
-
-        gui.hotkey("alt", "n") # Select filename field
-        gui.typewrite(output_filename)
-
-        gui.hotkey("ctrl", "l") # Select address bar
-        gui.typewrite(target_dir) # Navigate to target export folder.
-        gui.press(["enter"])
-        gui.hotkey("alt", "s") # Save
-        time.sleep(0.75 * GUI_PAUSE_MULT)
-
-        gui.press(["enter"]) # Click through error
-
-        time.sleep(20 * GUI_PAUSE_MULT) # Allow time for it to write and open Excel file.
-        # CIT opens .xlsx export automatically.
+        GUI_RUNNER.run("export_cdf", dir_path=target_dir, filename=output_filename)
+
+        # Wait for CIT to finish writing the export, then attach to it in Excel.
+        export_found = wait_for_file(output_filepath, CDF_EXPORT_TIMEOUT * GUI_PAUSE_MULT)
+        GUI_RUNNER.record_result(export_found) # Covers open_cdf too.
+        if not export_found:
+            raise Exception("Can't confirm output file existence ('%s')." % output_filename)
+        # CIT opens .xlsx export automatically. Wait for that rather than opening
+        # it here, which could leave CIT opening a second copy afterward.
+        book = wait_for_excel_book(output_filepath, EXCEL_OPEN_TIMEOUT * GUI_PAUSE_MULT)
+        if book is None:
+            book = xw.Book(output_filepath)
         # Close export (doesn't always work):
-        book = xw.Book(output_filepath)
         book.close()
 
         # Re-focus on CIT.
         # Excel behavior inconsistent.
         # Closing workbook above often leaves a blank instance of Excel anyway.
-        # Click title bar of CIT to bring back in focus.
-        # Snap CIT to right half of screen and make sure Excel window isn't full-screen.
-        gui.click(1477, 17)
+        GUI_RUNNER.run("refocus_cit")
+        GUI_RUNNER.record_result(None) # No direct check of refocus.
 
 
 class CloneDataFile(object):
@@ -635,6 +1142,12 @@ class CloneDataFile(object):
         self.vehicle_sn_param = None  # Vehicle S/N stored in controller. Various failure modes can couse this to be wrong.
         self.vehicle_sn = None        # Canonical vehicle S/N after validation. Still may be none if impossible to confidently infer.
 
+        self.export_scan = None       # To be set by _scan_export(). Cleared when export removed.
+
+        self.cprj_rev_used = None     # Rev of cprj loaded in CIT when export made. Set by check_cprj_rev_match().
+        self.defer_issues = False     # Set by validate(). Collect issues instead of prompting.
+        self.issues = []              # Issues found by last validate(background=True).
+
         self.ParentDB = CDF_DB
 
     def is_valid_cdf(self):
@@ -682,12 +1195,21 @@ class CloneDataFile(object):
     def remove_export(self):
         assert self.has_export(), "Tried to remove %s export but it doesn't exist." % self
         os.remove(self.export_path)
+        self.export_scan = None
 
     def convert(self, target_dir, check_sn=False):
         """
         Converts a CDF to Excel format.
         check_sn indicates whether to validate vehicle S/N in filename.
         """
+        if not self.export(target_dir):
+            return False
+        return self.validate(check_sn=check_sn)
+
+    def export(self, target_dir):
+        """GUI part of conversion. Exports CDF to .xlsx in target_dir.
+        Returns False if CDF turned out to be empty.
+        """
         assert self.is_valid_cdf(), "Tried to convert an empty file."
 
         assert not self.has_export(), "Tried to convert %s, but an export already exists here: '%s'" % (self, self.export_path)
@@ -702,9 +1224,19 @@ class CloneDataFile(object):
             self.ParentDB.get_GUI_Driver().export_cdf(self.export_path)
             # select_program("cdf") # Inconsistent Excel behavior - sometimes steals focus and sometimes doesn't
         else:
-            print("\n\tSkipping %s (empty file)." % os.path.basename(cdf_path))
+            print("\n\tSkipping %s (empty file)." % self.cdf_filename)
             return False
+        return True
 
+    def validate(self, check_sn=False, background=False):
+        """Checks export's vehicle S/N (if check_sn) and that cprj used matches
+        source's SW rev. Removes export and returns False if cprj doesn't match.
+        background=True makes no GUI or user interaction, so it can run in a
+        worker thread while GUI exports next CDF. Issues needing a person are
+        collected in self.issues instead of prompted for.
+        """
+        self.defer_issues = background
+        self.issues = []
         if check_sn:
             self.check_stored_vehicle_sn()
 
@@ -715,48 +1247,64 @@ class CloneDataFile(object):
 
         return True
 
+    def _report_issue(self, message):
+        """Reports problem user should check. Prompts for acknowledgement, or
+        collects it in self.issues if validating in background.
+        """
+        if self.defer_issues:
+            self.issues.append(message)
+            return
+        self.ParentDB.get_GUI_Driver().lose_focus()
+        print(Fore.RED + Style.BRIGHT)
+        pause_for_user(message + "\nPress Enter to continue.")
+
+    def _find_in_string(self, regex_pattern, string_to_search, prompt, allow_none=False):
+        """find_in_string() for validation steps. If validating in background,
+        a prompt becomes an issue (first line of prompt) and counts as no match.
+        """
+        if not self.defer_issues:
+            match, stole_focus = find_in_string(regex_pattern, string_to_search, prompt,
+                                                                allow_none=allow_none)
+            if stole_focus:
+                self.ParentDB.get_GUI_Driver().lose_focus()
+            return match
+        try:
+            match, _ = find_in_string(regex_pattern, string_to_search, prompt,
+                                        allow_none=allow_none, interactive=False)
+        except NeedsOperator:
+            self.issues.append(prompt.split("\n")[0])
+            return None
+        return match
+
     def check_stored_vehicle_sn(self):
         assert self.has_export(), "Tried to extract vehicle S/N from CDF export, but export doesn't exist.\n\t%s" % self
 
         prompt_str = "Can\'t parse S/N from cdf_filename \"%s\".\n" \
                                                     "Type S/N manually: " % self.cdf_filename
-        vehicle_sn_from_filename, stole_focus = find_in_string(SN_REGEX, self.cdf_filename, prompt_str)
-        if stole_focus:
-            self.ParentDB.get_GUI_Driver().lose_focus()
+        vehicle_sn_from_filename = self._find_in_string(SN_REGEX, self.cdf_filename, prompt_str)
 
         self.extract_stored_vehicle_sn() # Populates self.vehicle_sn_param
         if self.vehicle_sn_param is None:
-            self.ParentDB.get_GUI_Driver().lose_focus()
-            print(Fore.RED + Style.BRIGHT)
-            input("No valid S/N found in \"%s\". Press Enter to continue." % self.cdf_filename + Style.RESET_ALL)
+            self._report_issue("No valid S/N found in \"%s\"." % self.cdf_filename)
+        elif vehicle_sn_from_filename is None:
+            # Background validation couldn't parse filename (issue already reported).
+            # Keep stored S/N, which passed format checks.
+            self.vehicle_sn = self.vehicle_sn_param
         elif self.vehicle_sn_param != vehicle_sn_from_filename:
-            self.ParentDB.get_GUI_Driver().lose_focus()
-            print(Fore.RED + Style.BRIGHT)
-            input("S/N mismatch: %s in \"%s\".\nEvaluate and fix filenames if needed "
-                                    "(import and export).\nPress Enter to continue."
-                    % (self.vehicle_sn_param, self.cdf_filename) + Style.RESET_ALL)
+            self._report_issue("S/N mismatch: %s in \"%s\".\nEvaluate and fix filenames if needed "
+                                    "(import and export)." % (self.vehicle_sn_param, self.cdf_filename))
             # TODO: prompt user - should self.vehicle_sn should be set to vehicle_sn_from_filename in this case?
         else:
             self.vehicle_sn = self.vehicle_sn_param
 
     def extract_stored_vehicle_sn(self):
-        CDF_VARIABLE_NAME = "nvuser4"
+        CDF_VARIABLE_NAME = CDF_SN_VAR_NAME
         assert self.has_export(), "Tried to extract vehicle S/N from CDF export, but export doesn't exist.\n\t%s" % self
 
         # vehicle S/N in export file
-        param_df = pd.read_excel(self.export_path, sheet_name="Parameters")
-        for _, row in param_df.iterrows():
-            if row["Variable Name"] == CDF_VARIABLE_NAME:
-                # Check if VCL Alias column available (old CIT versions don't include it.)
-                if "VCL Alias" in param_df.columns:
-                    error_text = ("Expected 'VCL Alias' of '%s' variable to be "
-                                    "'NV_VehicleSerialNumber', but instead is '%s'."
-                                            % (CDF_VARIABLE_NAME, row["VCL Alias"]))
-                    assert row["VCL Alias"].lower() == "nv_vehicleserialnumber", error_text
-
-                vehicle_sn_param = row["Application Default"]
+        vehicle_sn_param = self._scan_export()["params"][CDF_VARIABLE_NAME]
 
-        if not vehicle_sn_param or pd.isna(vehicle_sn_param):
+        if not vehicle_sn_param:
             # Empty value
             self.vehicle_sn_param = None
             return
@@ -764,34 +1312,24 @@ class CloneDataFile(object):
             # If vehicle S/N was not written to controller, S/N value in CDF export
             # will be "4294967295", which translates to "0xFFFFFFFF" in hex.
             # https://stackoverflow.com/questions/44891070/whats-the-difference-between-str-isdigit-isnumeric-and-isdecimal-in-pyth
-            self.ParentDB.get_GUI_Driver().lose_focus()
-            print(Fore.RED + Style.BRIGHT)
-            input("S/N not stored in controller: Found '%s' in %s.\nPress Enter to continue."
-                    % (hex(int(vehicle_sn_param)), self.export_filename) + Style.RESET_ALL)
+            self._report_issue("S/N not stored in controller: Found '%s' in %s."
+                    % (hex(int(vehicle_sn_param)), self.export_filename))
             self.vehicle_sn_param = None
             return
 
         # Validate that S/N value conforms to expected format.
-        prompt_str = ("Found multiple possible S/N values stored in CDF: '%s'. Press Enter to continue." % vehicle_sn_param)
-        valid_sn, stole_focus = find_in_string(SN_REGEX, vehicle_sn_param, prompt_str, allow_none=True)
-        if stole_focus:
-            self.ParentDB.get_GUI_Driver().lose_focus()
+        prompt_str = ("Found multiple possible S/N values stored in CDF: '%s'.\nPress Enter to continue." % vehicle_sn_param)
+        valid_sn = self._find_in_string(SN_REGEX, vehicle_sn_param, prompt_str, allow_none=True)
 
         if valid_sn is None:
-            self.ParentDB.get_GUI_Driver().lose_focus()
-            print(Fore.RED + Style.BRIGHT)
-            input("Expected '%s' variable to contain S/N in 7-digit format starting "
+            self._report_issue("Expected '%s' variable to contain S/N in 7-digit format starting "
                             "with 3, 5, or 8.\nFound '%s' in %s instead."
-                        % (CDF_VARIABLE_NAME, vehicle_sn_param, self.export_filename)
-                                                        + Style.RESET_ALL)
+                        % (CDF_VARIABLE_NAME, vehicle_sn_param, self.export_filename))
             self.vehicle_sn_param = None
         elif valid_sn != vehicle_sn_param:
-            self.ParentDB.get_GUI_Driver().lose_focus()
-            print(Fore.RED + Style.BRIGHT)
-            input("'%s' value '%s' (in %s) appears to contain S/N with right format but "
+            self._report_issue("'%s' value '%s' (in %s) appears to contain S/N with right format but "
                             "may contain additional content."
-                        % (CDF_VARIABLE_NAME, vehicle_sn_param, self.export_filename)
-                                                        + Style.RESET_ALL)
+                        % (CDF_VARIABLE_NAME, vehicle_sn_param, self.export_filename))
             self.vehicle_sn_param = None
         else:
             self.vehicle_sn_param = vehicle_sn_param # string
@@ -803,15 +1341,13 @@ class CloneDataFile(object):
 
         cdf_cprj_pn = self.extract_cdf_cprj_pn()
         cprj_map_rev = REV_MAP_ALL_F[cdf_cprj_pn]
+        self.cprj_rev_used = cprj_map_rev
 
         self.extract_cdf_source_sw_pn()
 
         if self.source_ctrl_sw_pn is None:
-            self.ParentDB.get_GUI_Driver().lose_focus()
-            print(Fore.RED + Style.BRIGHT)
-            input("No valid SW P/N found in \"%s\". Cannot confirm valid VCL Alias "
-                                                "mapping. Press Enter to continue."
-                                        % self.cdf_filename + Style.RESET_ALL)
+            self._report_issue("No valid SW P/N found in \"%s\". Cannot confirm valid VCL Alias "
+                                                            "mapping." % self.cdf_filename)
             return False
 
         ctrl_sw_rev = REV_MAP_ALL_F[self.source_ctrl_sw_pn]
@@ -830,20 +1366,10 @@ class CloneDataFile(object):
         controller-software P/N, and returns it as a string.
         """
         assert self.has_export(), "Tried to extract CDF source SW P/N from export, but export doesn't exist.\n\t%s" % self
-        VSN_CDF_VAR_NAME = "user119"
-        param_df = pd.read_excel(self.export_path, sheet_name="Parameters")
-        for _, row in param_df.iterrows():
-            if row["Variable Name"] == VSN_CDF_VAR_NAME:
-                # Check if VCL Alias column available (old CIT versions don't include it.)
-                if "VCL Alias" in param_df.columns:
-                    error_text = ("Expected 'VCL Alias' of '%s' variable to be "
-                                    "'ApplicationNameAsInt32', but instead is '%s'."
-                                            % (VSN_CDF_VAR_NAME, row["VCL Alias"]))
-                    assert row["VCL Alias"].lower() == "applicationnameasint32", error_text
-
-                vehicle_ctrl_sw_param = row["Application Default"]
+        VSN_CDF_VAR_NAME = CDF_SW_PN_VAR_NAME
+        vehicle_ctrl_sw_param = self._scan_export()["params"][VSN_CDF_VAR_NAME]
 
-        if not vehicle_ctrl_sw_param or pd.isna(vehicle_ctrl_sw_param):
+        if not vehicle_ctrl_sw_param:
             # Empty value
             self.source_ctrl_sw_pn = None
             return
@@ -852,25 +1378,19 @@ class CloneDataFile(object):
         prompt_str = ("Found multiple possible ctrl SW P/Ns stored in CDF '%s': '%s'.\n"
                                                         "Press Enter to continue."
                         % (self.export_filename, vehicle_ctrl_sw_param))
-        valid_sw_pn, stole_focus = find_in_string(CDF_SW_PN_REGEX, vehicle_ctrl_sw_param, prompt_str, allow_none=True)
-        if stole_focus:
-            ParentDB.get_GUI_Driver().lose_focus()
+        valid_sw_pn = self._find_in_string(CDF_SW_PN_REGEX, vehicle_ctrl_sw_param, prompt_str,
+                                                                            allow_none=True)
 
         if valid_sw_pn is None:
-            self.ParentDB.get_GUI_Driver().lose_focus()
-            print(Fore.RED + Style.BRIGHT)
-            input("Expected '%s' variable to contain SW P/N in ########.## format."
+            self._report_issue("Expected '%s' variable to contain SW P/N in ########.## format."
                                                     "\nFound '%s' in %s instead."
                                         % (VSN_CDF_VAR_NAME, vehicle_ctrl_sw_param,
-                        self.export_filename) + Style.RESET_ALL)
+                                                                self.export_filename))
             self.source_ctrl_sw_pn = None
         elif valid_sw_pn != vehicle_ctrl_sw_param:
-            self.ParentDB.get_GUI_Driver().lose_focus()
-            print(Fore.RED + Style.BRIGHT)
-            input("'%s' value '%s' (in %s) appears to contain SW P/N with right "
+            self._report_issue("'%s' value '%s' (in %s) appears to contain SW P/N with right "
                                         "format but may contain additional content."
-                    % (VSN_CDF_VAR_NAME, vehicle_ctrl_sw_param, self.export_filename)
-                                                        + Style.RESET_ALL)
+                    % (VSN_CDF_VAR_NAME, vehicle_ctrl_sw_param, self.export_filename))
             self.source_ctrl_sw_pn = None
         else:
             # Replace period with "G" in SW P/N string and return
@@ -882,8 +1402,7 @@ class CloneDataFile(object):
         Returns cprj SW P/N as string.
         """
         assert self.has_export(), "Tried to extract CDF cprj P/N from export, but export doesn't exist.\n\t%s" % self
-        worksheet_names = pd.ExcelFile(self.export_path).sheet_names
-        # https://stackoverflow.com/a/17977609
+        worksheet_names = self._scan_export()["sheet_names"]
 
         found = False
         for sheet_name in worksheet_names:
@@ -891,9 +1410,7 @@ class CloneDataFile(object):
                                                             "Press Enter to continue."
                                 % (self.export_filename, sheet_name))
             # Find worksheet w/ P/N in the name
-            sw_pn, stole_focus = find_in_string(SW_PN_REGEX, sheet_name, prompt_str, allow_none=True)
-            if stole_focus:
-                self.ParentDB.get_GUI_Driver().lose_focus()
+            sw_pn = self._find_in_string(SW_PN_REGEX, sheet_name, prompt_str, allow_none=True)
 
             if sw_pn is None:
                 continue
@@ -910,6 +1427,53 @@ class CloneDataFile(object):
 
         return cprj_pn
 
+    def _scan_export(self):
+        """Reads the CDF export (.xlsx format) once, in read-only mode, collecting
+        the worksheet names and the values of the S/N and SW P/N variables in the
+        Parameters tab. Stops reading rows once both variables are found.
+        Result is cached until the export is removed.
+        """
+        assert self.has_export(), "Tried to scan CDF export, but export doesn't exist.\n\t%s" % self
+        if self.export_scan is not None:
+            return self.export_scan
+
+        expected_aliases = {CDF_SN_VAR_NAME: CDF_SN_VCL_ALIAS,
+                            CDF_SW_PN_VAR_NAME: CDF_SW_PN_VCL_ALIAS}
+        param_values = dict.fromkeys(expected_aliases) # Stays None if variable absent.
+
+        workbook = openpyxl.load_workbook(self.export_path, read_only=True, data_only=True)
+        # https://openpyxl.readthedocs.io/en/stable/optimized.html
+        try:
+            worksheet_names = workbook.sheetnames
+            row_iter = workbook["Parameters"].iter_rows(values_only=True)
+            header = list(next(row_iter, ()))
+            name_col = header.index("Variable Name")
+            value_col = header.index("Application Default")
+            # Check if VCL Alias column available (old CIT versions don't include it.)
+            alias_col = header.index("VCL Alias") if "VCL Alias" in header else None
+
+            remaining = set(expected_aliases)
+            for row in row_iter:
+                if len(row) <= name_col or row[name_col] not in remaining:
+                    continue
+                var_name = row[name_col]
+                if alias_col is not None:
+                    vcl_alias = row[alias_col] if len(row) > alias_col else None
+                    error_text = ("Expected 'VCL Alias' of '%s' variable to be "
+                                    "'%s', but instead is '%s'."
+                                % (var_name, expected_aliases[var_name], vcl_alias))
+                    assert str(vcl_alias).lower() == expected_aliases[var_name].lower(), error_text
+
+                param_values[var_name] = row[value_col] if len(row) > value_col else None
+                remaining.discard(var_name)
+                if not remaining:
+                    break # Found everything needed. Skip rest of file.
+        finally:
+            workbook.close() # Read-only mode keeps file handle open until closed.
+
+        self.export_scan = {"sheet_names": worksheet_names, "params": param_values}
+        return self.export_scan
+
     def __str__(self):
         return self.cdf_filename
 
@@ -929,104 +1493,333 @@ class CloneDataFileDB(object):
         self.CDF_list = None # To be populated by _build_cdf_list()
 
         self.cprj_rev_dict = dict() # value: CIT cprj rev; val: list of CDF objects.
-        # Populated when mismatch detected b/w SW rev and CIT cprj rev, resulting in incorrect VCL-alias mappings
+        # Populated by plan_cprj_revs() w/ each CDF's predicted rev, and when mismatch
+        # detected b/w SW rev and CIT cprj rev, resulting in incorrect VCL-alias mappings
+        self.loaded_cprj_rev = None # Rev of cprj loaded in CIT, once known.
 
         self._build_cdf_list()
 
+        self.Manifest = manifest.ExportManifest(os.path.join(conv_export_dir, "tmp",
+                                                manifest.EXPORT_MANIFEST_FILENAME))
+
         self.ActiveGUI_Driver = None    # To be set by convert_all()
 
+        self.review_list = []   # (CDF object, issue) from background validation, shown after each pass.
+        self.source_statuses = dict() # import path: manifest status found by plan_cprj_revs().
+
     def get_GUI_Driver(self):
         return self.ActiveGUI_Driver
 
+    def _record_export(self, CDF_obj):
+        # Store validated export in manifest so later runs can skip it w/o re-checking.
+        # Also mirror it to Parquet for fleet analysis.
+        self.Manifest.record(CDF_obj.import_filepath, CDF_obj.export_path,
+                                    vehicle_sn=CDF_obj.vehicle_sn,
+                                    sw_pn=CDF_obj.source_ctrl_sw_pn,
+                                    cprj_rev=CDF_obj.get_ctrl_sw_rev())
+        mirror_export(parquet_mirror.mirror_cdf_xlsx, self.export_dir, CDF_obj.import_filepath,
+                        vehicle_sn=CDF_obj.vehicle_sn, cdf_export_path=CDF_obj.export_path,
+                        sw_pn=CDF_obj.source_ctrl_sw_pn)
+
+    def _update_vehicle_history(self, CDF_obj):
+        # Keep vehicle's latest SW P/N (per Manifest's vehicles table) current w/ what
+        # this CDF's export showed, even if export was deleted for wrong cprj.
+        sn_from_filename, file_date = parse_filename_sn_and_date(CDF_obj.import_filepath)
+        vehicle_sn = CDF_obj.vehicle_sn or sn_from_filename
+        if vehicle_sn is None:
+            return
+        if CDF_obj.source_ctrl_sw_pn is None:
+            # Newer file w/o valid SW P/N means old entry can't be trusted.
+            self.Manifest.invalidate_vehicle(vehicle_sn, file_date)
+        else:
+            self.Manifest.update_vehicle(vehicle_sn, CDF_obj.source_ctrl_sw_pn,
+                    CDF_obj.get_ctrl_sw_rev(), file_date, CDF_obj.import_filepath)
+
+    def _collect_validations(self, validation_futures, wait=False):
+        """Handles background validations that have finished (all of them, if wait).
+        validation_futures: {future: CDF object}. Handled futures are removed from it.
+        Returns number of exports validated.
+        """
+        if wait:
+            concurrent.futures.wait(validation_futures)
+        validated_count = 0
+        for future in [future for future in validation_futures if future.done()]:
+            CDF_obj = validation_futures.pop(future)
+            try:
+                success = future.result()
+            except Exception as exception_text:
+                if CDF_obj.has_export():
+                    # Remove export that may not have been validated
+                    CDF_obj.remove_export()
+                self.review_list.append((CDF_obj, "Validation failed: %s" % exception_text))
+                print(Fore.RED, end="")
+                tqdm.write(" %s: Validation failed - export deleted" % CDF_obj + Style.RESET_ALL)
+                continue
+
+            self.review_list.extend((CDF_obj, issue) for issue in CDF_obj.issues)
+            self._update_vehicle_history(CDF_obj)
+            if CDF_obj.cprj_rev_used is not None:
+                # Export shows which cprj CIT has loaded.
+                self.loaded_cprj_rev = CDF_obj.cprj_rev_used
+            if success:
+                self._record_export(CDF_obj)
+                validated_count += 1
+                print(Fore.GREEN, end="")
+                tqdm.write(" %s: Processed; valid alias mapping confirmed" % CDF_obj + Style.RESET_ALL)
+            elif CDF_obj.source_ctrl_sw_pn is None:
+                # Can't tell which cprj it needs. Issue already in review list.
+                print(Fore.RED, end="")
+                tqdm.write(" %s: Processed but no valid SW P/N - export deleted" % CDF_obj + Style.RESET_ALL)
+            else:
+                # check_cprj_rev_match() failed
+                # Add to dict to be processed when that rev is loaded.
+                print(Fore.RED, end="")
+                tqdm.write(" %s: Processed but with invalid alias mapping - export deleted" % CDF_obj + Style.RESET_ALL)
+                if CDF_obj.get_ctrl_sw_rev() not in self.cprj_rev_dict:
+                    self.cprj_rev_dict[CDF_obj.get_ctrl_sw_rev()] = []
+                self.cprj_rev_dict[CDF_obj.get_ctrl_sw_rev()].append(CDF_obj)
+                # tqdm.write("File %s needs rev-%s cprj file for conversion."
+                #                      % (CDF_obj, CDF_obj.get_ctrl_sw_rev()))
+        return validated_count
+
+    def _show_review_list(self):
+        # Issues found in background validation, grouped so batch isn't interrupted for each.
+        if not self.review_list:
+            return
+        self.ActiveGUI_Driver.lose_focus()
+        print(Fore.RED + Style.BRIGHT + "\n%d CDF issue(s) need review:" % len(self.review_list)
+                                                                        + Style.RESET_ALL)
+        for CDF_obj, issue in self.review_list:
+            print("\t%s: %s" % (CDF_obj, issue.replace("\n", " ")))
+        if UNATTENDED:
+            UNATTENDED_NOTICES.extend("%s: %s" % (CDF_obj, issue) for CDF_obj, issue in self.review_list)
+        else:
+            input(Fore.GREEN + Style.BRIGHT + "Evaluate and fix filenames if needed "
+                        "(import and export).\nPress Enter to continue." + Style.RESET_ALL)
+        self.review_list = []
+
     def _build_cdf_list(self):
         self.CDF_list = []
         for filename in sorted(os.listdir(self.source_dir)):
             if filename.upper().endswith(self.file_type):
                 self.CDF_list.append( CloneDataFile(os.path.join(self.source_dir, filename), self) )
 
-    def convert_all(self, ActiveGUI_Driver, check_SNs=False):
-        if self.cprj_rev_dict:
-            # Tail call will land here to process previously-encounterd CDFs
-            # that need a different cprf rev to process correctly.
-            cprj_rev, CDF_obj_list = self.cprj_rev_dict.popitem()
-            self.ActiveGUI_Driver.lose_focus()
-            print(Fore.GREEN + Style.BRIGHT)
-            input("Load cprj w/ rev %s into CIT then press Enter to continue." % cprj_rev + Style.RESET_ALL)
-        else:
-            # First call will land here.
-            CDF_obj_list = self.CDF_list
+    def plan_cprj_revs(self, CDF_obj_list):
+        """Predicts cprj rev each CDF needs before converting any, from manifest
+        records of past exports: same source file first, then vehicle's latest
+        known SW (by S/N from filename).
+        Returns (CDFs w/ no prediction or needing no GUI work, {predicted cprj rev: [CDFs]}).
+        """
+        sn_revs = self.Manifest.vehicle_cprj_revs()
+        unknown_list = []
+        rev_dict = dict()
+        for CDF_obj in CDF_obj_list:
+            if not CDF_obj.is_valid_cdf() or (CDF_obj.has_export(self.export_dir)
+                    and self._source_status(CDF_obj) != manifest.SOURCE_CHANGED):
+                # Skipped or checked w/o GUI. Shouldn't cause a cprj switch.
+                unknown_list.append(CDF_obj)
+                continue
+            entry = self.Manifest.get_entry(CDF_obj.import_filepath)
+            cprj_rev = entry["cprj_rev"] if entry is not None else None
+            if cprj_rev is None:
+                vehicle_sn, _ = parse_filename_sn_and_date(CDF_obj.import_filepath)
+                cprj_rev = sn_revs.get(vehicle_sn)
+            if cprj_rev is None:
+                unknown_list.append(CDF_obj)
+            else:
+                rev_dict.setdefault(cprj_rev, []).append(CDF_obj)
+        return unknown_list, rev_dict
+
+    def _source_status(self, CDF_obj):
+        # Checked once per run. A changed source gets hashed, so don't repeat that
+        # between planning and conversion.
+        if CDF_obj.import_filepath not in self.source_statuses:
+            self.source_statuses[CDF_obj.import_filepath] = self.Manifest.source_status(
+                                                                CDF_obj.import_filepath)
+        return self.source_statuses[CDF_obj.import_filepath]
 
+    def convert_all(self, ActiveGUI_Driver, check_SNs=False):
+        """Converts all CDFs in source dir not already converted and validated.
+        CDFs are grouped by the cprj rev they're predicted to need (plan_cprj_revs()),
+        so each cprj is loaded in CIT once. CDFs w/ no prediction (or needing no
+        GUI work) go first under whatever cprj is loaded. Any found to need another rev join that rev's group.
+        Returns number of files converted (including any converted after cprj changes).
+        """
+        converted_count = 0
         self.ActiveGUI_Driver = ActiveGUI_Driver
         try:
             self.ActiveGUI_Driver.select_program(self.file_type)
         except UserCancel:
-            return
+            return converted_count
+
+        CDF_obj_list, self.cprj_rev_dict = self.plan_cprj_revs(self.CDF_list)
+        print(Fore.MAGENTA + "cprj plan: %d CDF(s) first%s" % (len(CDF_obj_list),
+                "".join(", %d for rev %s" % (len(CDF_objs), cprj_rev) for cprj_rev, CDF_objs
+                                    in sorted(self.cprj_rev_dict.items()))) + Style.RESET_ALL)
+        expected_rev = None # None: whatever cprj is loaded
+        while True:
+            count, leftover_list, stop_all = self._convert_list(CDF_obj_list, expected_rev, check_SNs)
+            converted_count += count
+            if leftover_list:
+                self.cprj_rev_dict.setdefault(expected_rev, []).extend(leftover_list)
+            if stop_all or not self.cprj_rev_dict:
+                break
+
+            if self.loaded_cprj_rev in self.cprj_rev_dict or self.loaded_cprj_rev is None:
+                # No switch needed (or loaded cprj unknown, in which case first
+                # export will show whether it's the one expected).
+                expected_rev = (self.loaded_cprj_rev if self.loaded_cprj_rev is not None else
+                        max(self.cprj_rev_dict, key=lambda cprj_rev: len(self.cprj_rev_dict[cprj_rev])))
+            else:
+                # Switch to rev w/ the most files waiting.
+                expected_rev = max(self.cprj_rev_dict, key=lambda cprj_rev: len(self.cprj_rev_dict[cprj_rev]))
+                try:
+                    self.ActiveGUI_Driver.load_cprj(expected_rev)
+                except NeedsOperator as exception_text:
+                    # Unattended. Leave these (and any other revs) for next interactive run.
+                    UNATTENDED_NOTICES.append("%s %d file(s) left unconverted." % (exception_text,
+                                sum(len(CDF_objs) for CDF_objs in self.cprj_rev_dict.values())))
+                    self.cprj_rev_dict.clear()
+                    break
+                self.loaded_cprj_rev = expected_rev
+                self.ActiveGUI_Driver.select_program(self.file_type)
+            CDF_obj_list = self.cprj_rev_dict.pop(expected_rev)
 
-        for CDF_obj in tqdm(CDF_obj_list, colour="#6700ff"):
-            # Check for existing export
-            if not CDF_obj.is_valid_cdf():
-                print(Fore.WHITE, Style.DIM, end="")
-                tqdm.write("%s: Skipping empty file" % CDF_obj + Style.RESET_ALL)
-                continue
-            elif CDF_obj.has_export(self.export_dir):
-                # Skip if already processed this file.
-                # Will delete and reprocess to remove invalid mappings from exports.
-                if not CDF_obj.check_cprj_rev_match(self.export_dir):
-                    CDF_obj.remove_export()
-                    print(Fore.RED, end="")
-                    tqdm.write(" %s: Already processed but invalid alias mapping - export deleted" % CDF_obj + Style.RESET_ALL)
-                    # Fall through to conversion below, where it will be converted
-                    # again (possibly w/ the right mapping), and if the mapping is wrong
-                    # again, the file will get stored along with the needed mapping in cprj_rev_dict
-                else:
-                    # revs match, so skip this file.
+        return converted_count
+
+    def _convert_list(self, CDF_obj_list, expected_rev, check_SNs):
+        """Converts CDFs in CDF_obj_list w/ cprj currently loaded in CIT.
+        If expected_rev given and an export shows loaded cprj is another rev, stops early.
+        Returns (number converted, CDFs not attempted, whether user chose to exit loop).
+        """
+        converted_count = 0
+        leftover_list = []
+        stop_all = False
+        quit_program = False
+        validation_futures = dict() # future: CDF object
+        with concurrent.futures.ThreadPoolExecutor(max_workers=CDF_VALIDATION_WORKERS) as executor:
+            for list_index, CDF_obj in enumerate(tqdm(CDF_obj_list, colour="#6700ff")):
+                converted_count += self._collect_validations(validation_futures)
+                if expected_rev is not None and self.loaded_cprj_rev not in (None, expected_rev):
+                    # CIT turned out to have another cprj loaded. Don't waste exports on rest.
+                    leftover_list = CDF_obj_list[list_index:]
+                    break
+
+                # Check for existing export
+                if not CDF_obj.is_valid_cdf():
                     print(Fore.WHITE, Style.DIM, end="")
-                    tqdm.write("%s: Already processed; valid alias mapping confirmed" % CDF_obj + Style.RESET_ALL)
+                    tqdm.write("%s: Skipping empty file" % CDF_obj + Style.RESET_ALL)
                     continue
+                elif CDF_obj.has_export(self.export_dir):
+                    # Skip if already processed this file.
+                    # Reuse status from planning. Dropped once used, since converting
+                    # changes export and record (in case CDF comes up again in another rev's group).
+                    source_status = self.source_statuses.pop(CDF_obj.import_filepath, None)
+                    if source_status is None:
+                        source_status = self.Manifest.source_status(CDF_obj.import_filepath)
+                    if source_status == manifest.SOURCE_UNCHANGED:
+                        # Validated on a previous run and source unchanged since. No need to open export.
+                        print(Fore.WHITE, Style.DIM, end="")
+                        tqdm.write("%s: Already processed; validated on previous run" % CDF_obj + Style.RESET_ALL)
+                        continue
+                    elif source_status == manifest.SOURCE_CHANGED:
+                        CDF_obj.remove_export()
+                        self.Manifest.forget(CDF_obj.import_filepath)
+                        print(Fore.YELLOW, end="")
+                        tqdm.write(" %s: Source changed since last conversion - export deleted" % CDF_obj + Style.RESET_ALL)
+                        # Fall through to conversion below.
+                    # Will delete and reprocess to remove invalid mappings from exports.
+                    elif not CDF_obj.check_cprj_rev_match(self.export_dir):
+                        CDF_obj.remove_export()
+                        print(Fore.RED, end="")
+                        tqdm.write(" %s: Already processed but invalid alias mapping - export deleted" % CDF_obj + Style.RESET_ALL)
+                        # Fall through to conversion below, where it will be converted
+                        # again (possibly w/ the right mapping), and if the mapping is wrong
+                        # again, the file will get stored along with the needed mapping in cprj_rev_dict
+                    else:
+                        # revs match, so skip this file.
+                        self._record_export(CDF_obj)
+                        self._update_vehicle_history(CDF_obj)
+                        print(Fore.WHITE, Style.DIM, end="")
+                        tqdm.write("%s: Already processed; valid alias mapping confirmed" % CDF_obj + Style.RESET_ALL)
+                        continue
 
-            try:
-                success = CDF_obj.convert(self.export_dir, check_sn=check_SNs)
-            except Exception as exception_text:
-                self.ActiveGUI_Driver.lose_focus()
-                if CDF_obj.has_export():
-                    # Remove export that may not have been validated
-                    CDF_obj.remove_export()
-                print(Fore.CYAN + Style.BRIGHT)
-                print(" %s: Encountered exception during processing" % CDF_obj + Style.RESET_ALL)
-                print(exception_text)
-                print(Fore.GREEN + Style.BRIGHT)
-                print("Press Enter to continue with other files, 'e' to exit "
-                                "file-conversion loop, or 'q' to quit program.")
-                answer = input("> " + Style.RESET_ALL)
-                if answer.lower() == "":
-                    continue
-                elif answer.lower() == "e":
-                    break
-                else:
-                    # Accept anything other than a blank input or 'e' as a quit command.
-                    quit()
-            else:
-                if success:
-                    print(Fore.GREEN, end="")
-                    tqdm.write(" %s: Processed; valid alias mapping confirmed" % CDF_obj + Style.RESET_ALL)
+                try:
+                    exported = CDF_obj.export(self.export_dir)
+                except Exception as exception_text:
+                    self.ActiveGUI_Driver.lose_focus()
+                    if CDF_obj.has_export():
+                        # Remove export that may not have been validated
+                        CDF_obj.remove_export()
+                    print(Fore.CYAN + Style.BRIGHT)
+                    print(" %s: Encountered exception during processing" % CDF_obj + Style.RESET_ALL)
+                    print(exception_text)
+                    if UNATTENDED:
+                        UNATTENDED_NOTICES.append("%s: %s" % (CDF_obj, exception_text))
+                        continue
+                    print(Fore.GREEN + Style.BRIGHT)
+                    print("Press Enter to continue with other files, 'e' to exit "
+                                    "file-conversion loop, or 'q' to quit program.")
+                    answer = input("> " + Style.RESET_ALL)
+                    if answer.lower() == "":
+                        continue
+                    elif answer.lower() == "e":
+                        stop_all = True
+                        break
+                    else:
+                        # Accept anything other than a blank input or 'e' as a quit command.
+                        # Quit after recording validations already running.
+                        quit_program = True
+                        break
                 else:
-                    # success=False (but no exception thrown) means check_cprj_rev_match() failed
-                    # Add to dict to be processed with different rev in tail call below.
-                    print(Fore.RED, end="")
-                    tqdm.write(" %s: Processed but with invalid alias mapping - export deleted" % CDF_obj + Style.RESET_ALL)
-                    if CDF_obj.get_ctrl_sw_rev() not in self.cprj_rev_dict:
-                        self.cprj_rev_dict[CDF_obj.get_ctrl_sw_rev()] = []
-                    self.cprj_rev_dict[CDF_obj.get_ctrl_sw_rev()].append(CDF_obj)
-                    # tqdm.write("File %s needs rev-%s cprj file for conversion."
-                    #                      % (CDF_obj, CDF_obj.get_ctrl_sw_rev()))
-
-        if self.cprj_rev_dict:
-            # Process files needing different cprj file(s):
-            self.convert_all(self.ActiveGUI_Driver, check_SNs=check_SNs)
-
-
-def convert_all_cpfs(source_dir, dest_dir, check_SNs=False):
+                    if exported:
+                        # Validate while GUI moves on to next file.
+                        validation_futures[executor.submit(CDF_obj.validate, check_sn=check_SNs,
+                                                                    background=True)] = CDF_obj
+
+            # GUI done. Finish up remaining validations.
+            converted_count += self._collect_validations(validation_futures, wait=True)
+        self._show_review_list()
+        if quit_program:
+            quit()
+        return converted_count, leftover_list, stop_all
+
+
+def record_combined_cpfs(Manifest, combine_futures, wait=False):
+    """Records background CPF combines that have finished in Manifest.
+    Runs in caller's thread, since Manifest's SQLite connection can't be shared.
+    combine_futures: {future: CPF path}. Recorded futures are removed from it.
+    wait=True waits for all of them first. Returns number recorded.
+    """
+    if wait:
+        concurrent.futures.wait(combine_futures)
+    recorded_count = 0
+    for future in [future for future in combine_futures if future.done()]:
+        filepath = combine_futures.pop(future)
+        filename = os.path.basename(filepath)
+        try:
+            export_path = future.result()
+        except Exception as exception_text:
+            # TSVs stay in tmp dir, so next run only redoes this step.
+            tqdm.write(Fore.RED + Style.BRIGHT + "Combining exports of %s failed: %s"
+                                    % (filename, exception_text) + Style.RESET_ALL)
+            if UNATTENDED:
+                UNATTENDED_NOTICES.append("%s: %s" % (filename, exception_text))
+            continue
+        Manifest.record(filepath, export_path)
+        recorded_count += 1
+        tqdm.write("Processed %s" % filename)
+    return recorded_count
+
+
+def convert_all_cpfs(source_dir, dest_dir, ActiveGUI_Driver, check_SNs=False):
+    """Converts each CPF in source_dir not already converted in dest_dir.
+    GUI loop only exports each CPF's TSVs. Combining them into the .xlsx export
+    happens in background threads, so the GUI moves on to the next CPF meanwhile.
+    Returns number of files converted.
+    """
     file_type = "cpf"
+    converted_count = 0
 
     if not os.path.exists(source_dir):
         raise Exception("Can't find source_dir '%s'" % source_dir)
@@ -1034,72 +1827,112 @@ def convert_all_cpfs(source_dir, dest_dir, check_SNs=False):
         raise Exception("Can't find dest_dir '%s'" % dest_dir)
 
     try:
-        select_program(file_type)
+        ActiveGUI_Driver.select_program(file_type)
     except UserCancel:
-        return
+        return converted_count
+
+    Manifest = manifest.ExportManifest(os.path.join(dest_dir, "tmp",
+                                            manifest.EXPORT_MANIFEST_FILENAME))
 
+    combine_futures = dict() # future: CPF path
+    quit_program = False
     file_list = [x for x in sorted(os.listdir(source_dir)) if x.lower().endswith(file_type)]
-    for filename in tqdm(file_list, colour="cyan"):
-        # Check for existing export
-        if file_type == "cpf" and (os.path.exists(os.path.join(dest_dir,
-                            os.path.splitext(filename)[0] + CPF_COMBINED_EXPORT_SUFFIX))):
-            # Skip if already processed this file.
-            tqdm.write("Already processed %s" % os.path.basename(filename)) # DEBUG
-            continue
+    with concurrent.futures.ThreadPoolExecutor(max_workers=CPF_COMBINE_WORKERS) as executor:
+        for filename in tqdm(file_list, colour="cyan"):
+            converted_count += record_combined_cpfs(Manifest, combine_futures)
 
-        filepath = os.path.join(source_dir, filename)
-        if (os.path.isfile(filepath) and
-                    os.path.splitext(filename)[-1].lower() == ".%s" % file_type):
-            try:
-                success = convert_file(filepath, dest_dir, check_sn=check_SNs,
-                                                              gui_in_focus=True)
-            except Exception as exception_text:
-                print(Fore.CYAN + Style.BRIGHT)
-                print("\nEncountered exception processing %s" % filename + Style.RESET_ALL)
-                print(exception_text)
-                print(Fore.GREEN + Style.BRIGHT)
-                print("Press Enter to continue with other files, 'e' to exit "
-                                "file-conversion loop, or 'q' to quit program.")
-                answer = input("> " + Style.RESET_ALL)
-                if answer.lower() == "":
-                    select_program(file_type)
+            filepath = os.path.join(source_dir, filename)
+            export_path = os.path.join(dest_dir, os.path.splitext(filename)[0] + CPF_COMBINED_EXPORT_SUFFIX)
+
+            # Check for existing export
+            if file_type == "cpf" and os.path.exists(export_path):
+                source_status = Manifest.source_status(filepath)
+                if source_status == manifest.SOURCE_CHANGED:
+                    # Remove stale export and intermediate TSVs so file gets reconverted below.
+                    os.remove(export_path)
+                    for suffix in (CPF_PARAM_EXPORT_SUFFIX, CPF_FAULT_EXPORT_SUFFIX):
+                        tsv_path = os.path.join(dest_dir, "tmp", os.path.splitext(filename)[0] + suffix)
+                        if os.path.exists(tsv_path):
+                            os.remove(tsv_path)
+                    Manifest.forget(filepath)
+                    tqdm.write("Source changed since last conversion - reconverting %s" % filename)
+                else:
+                    if source_status == manifest.SOURCE_NEW:
+                        # Export predates manifest. Record it so later runs only need a stat.
+                        Manifest.record(filepath, export_path)
+                        mirror_export(parquet_mirror.mirror_cpf_xlsx, dest_dir, filepath,
+                                                        cpf_combined_path=export_path)
+                    # Skip if already processed this file.
+                    tqdm.write("Already processed %s" % os.path.basename(filename)) # DEBUG
                     continue
-                elif answer.lower() == "e":
-                    break
+
+            if (os.path.isfile(filepath) and
+                        os.path.splitext(filename)[-1].lower() == ".%s" % file_type):
+                try:
+                    cpf_params_path, cpf_faults_path = export_cpf_tsvs(filepath, dest_dir,
+                                                    ActiveGUI_Driver, check_sn=check_SNs)
+                except Exception as exception_text:
+                    ActiveGUI_Driver.lose_focus()
+                    print(Fore.CYAN + Style.BRIGHT)
+                    print("\nEncountered exception processing %s" % filename + Style.RESET_ALL)
+                    print(exception_text)
+                    if UNATTENDED:
+                        UNATTENDED_NOTICES.append("%s: %s" % (filename, exception_text))
+                        ActiveGUI_Driver.select_program(file_type)
+                        continue
+                    print(Fore.GREEN + Style.BRIGHT)
+                    print("Press Enter to continue with other files, 'e' to exit "
+                                    "file-conversion loop, or 'q' to quit program.")
+                    answer = input("> " + Style.RESET_ALL)
+                    if answer.lower() == "":
+                        ActiveGUI_Driver.select_program(file_type)
+                        continue
+                    elif answer.lower() == "e":
+                        break
+                    else:
+                        # Accept anything other than a blank input or 'e' as a quit command.
+                        # Quit after recording combines already running.
+                        quit_program = True
+                        break
                 else:
-                    # Accept anything other than a blank input or 'e' as a quit command.
-                    quit()
+                    combine_futures[executor.submit(combine_cpf_export, filepath, dest_dir,
+                                                cpf_params_path, cpf_faults_path)] = filepath
+
             else:
-                if success:
-                    tqdm.write("Processed %s" % filename)
+                # Skip directories
+                continue
 
-        else:
-            # Skip directories
-            continue
+        # GUI done. Finish up remaining combines.
+        converted_count += record_combined_cpfs(Manifest, combine_futures, wait=True)
+
+    if quit_program:
+        quit()
+    return converted_count
 
 
-def convert_cpfs_in_export(dir_path):
-    """Convert CPF exports (.XLS extension but TSV format) to true Excel format."""
+def convert_cpfs_in_export(dir_path, jobs=1):
+    """Convert CPF exports (.XLS extension but TSV format) to true Excel format.
+    jobs > 1 converts files in parallel."""
     if not os.path.exists(dir_path):
         raise Exception("Can't find dir_path '%s'" % dir_path)
 
     print("\nConverting CPF exports from .tsv format (named .XLS) to .xslx (in dir "
                                                     "\n\t\"%s\")..." % dir_path)
     try:
-        fixcpf.convert_all_param_exports(dir_path, check_xls=False)
+        fixcpf.convert_all_param_exports(dir_path, check_xls=False, jobs=jobs)
         print("...done")
-    except PermissionError:
+    except PermissionError as exception_text:
         # Gets a PermissionError if running on PowerShell most of the time.
         print(Fore.GREEN + Style.BRIGHT)
-        input("\nEncountered permission error in removing CPF tsv files.\n"
+        print(exception_text)
+        pause_for_user("\nEncountered permission error in removing CPF tsv files.\n"
                         "Press Enter to continue to next part of program.")
-        print(Style.RESET_ALL)
 
 
 def create_file_struct():
     # Make field-data dirs if any don't exist yet.
     def create_dir_if_not_exist(dir_path):
-        os.mkdirs(dir_path, exist_ok=True)
+        os.makedirs(dir_path, exist_ok=True)
         print("Created %s" % dir_path)
 
     create_dir_if_not_exist(DIR_FIELD_DATA)
@@ -1111,10 +1944,13 @@ def create_file_struct():
 
 def sync_to_remote_dirs():
     # Sync to shared folder
-    print(Fore.GREEN + Style.BRIGHT)
-    print("\nSync local Controller-export dir to shared folder? Enter to "
-                            "proceed, 's' to skip, or 'q' to quit program.")
-    answer = input("> " + Style.RESET_ALL)
+    if UNATTENDED:
+        answer = ""
+    else:
+        print(Fore.GREEN + Style.BRIGHT)
+        print("\nSync local Controller-export dir to shared folder? Enter to "
+                                "proceed, 's' to skip, or 'q' to quit program.")
+        answer = input("> " + Style.RESET_ALL)
     if answer == "":
         print("Syncing ctrl exports to shared folder...")
         sync_remote(DIR_EXPORT, os.path.join(DIR_REMOTE_SHARE_CTRL, "Converted"),
@@ -1127,52 +1963,289 @@ def sync_to_remote_dirs():
         quit()
 
     # Sync to second remote (Azure blob)
-    # Controller exports  |  local dir --> Azure blob storage
-    sync_to_azure(DIR_EXPORT, AZ_BLOB_ADDR_CTRL, "local Controller-export dir")
-
-    # BDX files  |  shared folder --> Azure blob storage
-    sync_to_azure(DIR_REMOTE_SHARE_BATT, AZ_BLOB_ADDR_BATT, "shared-folder Battery-export dir")
-
-    # MES (manufacturing) battery-scan data  |  shared folder --> Azure blob storage
-    sync_to_azure(DIR_REMOTE_SHARE_MFG, AZ_BLOB_ADDR_MFG, "shared-folder MES batt-scan export dir")
-
-
-def sync_to_azure(src_dir, dest_dir, src_desc):
+    azure_jobs = []
+    for src_dir, dest_url, src_desc, label in [
+            # Controller exports  |  local dir --> Azure blob storage
+            (DIR_EXPORT, AZ_BLOB_ADDR_CTRL, "local Controller-export dir", "ctrl"),
+            # BDX files  |  shared folder --> Azure blob storage
+            (DIR_REMOTE_SHARE_BATT, AZ_BLOB_ADDR_BATT, "shared-folder Battery-export dir", "batt"),
+            # MES (manufacturing) battery-scan data  |  shared folder --> Azure blob storage
+            (DIR_REMOTE_SHARE_MFG, AZ_BLOB_ADDR_MFG, "shared-folder MES batt-scan export dir", "mfg")]:
+        if confirm_azure_sync(src_desc):
+            azure_jobs.append(make_azure_sync_job(src_dir, dest_url, src_desc, label))
+
+    # All confirmed up front so jobs can run together.
+    if azure_jobs:
+        run_azcopy_jobs(azure_jobs, max_concurrent=AZCOPY_MAX_CONCURRENT)
+
+
+def confirm_azure_sync(src_desc):
+    if UNATTENDED:
+        return True
     print(Fore.GREEN + Style.BRIGHT)
     print("\nSync %s to Azure blob? Enter to "
                     "proceed, 's' to skip, or 'q' to quit program." % src_desc)
     answer = input("> " + Style.RESET_ALL)
     if answer == "":
-        print("\nRunning AzCopy sync job from %s..." % src_desc)
-        print(Fore.BLUE + Style.BRIGHT)
-        returncode = subprocess.call(["azcopy", "sync",
-                                            "--delete-destination", "true",
-                                                        "--exclude-path=tmp",
-                                            os.path.join(src_dir, ""), dest_dir])
-        # https://learn.microsoft.com/en-us/azure/storage/common/storage-ref-azcopy-sync
-        # https://stackoverflow.com/questions/68894328/azcopy-copy-exclude-a-folder-and-the-files-inside-it
-        # https://stackoverflow.com/a/15010678
-        print(Style.RESET_ALL + "...done")
+        return True
     elif answer.lower() == "s":
         print("Skipping sync from %s to Azure blob." % src_desc)
+        return False
     else:
         quit()
 
 
+def sync_to_azure(src_dir, dest_dir, src_desc, delta=None):
+    if confirm_azure_sync(src_desc):
+        run_azcopy_jobs([make_azure_sync_job(src_dir, dest_dir, src_desc, delta=delta)])
+
+
+def make_azure_sync_job(src_dir, dest_url, src_desc, label=None, delta=None):
+    """label is short name shown in combined progress bar. Defaults to src_desc."""
+    if label is None:
+        label = src_desc
+    if delta is None:
+        delta = AZURE_DELTA_SYNC
+    if delta and not blob_delta_sync.is_available():
+        print(Fore.YELLOW + "azure-storage-blob not installed. Falling back to "
+                                "azcopy sync for %s." % src_desc + Style.RESET_ALL)
+        delta = False
+    if delta:
+        return BlobDeltaSyncJob(src_dir, dest_url, src_desc, label)
+    return AzCopySyncJob(src_dir, dest_url, src_desc, label)
+
+
+class AzCopySyncJob(object):
+    """One `azcopy sync` of a local/shared dir to an Azure blob container.
+    Parses azcopy's output as it runs (into self.metrics) so several jobs can
+    share one progress display.
+    """
+    tool = "azcopy"
+
+    def __init__(self, src_dir, dest_url, src_desc, label):
+        self.src_dir = src_dir
+        self.dest_url = dest_url
+        self.src_desc = src_desc
+        self.label = label
+        self.metrics = sync_metrics.SyncMetrics(self.tool, src_dir, dest_url)
+
+    def command(self):
+        return ["azcopy", "sync", "--delete-destination", "true",
+                "--exclude-path=%s" % ";".join(blob_delta_sync.EXCLUDE_DIRS),
+                                            os.path.join(self.src_dir, ""), self.dest_url]
+        # https://learn.microsoft.com/en-us/azure/storage/common/storage-ref-azcopy-sync
+        # https://stackoverflow.com/questions/68894328/azcopy-copy-exclude-a-folder-and-the-files-inside-it
+        # https://stackoverflow.com/a/15010678
+
+    def run(self, on_progress=None):
+        return sync_metrics.run_and_capture(self.command(), self.metrics, on_progress)
+
+    def __repr__(self):
+        return "%s '%s'" % (self.__class__.__name__, self.src_desc)
+
+
+class BlobDeltaSyncJob(AzCopySyncJob):
+    """Same job as AzCopySyncJob, but uploads/deletes only files changed since
+    last run, per upload manifest in LOCAL_STATE_DIR (see blob_delta_sync.py).
+    """
+    tool = "blob_delta"
+
+    def __init__(self, src_dir, dest_url, src_desc, label, reconcile=False):
+        super(BlobDeltaSyncJob, self).__init__(src_dir, dest_url, src_desc, label)
+        self.reconcile = reconcile
+        self.manifest_path = os.path.join(LOCAL_STATE_DIR, blob_delta_sync.UPLOAD_MANIFEST_FILENAME)
+
+    def run(self, on_progress=None):
+        metrics = self.metrics
+
+        def update_progress(done_count, total_count):
+            metrics.files_done = done_count
+            metrics.files_total = total_count
+            metrics.percent = 100.0 * done_count / total_count if total_count else 100.0
+            if on_progress:
+                on_progress()
+
+        try:
+            results = blob_delta_sync.sync_dir_to_blob(self.src_dir, self.manifest_path,
+                                dest_url=self.dest_url, reconcile=self.reconcile,
+                                                    progress_callback=update_progress)
+        except Exception as exception_text:
+            metrics.output_tail.append(str(exception_text))
+            metrics.finish(-1)
+        else:
+            metrics.files_done = results["uploaded"] + results["deleted"]
+            metrics.bytes_done = results["uploaded_bytes"]
+            metrics.files_failed = len(results["errors"])
+            metrics.output_tail.extend(results["errors"])
+            metrics.finish(1 if results["errors"] else 0)
+        if on_progress:
+            on_progress()
+        return metrics.returncode
+
+
+def run_azcopy_jobs(jobs, max_concurrent=1):
+    """Runs AzCopySyncJobs (or BlobDeltaSyncJobs), up to max_concurrent at once, w/ one combined
+    progress bar. Logs each job's metrics, prints per-job summary, and raises
+    if any job failed.
+    """
+    print("\nRunning %d AzCopy sync job(s), up to %d at once..." % (len(jobs), max_concurrent))
+    display_lock = threading.Lock()
+    with tqdm(total=100 * len(jobs), unit="%", colour="#05e4ab",
+                bar_format="{l_bar}{bar}| {elapsed} {postfix}") as pbar:
+        def on_progress():
+            with display_lock:
+                pbar.n = round(sum(job.metrics.percent for job in jobs), 1)
+                pbar.set_postfix_str(" | ".join("%s: %.0f%%" % (job.label,
+                                                    job.metrics.percent) for job in jobs))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+            list(executor.map(lambda job: job.run(on_progress), jobs))
+
+    print("AzCopy sync summary:")
+    failed_jobs = []
+    for job in jobs:
+        metrics = job.metrics
+        log_sync_metrics(metrics)
+        if metrics.succeeded():
+            print(Fore.MAGENTA + "\t%s: OK - %s in %.0f s" % (job.src_desc,
+                    sync_metrics.progress_postfix(metrics), metrics.elapsed) + Style.RESET_ALL)
+        else:
+            failed_jobs.append(job)
+            print(Fore.RED + Style.BRIGHT + "\t%s: FAILED (return code %s) - %d of %s "
+                        "file(s) failed\n\t\t%s" % (job.src_desc, metrics.returncode,
+                        metrics.files_failed, metrics.files_total if metrics.files_total is not None else "?",
+                        "\n\t\t".join(metrics.output_tail)) + Style.RESET_ALL)
+
+    if failed_jobs:
+        raise Exception("AzCopy SYNC FAILED for %s"
+                            % ", ".join(job.src_desc for job in failed_jobs))
+
+def run_auto_pipeline(ActiveGUI_Driver=None):
+    """Runs whole daily cycle w/o prompts (--auto) as a graph of stages:
+        backup -> datestamp -> import sync -> CPF conversion -> CDF conversion -> export syncs
+    Stages only wait on what they read, so the shared-folder Raw sync and the
+    BDX/MES Azure syncs run alongside GUI conversion.
+    GUI stages run in the main thread and expect the CPF program open in front
+    and CIT open w/ the intended cprj. ActiveGUI_Driver=None leaves them out.
+    Returns True if every stage succeeded.
+    """
+    def datestamp():
+        queued_count = datestamp_remote(batch=True)
+        if queued_count:
+            UNATTENDED_NOTICES.append("%d file(s) need datestamp decisions. Run "
+                                "datestamp_remote.py --resolve." % queued_count)
+
+    def sync_import():
+        sync_remote(os.path.join(DIR_REMOTE_SRC, "CDF Files/"), DIR_IMPORT, purge=True, silent=True)
+        sync_remote(os.path.join(DIR_REMOTE_SRC, "CPF Files/"), DIR_IMPORT, silent=True)
+
+    def convert_cdfs():
+        CDF_Database = CloneDataFileDB(DIR_IMPORT, DIR_EXPORT)
+        return CDF_Database.convert_all(ActiveGUI_Driver, check_SNs=True)
+
+    def sync_azure(job_specs):
+        run_azcopy_jobs([make_azure_sync_job(src_dir, dest_url, src_desc, label)
+                            for src_dir, dest_url, src_desc, label in job_specs],
+                                        max_concurrent=AZCOPY_MAX_CONCURRENT)
+
+    Stage = stage_graph.Stage
+    stages = [
+        Stage("file_struct", create_file_struct),
+        Stage("backup", back_up_remote, deps=["file_struct"]),
+        Stage("datestamp", datestamp, deps=["backup"]),
+        Stage("share_raw", lambda: sync_remote(DIR_REMOTE_SRC, os.path.join(DIR_REMOTE_SHARE_CTRL,
+                                        "Raw"), purge=True, silent=True), deps=["datestamp"]),
+        Stage("import_sync", sync_import, deps=["datestamp"]),
+        # Only read shared folders, so can go any time.
+        Stage("azure_batt_mfg", lambda: sync_azure([
+                (DIR_REMOTE_SHARE_BATT, AZ_BLOB_ADDR_BATT, "shared-folder Battery-export dir", "batt"),
+                (DIR_REMOTE_SHARE_MFG, AZ_BLOB_ADDR_MFG, "shared-folder MES batt-scan export dir", "mfg")])),
+    ]
+    if ActiveGUI_Driver is not None:
+        stages.extend([
+            Stage("convert_cpfs", lambda: convert_all_cpfs(DIR_IMPORT, DIR_EXPORT, ActiveGUI_Driver,
+                                check_SNs=True), deps=["import_sync"], main_thread=True),
+            Stage("convert_cdfs", convert_cdfs, deps=["convert_cpfs"], main_thread=True),
+        ])
+        exports_ready = "convert_cdfs"
+    else:
+        print(Fore.MAGENTA + Style.BRIGHT + "Skipping GUI interaction "
+                            "(requires Windows system)." + Style.RESET_ALL)
+        exports_ready = "import_sync"
+    stages.extend([
+        Stage("share_converted", lambda: sync_remote(DIR_EXPORT, os.path.join(DIR_REMOTE_SHARE_CTRL,
+                "Converted"), purge=True, multilevel=False, silent=True), deps=[exports_ready]),
+        Stage("azure_ctrl", lambda: sync_azure([(DIR_EXPORT, AZ_BLOB_ADDR_CTRL,
+                                "local Controller-export dir", "ctrl")]), deps=[exports_ready]),
+    ])
+
+    Graph = stage_graph.StageGraph(stages, max_workers=AUTO_STAGE_WORKERS)
+    all_succeeded = Graph.run()
+    Graph.print_summary()
+    return all_succeeded
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Program to convert CPF or CDF "
                                     "exports from binary to .xlsx file format.")
     parser.add_argument("-d", "--dir", help="Specify dir containing exports "
                                                         "to convert.", type=str)
-    parser.add_argument("-s", "--slow", help="Specify factor by which to extend "
-                            "pauses b/w GUI commands. >1 extends pauses while "
-                                    "<1 speeds them up.", type=float, default=1)
+    parser.add_argument("-s", "--slow", help="Specify safe fallback factor by "
+                            "which to extend pauses b/w GUI commands. Pauses are "
+                            "auto-tuned below this per machine and reset to it "
+                            "after a failure. >1 extends pauses while <1 speeds "
+                                            "them up.", type=float, default=1)
+    parser.add_argument("--no-tune", help="Disable GUI pause auto-tuning and "
+                    "use --slow factor for every command.", action="store_true")
+    parser.add_argument("--reset-tuning", help="Discard this machine's tuned GUI "
+                                    "pauses before starting.", action="store_true")
+    parser.add_argument("--backup-mode", help="How remote source is backed up "
+                "before datestamping: 'union' (every file ever seen), 'snapshot' "
+                "(dated, deduplicated, restorable w/ snapshot_store.py), or 'both'.",
+                        choices=["union", "snapshot", "both"], default=BACKUP_MODE)
     # parser.add_argument("-f", "--file", help="Specify file path of one export  " # maybe implement later
     #                                                     "to reformat.", type=str)
-    # parser.add_argument("-a", "--auto", help="Specify to execute entire routine " # maybe implement later
-    #             "of downloading new exports from remote drive, converting all, "
-    #                     "and uploading to Azure blob.", action="store_true")
+    parser.add_argument("-a", "--auto", help="Run entire routine of backing up and "
+                "datestamping remote exports, syncing them locally, converting all, "
+                "and uploading to shared folder and Azure blob w/o prompts. "
+                "Independent steps run concurrently.", action="store_true")
+    parser.add_argument("--azure-jobs", help="Max number of Azure sync jobs "
+                    "to run at once.", type=int, default=AZCOPY_MAX_CONCURRENT)
+    parser.add_argument("--azure-delta", help="Upload only files changed since last "
+                    "run instead of a full azcopy sync (requires azure-storage-blob).",
+                                                                action="store_true")
+    parser.add_argument("--native-sync", help="Use built-in incremental sync engine "
+                        "instead of robocopy/rsync for local and shared-folder syncs.",
+                                                                action="store_true")
     args = parser.parse_args()
+    BACKUP_MODE = args.backup_mode
+    NATIVE_SYNC = args.native_sync
+    AZURE_DELTA_SYNC = args.azure_delta
+    AZCOPY_MAX_CONCURRENT = args.azure_jobs
+
+    if os.name == "nt":
+        GUI_PAUSE_MULT = args.slow # Extend or reduce waits outside GUI action scripts.
+        gui.PAUSE = 0 # Pauses applied per step by GUI_RUNNER instead.
+        GUI_RUNNER = gui_actions.ActionScriptRunner(
+                            gui_actions.default_profile_path(LOCAL_STATE_DIR),
+                            fallback_mult=args.slow, tune=not args.no_tune)
+        if args.reset_tuning:
+            GUI_RUNNER.reset()
+        SCREEN_LOCATOR = screen_locator.TemplateLocator(
+                            screen_locator.default_state_path(LOCAL_STATE_DIR))
+        SCREEN_LOCATOR.add_template("error_history_save", ERROR_HISTORY_SAVE_IMG,
+                                                    region=ERROR_HISTORY_REGION)
+        SCREEN_LOCATOR.add_template("error_history_blank", ERROR_HISTORY_BLANK,
+                                                    region=ERROR_HISTORY_REGION)
+        if args.reset_tuning:
+            SCREEN_LOCATOR.forget() # Screen layout may have changed too.
+
+    if args.auto:
+        if args.dir:
+            parser.error("--auto always uses the configured import and export dirs")
+        UNATTENDED = True
+        all_succeeded = run_auto_pipeline(GUI_Driver() if os.name == "nt" else None)
+        print_unattended_notices()
+        raise SystemExit(0 if all_succeeded else 1)
 
     # Default is auto-run, but if user specifies --dir, disable auto-run.
 
@@ -1201,13 +2274,10 @@ if __name__ == "__main__":
 
     # Convert exports
     if os.name == "nt":
-        GUI_PAUSE_MULT = args.slow # Extend or reduce pauses between GUI commands
-        gui.PAUSE = 0.5 * GUI_PAUSE_MULT # 500 ms pause after each command.
-
+        GUI_DriverInstance = GUI_Driver()
         try:
-            convert_all_cpfs(import_dir, export_dir, check_SNs=check_vehicle_sns)
+            convert_all_cpfs(import_dir, export_dir, GUI_DriverInstance, check_SNs=check_vehicle_sns)
 
-            GUI_DriverInstance = GUI_Driver()
             CDF_Database = CloneDataFileDB(import_dir, export_dir)
             CDF_Database.convert_all(GUI_DriverInstance, check_SNs=check_vehicle_sns)
             print(Fore.MAGENTA + Style.BRIGHT + "\nGUI interaction done\n" + Style.RESET_ALL)
@@ -1,4 +1,5 @@
 import os.path
+import argparse
 
 import cpf_export as cpf
 from dir_names import DIR_REMOTE_SRC, DIR_REMOTE_SHARE
@@ -8,19 +9,36 @@ def wait_for_input():
     input("\nEnd of Script. Press Enter to finish and close.")
 
 # Standalone script to be run automatically each day.
+# Runs in batch mode by default so it never waits on a user. Files w/ ambiguous
+# S/N or date are queued for a later --resolve (or interactive main-script) run.
+parser = argparse.ArgumentParser(description="Datestamp remote source filenames "
+                                        "and sync them to shared folder.")
+parser.add_argument("-i", "--interactive", help="Prompt for ambiguous filenames "
+                    "during run and wait for user at end.", action="store_true")
+parser.add_argument("-r", "--resolve", help="Work through files queued by earlier "
+                    "batch runs, then exit.", action="store_true")
+args = parser.parse_args()
+
 try:
-    print("Updating remote filenames...")
-    cpf.datestamp_remote()
-    print("...done")
+    if args.resolve:
+        cpf.resolve_datestamp_queue()
+    else:
+        print("Updating remote filenames...")
+        cpf.datestamp_remote(batch=not args.interactive)
+        print("...done")
 
-    # Also back up to shared folder for reference. 
-    print("Syncing source files to shared folder...")
-    cpf.sync_remote(DIR_REMOTE_SRC, os.path.join(DIR_REMOTE_SHARE, "Raw"), purge=True)
-    print("...done")
+        # Also back up to shared folder for reference. 
+        print("Syncing source files to shared folder...")
+        cpf.sync_remote(DIR_REMOTE_SRC, os.path.join(DIR_REMOTE_SHARE, "Raw"), purge=True)
+        print("...done")
 
-    wait_for_input()
+    if args.interactive or args.resolve:
+        wait_for_input()
 
 except Exception as exception_text:
     print(exception_text)
     print("\n" + "*"*10 + "\nException encountered\n" + "*"*10)
-    wait_for_input()
+    if args.interactive or args.resolve:
+        wait_for_input()
+    else:
+        raise SystemExit(1)
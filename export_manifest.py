@@ -0,0 +1,208 @@
+import os
+import sqlite3
+import hashlib
+import argparse
+from datetime import datetime
+
+try:
+    import field_parsing as parsing
+except ModuleNotFoundError:
+    import ctrl_export_preprocessor.field_parsing as parsing
+
+
+EXPORT_MANIFEST_FILENAME = "export_manifest.sqlite3"
+# Kept in export dir's tmp folder so it isn't synced to shared folder or Azure.
+
+SOURCE_NEW = "new"              # No record of this source file.
+SOURCE_UNCHANGED = "unchanged"  # Matches record, and recorded export still exists.
+SOURCE_CHANGED = "changed"      # Content differs from record (or export gone).
+
+HASH_CHUNK_SIZE = 1024 * 1024
+VEHICLES_SCHEMA_VERSION = 1 # Manifest user_version once vehicles table seeded from exports.
+
+
+def hash_file(file_path):
+    """Returns SHA-256 hex digest of file contents."""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(HASH_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ExportManifest(object):
+    """Persistent record of source files already converted and validated.
+    Keyed by source path. Stores source size, mtime, and content hash along
+    with the validated S/N, SW P/N, cprj rev, and export path.
+    Lets reruns skip unchanged files without opening any exports.
+    Also keeps each vehicle's latest known SW P/N and cprj rev (vehicles table),
+    so they can be looked up by S/N before converting a new file.
+    """
+    def __init__(self, manifest_path):
+        manifest_dir = os.path.dirname(manifest_path)
+        if manifest_dir and not os.path.exists(manifest_dir):
+            os.makedirs(manifest_dir, exist_ok=True)
+
+        self.manifest_path = manifest_path
+        self.connection = sqlite3.connect(manifest_path)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS exports (
+                                            source_path TEXT PRIMARY KEY,
+                                            size INTEGER,
+                                            mtime_ns INTEGER,
+                                            content_hash TEXT,
+                                            export_path TEXT,
+                                            vehicle_sn TEXT,
+                                            sw_pn TEXT,
+                                            cprj_rev TEXT,
+                                            recorded TEXT)""")
+            self.connection.execute("""CREATE TABLE IF NOT EXISTS vehicles (
+                                            vehicle_sn TEXT PRIMARY KEY,
+                                            sw_pn TEXT,
+                                            cprj_rev TEXT,
+                                            file_date TEXT,
+                                            source_path TEXT,
+                                            recorded TEXT)""")
+        self._backfill_vehicles()
+
+    def _key(self, source_path):
+        return os.path.normcase(os.path.abspath(source_path))
+
+    def get_entry(self, source_path):
+        """Returns recorded fields for source_path as a dict, or None if not recorded."""
+        row = self.connection.execute("SELECT * FROM exports WHERE source_path = ?",
+                                            (self._key(source_path),)).fetchone()
+        return dict(row) if row is not None else None
+
+    def source_status(self, source_path):
+        """Compares source_path against its record.
+        Only stat is needed when size and mtime match the record. Content is
+        hashed only if they differ (e.g. file touched by a copy but not changed).
+        """
+        entry = self.get_entry(source_path)
+        if entry is None:
+            return SOURCE_NEW
+        if not entry["export_path"] or not os.path.exists(entry["export_path"]):
+            return SOURCE_CHANGED
+
+        stat_result = os.stat(source_path)
+        if (stat_result.st_size == entry["size"]
+                            and stat_result.st_mtime_ns == entry["mtime_ns"]):
+            return SOURCE_UNCHANGED
+
+        if (stat_result.st_size == entry["size"]
+                                and hash_file(source_path) == entry["content_hash"]):
+            # Same content, new mtime. Refresh stat so next run doesn't rehash.
+            with self.connection:
+                self.connection.execute("UPDATE exports SET mtime_ns = ? WHERE source_path = ?",
+                            (stat_result.st_mtime_ns, self._key(source_path)))
+            return SOURCE_UNCHANGED
+
+        return SOURCE_CHANGED
+
+    def record(self, source_path, export_path, vehicle_sn=None, sw_pn=None, cprj_rev=None):
+        """Records source_path as converted and validated (overwrites any existing record)."""
+        stat_result = os.stat(source_path)
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO exports VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (self._key(source_path), stat_result.st_size,
+                         stat_result.st_mtime_ns, hash_file(source_path),
+                         os.path.abspath(export_path), vehicle_sn, sw_pn, cprj_rev,
+                         datetime.now().strftime("%Y-%m-%dT%H%M%S")))
+
+    def _backfill_vehicles(self):
+        # Manifests from before vehicles table existed: seed it once from recorded exports.
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] >= VEHICLES_SCHEMA_VERSION:
+            return
+        rows = self.connection.execute("SELECT source_path, vehicle_sn, sw_pn, cprj_rev FROM exports "
+                                "WHERE vehicle_sn IS NOT NULL AND sw_pn IS NOT NULL").fetchall()
+        for row in rows:
+            _, file_date = parsing.parse_filename_sn_and_date(
+                            os.path.splitext(os.path.basename(row["source_path"]))[0])
+            self.update_vehicle(row["vehicle_sn"], row["sw_pn"], row["cprj_rev"],
+                                                file_date, row["source_path"])
+        with self.connection:
+            self.connection.execute("PRAGMA user_version = %d" % VEHICLES_SCHEMA_VERSION)
+
+    def get_vehicle(self, vehicle_sn):
+        """Returns vehicle's latest known SW P/N, cprj rev, and date (YYYYMMDD) of
+        file they're from, as a dict, or None if unknown.
+        """
+        row = self.connection.execute("SELECT * FROM vehicles WHERE vehicle_sn = ?",
+                                                        (vehicle_sn,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def vehicle_cprj_revs(self):
+        """Returns {vehicle S/N: cprj rev} for all vehicles w/ known SW."""
+        rows = self.connection.execute("SELECT vehicle_sn, cprj_rev FROM vehicles "
+                                                "WHERE cprj_rev IS NOT NULL")
+        return {row["vehicle_sn"]: row["cprj_rev"] for row in rows}
+
+    def _is_older(self, vehicle_sn, file_date):
+        # True if vehicle's entry comes from a file dated after file_date.
+        # Undated files count as oldest.
+        entry = self.get_vehicle(vehicle_sn)
+        return entry is not None and bool(entry["file_date"]) and (file_date or "") < entry["file_date"]
+
+    def update_vehicle(self, vehicle_sn, sw_pn, cprj_rev, file_date, source_path):
+        """Records SW P/N and cprj rev found in vehicle's file dated file_date (YYYYMMDD or None).
+        Replaces entry unless it came from a newer file. Returns True if replaced.
+        """
+        if self._is_older(vehicle_sn, file_date):
+            return False
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO vehicles VALUES (?, ?, ?, ?, ?, ?)",
+                        (vehicle_sn, sw_pn, cprj_rev, file_date,
+                         os.path.abspath(source_path),
+                         datetime.now().strftime("%Y-%m-%dT%H%M%S")))
+        return True
+
+    def invalidate_vehicle(self, vehicle_sn, file_date):
+        """Drops vehicle's entry (e.g. newer file had no valid SW P/N) unless
+        entry came from a file newer than file_date. Returns True if dropped.
+        """
+        if self._is_older(vehicle_sn, file_date):
+            return False
+        with self.connection:
+            cursor = self.connection.execute("DELETE FROM vehicles WHERE vehicle_sn = ?", (vehicle_sn,))
+        return cursor.rowcount > 0
+
+    def forget(self, source_path):
+        with self.connection:
+            self.connection.execute("DELETE FROM exports WHERE source_path = ?",
+                                                    (self._key(source_path),))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __repr__(self):
+        return "ExportManifest '%s'" % self.manifest_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up vehicles' latest known "
+                                            "SW P/N and cprj rev in export manifest.")
+    parser.add_argument("manifest", help="Specify manifest path (in export dir's "
+                                                        "tmp folder).", type=str)
+    parser.add_argument("-s", "--sn", help="Only show this vehicle S/N.", type=str)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.manifest):
+        raise Exception("Can't find manifest '%s'" % args.manifest)
+    with ExportManifest(args.manifest) as Manifest:
+        if args.sn:
+            vehicle_rows = [Manifest.get_vehicle(args.sn) or {"vehicle_sn": args.sn, "sw_pn": None,
+                                        "cprj_rev": None, "file_date": None}]
+        else:
+            vehicle_rows = [dict(row) for row in Manifest.connection.execute(
+                                        "SELECT * FROM vehicles ORDER BY vehicle_sn")]
+        for vehicle_row in vehicle_rows:
+            print("%s\t%s\trev %s\t(%s)" % (vehicle_row["vehicle_sn"], vehicle_row["sw_pn"],
+                                vehicle_row["cprj_rev"], vehicle_row["file_date"] or "undated"))
@@ -0,0 +1,86 @@
+import re
+import time
+import functools
+
+
+DATE_REGEX_1 = r"(20\d{2}[0-1]\d[0-3]\d)"
+DATE_REGEX_2 = r"(20\d{2}-[0-1]\d-[0-3]\d)"
+# Could catch some invalid dates like 20231131. Further validated below in is_valid_date()
+DATE_FORMAT_1 = "%Y%m%d"
+DATE_FORMAT_2 = "%Y-%m-%d"
+DATE_FORMAT_3 = "%m%d%Y"
+DATE_FORMATS = [DATE_FORMAT_1, DATE_FORMAT_2, DATE_FORMAT_3]
+
+SN_REGEX = r"(3\d{6}|5\d{6}|8\d{6})"
+# Any "3" or "5" or "8" followed by six more digits
+CDF_SW_PN_REGEX = r"\d{6}\.\d{2}|\d{8}\.\d{2}"
+SW_PN_REGEX = r"\d{6}G\d{2}|\d{8}G\d{2}"
+
+PARSE_CACHE_SIZE = 8192 # Distinct strings remembered per parse function.
+# Same filenames, sheet names, and values get parsed in every stage of a run.
+
+
+@functools.lru_cache(maxsize=None)
+def compiled(regex_pattern):
+    """Returns compiled (case-insensitive) pattern. Each pattern compiled only once."""
+    return re.compile(regex_pattern, flags=re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def find_matches(regex_pattern, string_to_search):
+    """Returns tuple of all matches of regex_pattern in string_to_search."""
+    return tuple(compiled(regex_pattern).findall(string_to_search))
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def is_valid_date(date_str):
+    # Regex doesn't fully validate dates (e.g. 20231131 passes).
+    for date_format in DATE_FORMATS:
+        try:
+            time.strptime(date_str, date_format)
+        except ValueError:
+            continue
+        else:
+            return True
+    return False
+
+
+def find_candidates(regex_pattern, string_to_search, date_target=False):
+    """Returns list of all matches in string_to_search.
+    date_target=True drops matches that aren't valid dates.
+    """
+    matches = find_matches(regex_pattern, string_to_search)
+    if date_target:
+        return [match for match in matches if is_valid_date(match)]
+    return list(matches)
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def find_single(regex_pattern, string_to_search, date_target=False):
+    """Returns match if string_to_search contains exactly one, else None.
+    date_target=True also requires the match to be a valid date.
+    """
+    matches = find_matches(regex_pattern, string_to_search)
+    if len(matches) != 1:
+        return None
+    if date_target and not is_valid_date(matches[0]):
+        return None
+    return matches[0]
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_filename_sn_and_date(item_name):
+    """Returns (S/N, datestamp) found in item_name (filename w/o ext).
+    Either is None if not found exactly once. Datestamp is only looked for
+    outside the S/N, so a S/N's digits can't be mistaken for a date.
+    """
+    sn_matches = find_matches(SN_REGEX, item_name)
+    if len(sn_matches) != 1:
+        return None, None
+    date_matches = []
+    for substring in item_name.split(sn_matches[0]):
+        date_matches.extend(find_matches(DATE_REGEX_1, substring))
+    if len(date_matches) != 1:
+        return sn_matches[0], None
+    return sn_matches[0], date_matches[0]
+
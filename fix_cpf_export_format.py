@@ -1,7 +1,11 @@
 import os
+import re
 import csv
 import xlrd
 import argparse
+import collections
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 from colorama import Style, Fore, Back
@@ -10,10 +14,38 @@ import magic
 from xlsxwriter.workbook import Workbook
 
 
+WORKBOOK_OPTIONS = {"constant_memory": True}
+# Streams each row to disk once the next one is started, so memory use stays flat
+# for large fault logs and aggregates. Requires writing rows in order.
+# https://xlsxwriter.readthedocs.io/working_with_memory.html
+
+NUMBER_REGEX = re.compile(r"^-?(0|[1-9]\d{0,14})(\.\d*[1-9])?$")
+# Integers and decimals w/o leading zeros or trailing decimal zeros. Values like
+# "0123" or "1.10" stay text so P/Ns and version strings aren't altered.
+# Limited to 15 integer digits (Excel's numeric precision).
+
+
 def wait_for_input():
     input("\nEnd of Script. Press Enter to finish and close.")
 
 
+def typed_cell(value):
+    """Returns numeric-looking strings as int or float so Excel stores them as
+    numbers. Anything else returned unchanged."""
+    if isinstance(value, str) and NUMBER_REGEX.match(value):
+        if "." in value:
+            return float(value)
+        else:
+            return int(value)
+    return value
+
+
+def write_rows(worksheet, rows):
+    """Writes rows to worksheet in order, starting at A1, w/ numeric values typed."""
+    for row, data in enumerate(rows):
+        worksheet.write_row(row, 0, [typed_cell(value) for value in data])
+
+
 def convert_param_export(tsv_path, new_filename, check_for_xls=True, replace=True, tqdm_obj=None):
     if not os.path.exists(tsv_path):
         print('Can\'t find source file "%s".' % os.path.basename(tsv_path))
@@ -43,14 +75,13 @@ def convert_param_export(tsv_path, new_filename, check_for_xls=True, replace=Tru
             # Used in cases where this function gets called right after exporting
             # from program, so we can be sure it's the raw export.
 
-        with Workbook(new_filepath) as workbook:
+        with Workbook(new_filepath, WORKBOOK_OPTIONS) as workbook:
             worksheet = workbook.add_worksheet("Parameters")
 
             if mime_type == tsv_mime_type:
                 # TSV masquerading as XLS
-                tsv_reader = csv.reader(open(tsv_path, 'r'), delimiter='\t')
-                for row, data in enumerate(tsv_reader):
-                    worksheet.write_row(row, 0, data)
+                with open(tsv_path, 'r') as tsv_file:
+                    write_rows(worksheet, csv.reader(tsv_file, delimiter='\t'))
                 # Borrowed from here
                 # https://stackoverflow.com/questions/16852655/convert-a-tsv-file-to-xls-xlsx-using-python
 
@@ -59,32 +90,38 @@ def convert_param_export(tsv_path, new_filename, check_for_xls=True, replace=Tru
                 xls_path = tsv_path
                 with xlrd.open_workbook(xls_path) as xls_reader:
                     xls_sheet = xls_reader.sheet_by_index(0)
-                    for row in range(xls_sheet.nrows):
-                        data = xls_sheet.row_values(row)
-                        worksheet.write_row(row, 0, data)
+                    write_rows(worksheet, (xls_sheet.row_values(row)
+                                            for row in range(xls_sheet.nrows)))
 
     # Confirm output file existence before deleting source file.
     assert os.path.exists(new_filepath), "Can't find export %s converted from %s" % (new_filepath, tsv_path)
 
     perm_error = False
     if replace:
-        try:
-            os.remove(tsv_path) # Delete tsv file
-            # Not working yet in PowerShell intermittently (throws PermissionError)
-            # https://stackoverflow.com/questions/68344233/os-remove-permissionerror-winerror-32-the-process-cannot-access-the-file-be
-            output_str = "Removed %s" % os.path.basename(tsv_path)
-            if tqdm_obj is None:
-                print(output_str) # DEBUG
-            else:
-                tqdm_obj.write(output_str) # DEBUG
-        except PermissionError:
-            print(Fore.YELLOW)
-            print("Error removing %s" % os.path.basename(tsv_path) + Style.RESET_ALL)
-            perm_error = True
+        perm_error = remove_source_export(tsv_path, tqdm_obj=tqdm_obj)
 
     return new_filepath, perm_error
 
 
+def remove_source_export(tsv_path, tqdm_obj=None):
+    """Deletes source export after conversion. Returns True if removal failed
+    w/ PermissionError."""
+    try:
+        os.remove(tsv_path) # Delete tsv file
+        # Not working yet in PowerShell intermittently (throws PermissionError)
+        # https://stackoverflow.com/questions/68344233/os-remove-permissionerror-winerror-32-the-process-cannot-access-the-file-be
+        output_str = "Removed %s" % os.path.basename(tsv_path)
+        if tqdm_obj is None:
+            print(output_str) # DEBUG
+        else:
+            tqdm_obj.write(output_str) # DEBUG
+    except PermissionError:
+        print(Fore.YELLOW)
+        print("Error removing %s" % os.path.basename(tsv_path) + Style.RESET_ALL)
+        return True
+    return False
+
+
 def combine_param_and_fault_export(cpf_params_path, cpf_faults_path, combined_file_path):
     if not os.path.exists(cpf_params_path):
         raise Exception("Can't find cpf_params file '%s'" % cpf_params_path)
@@ -95,93 +132,157 @@ def combine_param_and_fault_export(cpf_params_path, cpf_faults_path, combined_fi
         raise Exception("Combined export '%s' exists already" % os.path.basename(combined_file_path))
 
     # Create new combined file
-    with Workbook(combined_file_path) as workbook:
+    with Workbook(combined_file_path, WORKBOOK_OPTIONS) as workbook:
 
         worksheet = workbook.add_worksheet("Parameters")
-        params_iter = csv.reader(open(cpf_params_path, 'r'), delimiter='\t')
-        for row, data in enumerate(params_iter):
-            worksheet.write_row(row, 0, data)
+        with open(cpf_params_path, 'r') as params_file:
+            write_rows(worksheet, csv.reader(params_file, delimiter='\t'))
         # Borrowed from here
         # https://stackoverflow.com/questions/16852655/convert-a-tsv-file-to-xls-xlsx-using-python
 
         worksheet = workbook.add_worksheet("Faults") # Will be blank if CPF had no faults.
         if cpf_faults_path is None:
             # If no faults present in CPF, populate Faults tab w/ header row only.
-            faults_log_iter = [["Error Text", "Error Description"]]
+            write_rows(worksheet, [["Error Text", "Error Description"]])
         else:
-            faults_log_iter = csv.reader(open(cpf_faults_path, 'r'), delimiter='\t')
-
-        for row, data in enumerate(faults_log_iter):
-            worksheet.write_row(row, 0, data)
+            with open(cpf_faults_path, 'r') as faults_file:
+                write_rows(worksheet, csv.reader(faults_file, delimiter='\t'))
 
     # print("Successfully wrote %s" % os.path.basename(combined_file_path)) # DEBUG
 
 
-def convert_all_param_exports(dir_path, check_xls=True):
-    file_list = [x for x in sorted(os.listdir(dir_path)) if x.upper().endswith(".XLS")]
-    pbar = tqdm(file_list, colour="yellow")
-    for tsv_item in pbar:
+def _ordered_pool_map(func, items, jobs):
+    """Yields func(item) for each item, in the order given.
+    If jobs > 1, calls are fanned out to that many worker processes, with a
+    bounded number in flight so finished results don't pile up in memory.
+    func must be a module-level function so it can be pickled.
+    """
+    if jobs <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = collections.deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= 2 * jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _convert_param_export_job(job_args):
+    # Worker-process entry point. Source removal left to parent so PermissionErrors
+    # are reported in order and don't abort the rest of the batch.
+    tsv_path, new_filename, check_for_xls = job_args
+    new_filepath, _ = convert_param_export(tsv_path, new_filename,
+                                check_for_xls=check_for_xls, replace=False)
+    return new_filepath
+
+
+def convert_all_param_exports(dir_path, check_xls=True, jobs=1):
+    """Converts each .XLS export in dir_path to its own .xlsx, then removes the source.
+    jobs > 1 converts files in parallel in a process pool.
+    Raises PermissionError at the end listing any sources that couldn't be removed.
+    """
+    tsv_paths = []
+    for tsv_item in sorted(os.listdir(dir_path)):
         tsv_item_path = os.path.join(dir_path, tsv_item)
         if os.path.isdir(tsv_item_path):
             # print("%s not a file." % item)
             continue
         if os.path.splitext(tsv_item)[-1].upper() != ".XLS":
             continue
+        tsv_paths.append(tsv_item_path)
+
+    job_list = [(tsv_item_path, os.path.splitext(tsv_item_path)[0] + ".xlsx", check_xls)
+                                                    for tsv_item_path in tsv_paths]
+
+    perm_error_files = []
+    with tqdm(total=len(job_list), colour="yellow") as pbar:
+        results = _ordered_pool_map(_convert_param_export_job, job_list, jobs)
+        for tsv_item_path, converted_file_path in zip(tsv_paths, results):
+            pbar.update(1)
+            if remove_source_export(tsv_item_path, tqdm_obj=pbar):
+                perm_error_files.append(os.path.basename(tsv_item_path))
+
+    if perm_error_files:
+        raise PermissionError("Couldn't remove %d converted source file(s): %s"
+                        % (len(perm_error_files), ", ".join(perm_error_files)))
+
+
+def iter_export_rows(cpf_export_path):
+    """Detects whether CPF export is a real XLS or a TSV and yields its rows
+    one at a time, so they can be written out as they're read.
+    """
+    # Determine if CPF export is a real XLS or TSV.
+    # https://stackoverflow.com/questions/43580/how-to-find-the-mime-type-of-a-file-in-python
+    # mime_type = mimetypes.guess_type(cpf_export_path)[0] # This only uses extension to determine.
+    MagicObj = magic.detect_from_filename(cpf_export_path)
+    # Not based on extension, despite function name seeming to indicate that.
+
+    if MagicObj.mime_type == "text/plain":
+        # TSV masquerading as XLS
+        with open(cpf_export_path, 'r') as tsv_file:
+            yield from csv.reader(tsv_file, delimiter='\t')
+
+    elif MagicObj.mime_type == "application/vnd.ms-excel":
+        # Real XLS
+        # XLSX is this: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        with xlrd.open_workbook(cpf_export_path) as xls_reader:
+            xls_sheet = xls_reader.sheet_by_index(0)
+            for row in range(xls_sheet.nrows):
+                yield xls_sheet.row_values(row)
+    else:
+        raise Exception('"%s" - Filetype not recognized (should be '
+                        'CPF export w/ .XLS extension)' % os.path.basename(cpf_export_path))
+    # Reference: If wrong file is passed to wrong reader, returns UnicodeDecodeError w/ TSV-read attempt.
+    # xlrd.biffh.XLRDError w/ XLS-read attempt (that encounters a TSV)
+
+
+def read_export_rows(cpf_export_path):
+    """Returns all rows of CPF export as a list of lists. Pure parsing w/ no
+    shared state, so safe to run in a worker process.
+    """
+    return list(iter_export_rows(cpf_export_path))
+
+
+def convert_and_aggregate_exports(dir_path, jobs=1):
+    """Program to automatically collect CPF exports into one .xlsx file.
+    jobs > 1 parses exports in parallel worker processes. This process stays
+    the only writer and adds worksheets in sorted order, so output matches a
+    serial run. Serially, each export's rows are streamed straight into its
+    worksheet w/o being held in memory.
+    """
+    cpf_exports = []
+    for cpf_export in sorted(os.listdir(dir_path)):
+        cpf_export_path = os.path.join(dir_path, cpf_export)
+        if os.path.isdir(cpf_export_path):
+            continue
+        if os.path.splitext(cpf_export)[-1].upper() != ".XLS":
+            continue
+        cpf_exports.append(cpf_export)
 
-        new_xlsx_filename = os.path.splitext(tsv_item_path)[0] + ".xlsx"
-        converted_file_path, perm_error = convert_param_export(tsv_item_path,
-                                    new_xlsx_filename, check_for_xls=check_xls,
-                                                    replace=True, tqdm_obj=pbar)
-        if perm_error:
-            raise PermissionError
-
-
-def convert_and_aggregate_exports(dir_path):
-    """Program to automatically collect CPF exports into one .xlsx file."""
     # Generate a .xlsx to populate w/ the TSV data.
     timestamp = datetime.now().strftime("%Y-%m-%dT%H%M%S")
     xlsx_file = os.path.join(dir_path, "CPF_exports_%s.xlsx" % timestamp)
-    with Workbook(xlsx_file) as workbook:
+    with Workbook(xlsx_file, WORKBOOK_OPTIONS) as workbook:
         print("Creating %s" % os.path.basename(xlsx_file))
 
         # Loop through all CPF exports in directory.
-        for cpf_export in sorted(os.listdir(dir_path)):
-            cpf_export_path = os.path.join(dir_path, cpf_export)
-            if os.path.isdir(cpf_export_path):
-                continue
-            if os.path.splitext(cpf_export)[-1].upper() != ".XLS":
-                continue
-
+        export_paths = [os.path.join(dir_path, cpf_export) for cpf_export in cpf_exports]
+        if jobs <= 1:
+            parsed_rows = (iter_export_rows(export_path) for export_path in export_paths)
+        else:
+            # Rows have to be materialized to come back from worker processes.
+            parsed_rows = _ordered_pool_map(read_export_rows, export_paths, jobs)
+        for cpf_export, rows in zip(cpf_exports, parsed_rows):
             # Make a new tab in the output worksheet w/ the same name as the CPF export.
             worksheet = workbook.add_worksheet(os.path.splitext(cpf_export)[0])
-            # Read the row data from the CPF export and write it to the XLSX file.
-
-            # Determine if CPF export is a real XLS or TSV.
-            # https://stackoverflow.com/questions/43580/how-to-find-the-mime-type-of-a-file-in-python
-            # mime_type = mimetypes.guess_type(cpf_export_path)[0] # This only uses extension to determine.
-            MagicObj = magic.detect_from_filename(cpf_export_path)
-            # Not based on extension, despite function name seeming to indicate that.
-
+            # Write the row data read from the CPF export to the XLSX file.
             print("\tReading from %s..." % cpf_export, end="")
-            if MagicObj.mime_type == "text/plain":
-                # TSV masquerading as XLS
-                tsv_reader = csv.reader(open(cpf_export_path, 'r'), delimiter='\t')
-                for row, data in enumerate(tsv_reader):
-                    worksheet.write_row(row, 0, data)
-
-            elif MagicObj.mime_type == "application/vnd.ms-excel":
-                # Real XLS
-                # XLSX is this: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                with xlrd.open_workbook(cpf_export_path) as xls_reader:
-                    xls_sheet = xls_reader.sheet_by_index(0)
-                    for row in range(xls_sheet.nrows):
-                        data = xls_sheet.row_values(row)
-                        worksheet.write_row(row, 0, data)
-            else:
-                raise Exception('"%s" - Filetype not recognized (should be '
-                                'CPF export w/ .XLS extension)' % cpf_export)
-            # Reference: If wrong file is passed to wrong reader, returns UnicodeDecodeError w/ TSV-read attempt.
-            # xlrd.biffh.XLRDError w/ XLS-read attempt (that encounters a TSV)
+            write_rows(worksheet, rows)
 
             print("done")
         print("...done")
@@ -220,16 +321,27 @@ def parse_cpf_vehicle_sn(cpf_param_filepath):
 
 if __name__ == "__main__":
     # Don't run if module being imported. Only if script being run directly.
+    multiprocessing.freeze_support()
+    # Needed for process pool in PyInstaller .exe
+    # https://pyinstaller.org/en/stable/common-issues-and-pitfalls.html#multi-processing
     try:
         parser = argparse.ArgumentParser(description="Program to fix CPF-export"
                                                             "file format.")
         parser.add_argument("-d", "--dir", help="Specify dir containing exports "
                                             "to reformat", type=str, default=".")
+        parser.add_argument("-i", "--individual", help="Convert each export to "
+                            "its own .xlsx file (replacing the .XLS) instead of "
+                            "aggregating into one file.", action="store_true")
+        parser.add_argument("-j", "--jobs", help="Number of exports to read "
+                                        "in parallel.", type=int, default=1)
         # https://www.programcreek.com/python/example/748/argparse.ArgumentParser
         args = parser.parse_args()
 
         dirpath = os.path.abspath(os.path.normpath(args.dir))
-        convert_and_aggregate_exports(dirpath)
+        if args.individual:
+            convert_all_param_exports(dirpath, jobs=args.jobs)
+        else:
+            convert_and_aggregate_exports(dirpath, jobs=args.jobs)
         wait_for_input()
 
     except Exception as exception_text:
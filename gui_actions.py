@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import platform
+
+if os.name == "nt":
+    # Allows testing other (non-GUI) features in WSL where pyautogui import fails
+    import pyautogui as gui
+
+
+STEP_PAUSE = 0.5 # Default pause after each GUI command (s). Matches old global gui.PAUSE.
+
+# Each action script is a list of (pyautogui function, args, pause-after) steps.
+# A string arg of the form "{name}" is replaced w/ the value of keyword name
+# passed to ActionScriptRunner.run(). Steps w/ "sleep" action only pause.
+ACTION_SCRIPTS = {
+    "open_cpf": [
+        ("hotkey", ("ctrl", "o"), STEP_PAUSE),
+        ("hotkey", ("ctrl", "l"), STEP_PAUSE),       # Select address bar
+        ("typewrite", ("{dir_path}",), STEP_PAUSE),  # Navigate to import folder.
+        ("press", (["enter"],), STEP_PAUSE),
+        ("hotkey", ("alt", "n"), STEP_PAUSE),        # Select filename field
+        ("typewrite", ("{filename}",), STEP_PAUSE),
+        ("press", (["enter"],), STEP_PAUSE),         # Confirm filename to open.
+        ("sleep", (), 1.0),                          # Allow time for file to open.
+    ],
+    "export_cpf_params": [
+        ("hotkey", ("alt", "f"), STEP_PAUSE),        # Open File menu (toolbar).
+        ("press", (["e"],), STEP_PAUSE),             # Select Export from File menu.
+        ("hotkey", ("alt", "n"), STEP_PAUSE),        # Select filename field
+        ("typewrite", ("{filename}",), STEP_PAUSE),
+        ("hotkey", ("ctrl", "l"), STEP_PAUSE),       # Select address bar
+        ("typewrite", ("{dir_path}",), STEP_PAUSE),  # Navigate to target export folder.
+        ("press", (["enter"],), STEP_PAUSE),
+        ("hotkey", ("alt", "s"), STEP_PAUSE),        # Save
+    ],
+    "open_cpf_diagnostics": [
+        ("hotkey", ("ctrl", "4"), STEP_PAUSE),       # Diagnostics tab
+    ],
+    "export_cpf_faults": [
+        ("click", ("{x}", "{y}"), STEP_PAUSE),       # Error History tab's Save button
+        ("hotkey", ("alt", "n"), STEP_PAUSE),        # Select filename field
+        ("typewrite", ("{filename}",), STEP_PAUSE),
+        ("hotkey", ("ctrl", "l"), STEP_PAUSE),       # Select address bar
+        ("typewrite", ("{dir_path}",), STEP_PAUSE),  # Navigate to target export folder.
+        ("press", (["enter"],), STEP_PAUSE),
+        ("hotkey", ("alt", "s"), STEP_PAUSE),        # Save
+    ],
+    "close_cpf": [
+        ("hotkey", ("ctrl", "f4"), STEP_PAUSE),
+    ],
+    "open_cdf": [
+        ("press", (["alt"],), STEP_PAUSE),           # File > Import > CDF
+        ("press", (["f"],), STEP_PAUSE),
+        ("press", (["i"],), STEP_PAUSE),
+        ("press", (["c"],), STEP_PAUSE),
+        ("press", (["enter"],), STEP_PAUSE),         # Confirm node to use.
+        ("hotkey", ("ctrl", "l"), STEP_PAUSE),       # Select address bar
+        ("typewrite", ("{dir_path}",), STEP_PAUSE),  # Navigate to import folder.
+        ("press", (["enter"],), STEP_PAUSE),
+        ("hotkey", ("alt", "n"), STEP_PAUSE),        # Select filename field
+        ("typewrite", ("{filename}",), STEP_PAUSE),
+        ("press", (["enter"],), STEP_PAUSE),         # Confirm filename to open.
+        ("sleep", (), 1.0),                          # Allow time for file to open.
+    ],
+    "export_cdf": [
+        ("press", (["alt"],), STEP_PAUSE),           # File > Export > Spreadsheet
+        ("press", (["f"],), STEP_PAUSE),
+        ("press", (["e"],), STEP_PAUSE),
+        ("press", (["s"],), STEP_PAUSE),
+        ("hotkey", ("alt", "n"), STEP_PAUSE),        # Select filename field
+        ("typewrite", ("{filename}",), STEP_PAUSE),
+        ("hotkey", ("ctrl", "l"), STEP_PAUSE),       # Select address bar
+        ("typewrite", ("{dir_path}",), STEP_PAUSE),  # Navigate to target export folder.
+        ("press", (["enter"],), STEP_PAUSE),
+        ("hotkey", ("alt", "s"), STEP_PAUSE + 0.75), # Save
+        ("press", (["enter"],), STEP_PAUSE),         # Click through error
+    ],
+    "refocus_cit": [
+        # Click title bar of CIT to bring back in focus.
+        # Snap CIT to right half of screen and make sure Excel window isn't full-screen.
+        ("click", (1477, 17), STEP_PAUSE),
+    ],
+}
+
+TUNE_STREAK = 3     # Consecutive successes needed before shortening a script's pauses.
+TUNE_FACTOR = 0.85  # Pause multiplier scaled by this after each success streak.
+MIN_MULT = 0.1      # Never tune pauses below this fraction of fallback values.
+FLOOR_MARGIN = 1.2  # After a failure, never tune back below this multiple of the failing value.
+
+
+def default_profile_path(state_dir):
+    """Profile file is per machine, since GUI timing depends on the hardware."""
+    return os.path.join(state_dir, "gui_profile_%s.json" % platform.node())
+
+
+class ActionScriptRunner(object):
+    """Runs ACTION_SCRIPTS w/ per-step pauses scaled by a per-script multiplier.
+    Multipliers are tuned from recorded results: a streak of successes shortens
+    a script's pauses, and a failure resets it to the safe fallback value and
+    keeps it from tuning that low again. Tuned values persist in profile_path,
+    and are rescaled if fallback_mult (--slow) differs from the one they were tuned under.
+    """
+    def __init__(self, profile_path, fallback_mult=1.0, tune=True):
+        self.profile_path = profile_path
+        self.fallback_mult = fallback_mult
+        self.tune = tune
+        self.pending_scripts = [] # Scripts run since last call to record_result()
+
+        self.profile = dict()
+        if os.path.exists(profile_path):
+            with open(profile_path, "r") as profile_file:
+                self.profile = json.load(profile_file)
+
+    def _script_profile(self, script_name):
+        if script_name not in self.profile:
+            self.profile[script_name] = {"mult": self.fallback_mult,
+                                         "floor": MIN_MULT * self.fallback_mult,
+                                         "fallback_mult": self.fallback_mult,
+                                         "streak": 0, "successes": 0, "failures": 0}
+        script_profile = self.profile[script_name]
+        tuned_fallback = script_profile["fallback_mult"]
+        if tuned_fallback > 0 and tuned_fallback != self.fallback_mult:
+            # --slow changed since tuning. Tuned values are relative to it, so scale them
+            # (e.g. --slow 2 still doubles pauses on a machine w/ a tuned profile).
+            scale = self.fallback_mult / tuned_fallback
+            script_profile["mult"] *= scale
+            script_profile["floor"] *= scale
+            script_profile["fallback_mult"] = self.fallback_mult
+        return script_profile
+
+    def get_mult(self, script_name):
+        if not self.tune:
+            return self.fallback_mult
+        return self._script_profile(script_name)["mult"]
+
+    def run(self, script_name, **params):
+        """Executes script's steps, substituting "{name}" args from params."""
+        mult = self.get_mult(script_name)
+        for action, args, pause in ACTION_SCRIPTS[script_name]:
+            args = [params[arg[1:-1]] if isinstance(arg, str) and arg.startswith("{")
+                                        and arg.endswith("}") else arg for arg in args]
+            if action != "sleep":
+                getattr(gui, action)(*args)
+            time.sleep(pause * mult)
+        self.pending_scripts.append(script_name)
+
+    def record_result(self, success):
+        """Attributes outcome (e.g. export file appeared or not) to every script
+        run since last call, then saves profile. success=None discards them
+        w/o affecting tuning (outcome not attributable to timing).
+        """
+        scripts = set(self.pending_scripts)
+        self.pending_scripts = []
+        if success is None or not self.tune:
+            return
+
+        for script_name in scripts:
+            script_profile = self._script_profile(script_name)
+            if success:
+                script_profile["successes"] += 1
+                script_profile["streak"] += 1
+                if script_profile["streak"] >= TUNE_STREAK:
+                    script_profile["mult"] = max(script_profile["floor"],
+                                                script_profile["mult"] * TUNE_FACTOR)
+                    script_profile["streak"] = 0
+            else:
+                script_profile["failures"] += 1
+                script_profile["streak"] = 0
+                script_profile["floor"] = max(script_profile["floor"],
+                            min(self.fallback_mult, script_profile["mult"] * FLOOR_MARGIN))
+                script_profile["mult"] = max(self.fallback_mult, script_profile["mult"])
+        self.save()
+
+    def reset(self):
+        self.profile = dict()
+        self.save()
+
+    def save(self):
+        profile_dir = os.path.dirname(self.profile_path)
+        if profile_dir and not os.path.exists(profile_dir):
+            os.makedirs(profile_dir, exist_ok=True)
+        with open(self.profile_path, "w") as profile_file:
+            json.dump(self.profile, profile_file, indent=4)
+
+    def __repr__(self):
+        return "ActionScriptRunner '%s'" % self.profile_path
@@ -0,0 +1,181 @@
+import os
+import csv
+import glob
+
+import openpyxl
+from colorama import Style, Fore
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Mirror is optional. Conversion still runs w/o pyarrow installed.
+    pa = None
+
+
+PARQUET_DIR_NAME = "parquet"
+PARAM_TABLE_NAME = "parameters"
+FAULT_TABLE_NAME = "faults"
+PARTITION_COLS = ["date", "sn"]
+
+PARAM_COLUMNS = ["variable_name", "vcl_alias", "value", "sw_pn", "source_file", "date", "sn"]
+FAULT_COLUMNS = ["error_text", "error_description", "source_file", "date", "sn"]
+FAULT_HEADER = ["Error Text", "Error Description"]
+
+_warned_missing = False
+
+
+def is_available():
+    global _warned_missing # Only warn once per run.
+    if pa is None and not _warned_missing:
+        print(Fore.YELLOW + "pyarrow not installed. Skipping Parquet mirror of "
+                                                    "exports." + Style.RESET_ALL)
+        _warned_missing = True
+    return pa is not None
+
+
+def _to_text(value):
+    # Values stored as strings so mixed numeric/text parameters share a column type.
+    if value is None or value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _remove_source_files(table_root, source_name, export_date=None):
+    # Source's date partition comes from its filename, so only that one needs checking.
+    date_dir = "date=%s" % glob.escape(export_date) if export_date else "*"
+    for file_path in glob.glob(os.path.join(glob.escape(table_root), date_dir, "*",
+                                            glob.escape(source_name) + "-*.parquet")):
+        os.remove(file_path)
+
+
+def _write_table(records, columns, table_root, source_name, export_date=None):
+    """Writes records (list of dicts) to a Hive-partitioned dataset under table_root.
+    File name derived from source_name. Source's existing file(s) are removed
+    first, so re-mirroring a source replaces them (even w/ no records now)
+    and leaves the rest of the dataset alone.
+    """
+    _remove_source_files(table_root, source_name, export_date)
+    if not records:
+        return
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    table = pa.Table.from_pylist(records, schema=schema)
+    pq.write_to_dataset(table, table_root, partition_cols=PARTITION_COLS,
+                        basename_template=source_name + "-{i}.parquet",
+                        existing_data_behavior="overwrite_or_ignore")
+    # https://arrow.apache.org/docs/python/generated/pyarrow.parquet.write_to_dataset.html
+
+
+def cpf_param_records(rows, source_name, vehicle_sn, export_date, sw_pn=None):
+    """Normalizes CPF parameter-export rows (label in 2nd column, value in 3rd)."""
+    records = []
+    for data in rows:
+        if len(data) < 3 or not data[1]:
+            continue
+        records.append({"variable_name": _to_text(data[1]), "vcl_alias": None,
+                        "value": _to_text(data[2]), "sw_pn": sw_pn,
+                        "source_file": source_name, "date": export_date,
+                        "sn": vehicle_sn})
+    return records
+
+
+def cpf_fault_records(rows, source_name, vehicle_sn, export_date):
+    """Normalizes CPF fault-log rows (error text, description), skipping header."""
+    records = []
+    for data in rows:
+        if not data or list(data[:2]) == FAULT_HEADER:
+            continue
+        records.append({"error_text": _to_text(data[0]),
+                        "error_description": _to_text(data[1]) if len(data) > 1 else None,
+                        "source_file": source_name, "date": export_date,
+                        "sn": vehicle_sn})
+    return records
+
+
+def cdf_param_records(rows, source_name, vehicle_sn, export_date, sw_pn=None):
+    """Normalizes rows of CDF export's Parameters tab (first row is header)."""
+    rows = iter(rows)
+    header = list(next(rows, ()))
+    name_col = header.index("Variable Name")
+    value_col = header.index("Application Default")
+    # Old CIT versions don't include VCL Alias column.
+    alias_col = header.index("VCL Alias") if "VCL Alias" in header else None
+
+    records = []
+    for data in rows:
+        if len(data) <= name_col or not data[name_col]:
+            continue
+        records.append({"variable_name": _to_text(data[name_col]),
+                        "vcl_alias": _to_text(data[alias_col]) if alias_col is not None else None,
+                        "value": _to_text(data[value_col]) if len(data) > value_col else None,
+                        "sw_pn": sw_pn, "source_file": source_name,
+                        "date": export_date, "sn": vehicle_sn})
+    return records
+
+
+def mirror_cpf_tsvs(cpf_params_path, cpf_faults_path, dataset_root, source_name,
+                                        vehicle_sn=None, export_date=None, sw_pn=None):
+    """Mirrors CPF parameter and fault TSV exports (as produced by the GUI) to Parquet.
+    cpf_faults_path may be None if CPF had no faults.
+    """
+    if not is_available():
+        return False
+
+    with open(cpf_params_path, 'r') as params_file:
+        param_records = cpf_param_records(csv.reader(params_file, delimiter='\t'),
+                                    source_name, vehicle_sn, export_date, sw_pn)
+    if cpf_faults_path is None:
+        fault_records = []
+    else:
+        with open(cpf_faults_path, 'r') as faults_file:
+            fault_records = cpf_fault_records(csv.reader(faults_file, delimiter='\t'),
+                                                source_name, vehicle_sn, export_date)
+
+    _write_table(param_records, PARAM_COLUMNS,
+                    os.path.join(dataset_root, PARAM_TABLE_NAME), source_name, export_date)
+    _write_table(fault_records, FAULT_COLUMNS,
+                    os.path.join(dataset_root, FAULT_TABLE_NAME), source_name, export_date)
+    return True
+
+
+def mirror_cpf_xlsx(cpf_combined_path, dataset_root, source_name,
+                                        vehicle_sn=None, export_date=None, sw_pn=None):
+    """Mirrors an existing combined CPF export (_cpf.xlsx) to Parquet.
+    Used to backfill exports converted before the mirror existed.
+    """
+    if not is_available():
+        return False
+
+    workbook = openpyxl.load_workbook(cpf_combined_path, read_only=True, data_only=True)
+    try:
+        param_records = cpf_param_records(workbook["Parameters"].iter_rows(values_only=True),
+                                    source_name, vehicle_sn, export_date, sw_pn)
+        fault_records = cpf_fault_records(workbook["Faults"].iter_rows(values_only=True),
+                                                source_name, vehicle_sn, export_date)
+    finally:
+        workbook.close()
+
+    _write_table(param_records, PARAM_COLUMNS,
+                    os.path.join(dataset_root, PARAM_TABLE_NAME), source_name, export_date)
+    _write_table(fault_records, FAULT_COLUMNS,
+                    os.path.join(dataset_root, FAULT_TABLE_NAME), source_name, export_date)
+    return True
+
+
+def mirror_cdf_xlsx(cdf_export_path, dataset_root, source_name,
+                                        vehicle_sn=None, export_date=None, sw_pn=None):
+    """Mirrors Parameters tab of a CDF export (_CDF.xlsx) to Parquet."""
+    if not is_available():
+        return False
+
+    workbook = openpyxl.load_workbook(cdf_export_path, read_only=True, data_only=True)
+    try:
+        param_records = cdf_param_records(workbook["Parameters"].iter_rows(values_only=True),
+                                    source_name, vehicle_sn, export_date, sw_pn)
+    finally:
+        workbook.close()
+
+    _write_table(param_records, PARAM_COLUMNS,
+                    os.path.join(dataset_root, PARAM_TABLE_NAME), source_name, export_date)
+    return True
@@ -0,0 +1,159 @@
+import os
+import json
+import platform
+
+if os.name == "nt":
+    # Allows testing other (non-GUI) features in WSL where pyautogui import fails
+    import pyautogui as gui
+    from PIL import Image
+    # Newer pyscreeze raises instead of returning None when image not found.
+    NOT_FOUND_EXCEPTIONS = (getattr(gui, "ImageNotFoundException", LookupError),)
+
+
+SEARCH_MARGIN = 80      # Pixels around last-known location searched before wider region.
+POINTER_CLEARANCE = 40  # Pixels pointer is moved below a target before checking it.
+# Hovering over a button changes its appearance, so template wouldn't match.
+
+
+def default_state_path(state_dir):
+    """Locations are per machine, since they depend on screen layout."""
+    return os.path.join(state_dir, "screen_locations_%s.json" % platform.node())
+
+
+def _expand(box, margin):
+    left, top, width, height = box
+    return (max(0, left - margin), max(0, top - margin), width + 2 * margin, height + 2 * margin)
+
+
+class TemplateLocator(object):
+    """Finds GUI elements on screen by template image, w/o searching the whole
+    screen each time:
+        1. Each element's last-found location is cached (and kept in state_path
+           between runs). Reused after confirming template still matches there,
+           which only needs a screenshot of that small box.
+        2. Otherwise searched for near last-known location of any of the
+           elements asked for (e.g. alternate looks of the same button),
+        3. then in element's region of interest, if given,
+        4. then on full screen.
+    Template images are loaded once.
+    """
+    def __init__(self, state_path=None, margin=SEARCH_MARGIN):
+        self.state_path = state_path
+        self.margin = margin
+        self.templates = dict() # name: (PIL image, region of interest or None)
+        self.locations = dict() # name: (left, top, width, height)
+        if state_path is not None and os.path.exists(state_path):
+            with open(state_path, "r") as state_file:
+                self.locations = {name: tuple(box) for name, box in json.load(state_file).items()}
+
+    def add_template(self, name, image_path, region=None):
+        """region: (left, top, width, height) element is expected in, if known."""
+        if not os.path.exists(image_path):
+            raise Exception("Can't find template image '%s'" % image_path)
+        template = Image.open(image_path)
+        template.load() # Decode now rather than on every search.
+        self.templates[name] = (template, region)
+
+    def _search(self, name, region=None):
+        """Returns box where template found in region (full screen if None), or None."""
+        template = self.templates[name][0]
+        screen_shot = gui.screenshot(region=region)
+        try:
+            box = gui.locate(template, screen_shot)
+        except NOT_FOUND_EXCEPTIONS:
+            box = None
+        if box is None:
+            return None
+        left, top, width, height = box
+        if region is not None:
+            left, top = left + region[0], top + region[1]
+        return (int(left), int(top), int(width), int(height))
+
+    def _clear_pointer(self, box):
+        # Move pointer off box to be searched (if on it) so hover effect doesn't hide a match.
+        # Goes below box, or above/beside it if box reaches screen edge.
+        left, top, width, height = box
+        x, y = gui.position()
+        if left - POINTER_CLEARANCE <= x <= left + width + POINTER_CLEARANCE and \
+                        top - POINTER_CLEARANCE <= y <= top + height + POINTER_CLEARANCE:
+            screen_width, screen_height = gui.size()
+            if top + height + POINTER_CLEARANCE < screen_height:
+                gui.moveTo(x, top + height + POINTER_CLEARANCE)
+            elif top - POINTER_CLEARANCE >= 0:
+                gui.moveTo(x, top - POINTER_CLEARANCE)
+            elif left + width + POINTER_CLEARANCE < screen_width:
+                gui.moveTo(left + width + POINTER_CLEARANCE, y)
+            elif left - POINTER_CLEARANCE >= 0:
+                gui.moveTo(left - POINTER_CLEARANCE, y)
+
+    def verify(self, name):
+        """Returns True if name's template still matches at its cached location."""
+        box = self.locations.get(name)
+        if box is None:
+            return False
+        self._clear_pointer(box)
+        return self._search(name, region=box) is not None
+
+    def locate_any(self, names):
+        """Finds whichever of names' templates is on screen, trying cheapest
+        searches first for all of them. Returns (name, box) or (None, None).
+        """
+        for name in names:
+            if self.verify(name):
+                return name, self.locations[name]
+
+        near_regions = []
+        interest_regions = []
+        for name in names:
+            if name in self.locations and self.locations[name] not in near_regions:
+                near_regions.append(self.locations[name])
+            region = self.templates[name][1]
+            if region is not None and region not in interest_regions:
+                interest_regions.append(region) # Alternate looks usually share one region.
+        search_stages = [[_expand(box, self.margin) for box in near_regions],
+                         interest_regions,
+                         [None]]
+        for regions in search_stages:
+            for region in regions:
+                if region is not None:
+                    # Pointer may still be on element from last click.
+                    self._clear_pointer(region)
+                for name in names:
+                    box = self._search(name, region)
+                    if box is not None:
+                        self._remember(name, box)
+                        return name, box
+        return None, None
+
+    def locate(self, name):
+        """Returns box (left, top, width, height) where name's template is on screen, or None."""
+        return self.locate_any([name])[1]
+
+    def forget(self, name=None):
+        """Drops cached location of name (or all)."""
+        if name is None:
+            self.locations = dict()
+        else:
+            self.locations.pop(name, None)
+        self.save()
+
+    def _remember(self, name, box):
+        self.locations[name] = box
+        self.save()
+
+    def save(self):
+        if self.state_path is None:
+            return
+        state_dir = os.path.dirname(self.state_path)
+        if state_dir and not os.path.exists(state_dir):
+            os.makedirs(state_dir, exist_ok=True)
+        with open(self.state_path, "w") as state_file:
+            json.dump(self.locations, state_file, indent=4)
+
+    @staticmethod
+    def center(box):
+        left, top, width, height = box
+        return left + width // 2, top + height // 2
+
+    def __repr__(self):
+        return "TemplateLocator '%s'" % self.state_path
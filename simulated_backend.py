@@ -0,0 +1,198 @@
+import os
+import time
+import random
+import argparse
+import collections
+
+from colorama import Style, Fore
+from xlsxwriter.workbook import Workbook
+
+try:
+    import cpf_export as cpf
+    from sw_rev_mapping import REV_MAP_ALL_F
+except ModuleNotFoundError:
+    import ctrl_export_preprocessor.cpf_export as cpf
+    from ctrl_export_preprocessor.sw_rev_mapping import REV_MAP_ALL_F
+
+
+CPF_PARAM_COUNT = 400   # Parameter rows in each simulated CPF export
+CDF_PARAM_COUNT = 1500  # Parameter rows in each simulated CDF export
+MAX_FAULT_COUNT = 50    # Fault-log rows in each simulated CPF export (if any)
+NO_FAULT_RATE = 0.3     # Fraction of simulated CPFs w/ empty fault history
+
+
+class SimulatedFailure(Exception):
+    pass
+
+
+class SimulatedGUI_Driver(cpf.GUI_Driver):
+    """Conversion backend that writes realistic CPF (TSV) and CDF (.xlsx) exports
+    directly instead of driving the GUI programs. Lets the conversion pipeline
+    run and be timed on any OS (e.g. in CI).
+    latency: seconds each simulated GUI step (open or export) takes.
+    failure_rate: probability each simulated GUI step raises SimulatedFailure.
+    """
+    def __init__(self, latency=0.0, failure_rate=0.0, cprj_pn=None, seed=None):
+        super(SimulatedGUI_Driver, self).__init__()
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.sw_pns = sorted(REV_MAP_ALL_F)
+        self.loaded_cprj_pn = cprj_pn or self.sw_pns[0]
+        self.open_file = None
+        self.step_counts = collections.Counter()
+
+    def _simulate_step(self, step_name):
+        self.step_counts[step_name] += 1
+        time.sleep(self.latency)
+        if self.rng.random() < self.failure_rate:
+            self.step_counts[step_name + "_failed"] += 1
+            raise SimulatedFailure("Simulated %s failure" % step_name)
+
+    def _vehicle_sn(self, file_path):
+        # Use S/N in filename so S/N checks pass.
+        vehicle_sn, _ = cpf.parse_filename_sn_and_date(file_path)
+        return vehicle_sn or "3000000"
+
+    def _vehicle_sw_pn(self, vehicle_sn):
+        # Same vehicle always gets same SW P/N, like real fleet data.
+        return self.sw_pns[int(vehicle_sn) % len(self.sw_pns)]
+
+    def select_program(self, filetype):
+        self.gui_in_focus = True
+
+    def load_cprj(self, cprj_rev):
+        self.loaded_cprj_pn = sorted(pn for pn in self.sw_pns if REV_MAP_ALL_F[pn] == cprj_rev)[0]
+
+    def open_cpf(self, file_path):
+        if not os.path.exists(file_path):
+            raise Exception("Can't find file_path '%s'" % file_path)
+        self._simulate_step("open_cpf")
+        self.open_file = file_path
+        return True
+
+    def export_cpf_params(self, target_dir, output_filename, validate_sn):
+        self._simulate_step("export_cpf_params")
+        vehicle_sn = self._vehicle_sn(self.open_file)
+        export_path = os.path.join(target_dir, output_filename)
+        with open(export_path, "w") as export_file:
+            export_file.write("Group\tParameter\tValue\n")
+            export_file.write("Vehicle\tVehicle Serial Number\t%s\n" % vehicle_sn)
+            export_file.write("Vehicle\tSoftware Part Number\t%s\n" % self._vehicle_sw_pn(vehicle_sn))
+            for param_num in range(CPF_PARAM_COUNT):
+                export_file.write("Group %d\tParameter %d\t%s\n"
+                        % (param_num // 20, param_num, self.rng.choice(
+                                ["%d" % self.rng.randint(0, 5000),
+                                 "%.2f" % self.rng.uniform(0, 100), "On", "Off"])))
+        if validate_sn:
+            cpf.check_cpf_vehicle_sn(export_path)
+        return export_path
+
+    def export_cpf_faults(self, target_dir, output_filename):
+        self._simulate_step("export_cpf_faults")
+        self.open_file = None # Real export closes CPF after fault export.
+        if self.rng.random() < NO_FAULT_RATE:
+            return None
+        export_path = os.path.join(target_dir, output_filename)
+        with open(export_path, "w") as export_file:
+            export_file.write("Error Text\tError Description\n")
+            for _ in range(self.rng.randint(1, MAX_FAULT_COUNT)):
+                fault_code = self.rng.randint(1, 99)
+                export_file.write("Fault %d\tSimulated fault %d description\n"
+                                                        % (fault_code, fault_code))
+        return export_path
+
+    def open_cdf(self, file_path):
+        if not os.path.exists(file_path):
+            raise Exception("Can't find file_path '%s'" % file_path)
+        self._simulate_step("open_cdf")
+        self.open_file = file_path
+        return True
+
+    def export_cdf(self, output_filepath):
+        self._simulate_step("export_cdf")
+        vehicle_sn = self._vehicle_sn(self.open_file)
+        sw_pn = self._vehicle_sw_pn(vehicle_sn)
+        with Workbook(output_filepath) as workbook:
+            worksheet = workbook.add_worksheet("Parameters")
+            worksheet.write_row(0, 0, ["Variable Name", "VCL Alias", "Application Default"])
+            worksheet.write_row(1, 0, [cpf.CDF_SN_VAR_NAME, cpf.CDF_SN_VCL_ALIAS, vehicle_sn])
+            worksheet.write_row(2, 0, [cpf.CDF_SW_PN_VAR_NAME, cpf.CDF_SW_PN_VCL_ALIAS,
+                                                            sw_pn.replace("G", ".")])
+            for param_num in range(CDF_PARAM_COUNT):
+                worksheet.write_row(3 + param_num, 0, ["user%d" % (200 + param_num),
+                        "Alias_%d" % param_num, "%d" % self.rng.randint(0, 65535)])
+            # CIT names a tab after P/N of project file loaded.
+            workbook.add_worksheet("Project %s" % self.loaded_cprj_pn)
+        self.open_file = None
+
+
+def generate_sources(import_dir, count, seed=None):
+    """Writes count dummy .cpf and .cdf source files w/ datestamped names to import_dir."""
+    rng = random.Random(seed)
+    for file_num in range(count):
+        vehicle_sn = "%s%06d" % (rng.choice("358"), rng.randint(0, 999999))
+        datestamp = "2024%02d%02d" % (rng.randint(1, 12), rng.randint(1, 28))
+        for ext in (".cpf", ".cdf"):
+            source_path = os.path.join(import_dir, "%s_sn%s%s" % (datestamp, vehicle_sn, ext))
+            with open(source_path, "wb") as source_file:
+                source_file.write(rng.randbytes(2048))
+
+
+def report_throughput(label, file_count, elapsed):
+    rate = file_count / elapsed if elapsed else 0
+    print(Fore.MAGENTA + Style.BRIGHT + "%s: %d file(s) in %.1f s (%.2f files/s)"
+                        % (label, file_count, elapsed, rate) + Style.RESET_ALL)
+
+
+def run_benchmark(import_dir, export_dir, latency=0.0, failure_rate=0.0, check_SNs=True,
+                                                                    unattended=True):
+    """Runs CPF and CDF conversion end to end w/ simulated backend and reports throughput.
+    unattended: run conversion loops as in --auto, so simulated failures are logged
+        and skipped instead of prompting (lets failure scenarios run headless).
+    """
+    SimDriver = SimulatedGUI_Driver(latency=latency, failure_rate=failure_rate)
+
+    prev_unattended = cpf.UNATTENDED
+    cpf.UNATTENDED = unattended
+    notice_start = len(cpf.UNATTENDED_NOTICES)
+    try:
+        start_time = time.monotonic()
+        cpf_count = cpf.convert_all_cpfs(import_dir, export_dir, SimDriver, check_SNs=check_SNs)
+        report_throughput("CPF conversion", cpf_count, time.monotonic() - start_time)
+
+        start_time = time.monotonic()
+        CDF_Database = cpf.CloneDataFileDB(import_dir, export_dir)
+        cdf_count = CDF_Database.convert_all(SimDriver, check_SNs=check_SNs)
+        report_throughput("CDF conversion", cdf_count, time.monotonic() - start_time)
+    finally:
+        cpf.UNATTENDED = prev_unattended
+
+    print("Simulated GUI steps: %s" % dict(SimDriver.step_counts))
+    failed_count = sum(count for step_name, count in SimDriver.step_counts.items()
+                                                    if step_name.endswith("_failed"))
+    print("Simulated failures: %d (%d file issue(s) logged and skipped)"
+                    % (failed_count, len(cpf.UNATTENDED_NOTICES) - notice_start))
+    return cpf_count, cdf_count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run CPF/CDF conversion pipeline "
+                                "w/ simulated GUI backend and report throughput.")
+    parser.add_argument("-d", "--dir", help="Specify dir to hold simulated sources "
+                                "and exports.", type=str, required=True)
+    parser.add_argument("-n", "--count", help="Number of simulated .cpf/.cdf "
+                "source pairs to generate first.", type=int, default=0)
+    parser.add_argument("-l", "--latency", help="Seconds each simulated GUI step "
+                                            "takes.", type=float, default=0.0)
+    parser.add_argument("-f", "--failure-rate", help="Probability each simulated "
+                                    "GUI step fails.", type=float, default=0.0)
+    parser.add_argument("-i", "--interactive", help="Prompt on each failure as in a "
+            "normal run, instead of logging and skipping it.", action="store_true")
+    args = parser.parse_args()
+
+    dir_path = os.path.abspath(args.dir)
+    if args.count:
+        generate_sources(dir_path, args.count)
+    run_benchmark(dir_path, dir_path, latency=args.latency, failure_rate=args.failure_rate,
+                                                        unattended=not args.interactive)
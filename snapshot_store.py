@@ -0,0 +1,176 @@
+import os
+import json
+import shutil
+import argparse
+import threading
+import concurrent.futures
+from datetime import datetime
+
+from tqdm import tqdm
+from colorama import Style, Fore
+
+try:
+    from export_manifest import hash_file
+except ModuleNotFoundError:
+    from ctrl_export_preprocessor.export_manifest import hash_file
+
+
+BLOB_DIR_NAME = "blobs"
+SNAPSHOT_DIR_NAME = "snapshots"
+SNAPSHOT_NAME_FORMAT = "%Y%m%dT%H%M%S"
+HASH_WORKERS = 4 # Threads hashing and storing files. Mostly disk-bound.
+
+
+class SnapshotStore(object):
+    """Point-in-time backups of a directory tree, deduplicated by content.
+    Each file's content is stored once under blobs/ named by its SHA-256 hash.
+    Each snapshot is a JSON manifest in snapshots/ mapping every relative path
+    in the tree (at that time) to its hash, size, and mtime.
+    Identical files (in one snapshot or across snapshots) share one blob.
+    """
+    def __init__(self, store_root):
+        self.store_root = store_root
+        self.blob_root = os.path.join(store_root, BLOB_DIR_NAME)
+        self.snapshot_root = os.path.join(store_root, SNAPSHOT_DIR_NAME)
+        os.makedirs(self.blob_root, exist_ok=True)
+        os.makedirs(self.snapshot_root, exist_ok=True)
+
+    def blob_path(self, content_hash):
+        # Fan out by first 2 hex chars so no one dir gets too big.
+        return os.path.join(self.blob_root, content_hash[:2], content_hash)
+
+    def list_snapshots(self):
+        """Returns snapshot names, oldest first."""
+        return sorted(os.path.splitext(filename)[0] for filename in os.listdir(self.snapshot_root)
+                                                        if filename.endswith(".json"))
+
+    def load_snapshot(self, snapshot_name):
+        with open(os.path.join(self.snapshot_root, snapshot_name + ".json"), "r") as snapshot_file:
+            return json.load(snapshot_file)
+
+    def _store_file(self, file_path, stat_result, known_entry):
+        """Returns manifest entry for file_path, adding its content to blob store if new.
+        Reuses hash from last snapshot if size and mtime unchanged (no read needed).
+        """
+        if (known_entry is not None and known_entry["size"] == stat_result.st_size
+                        and known_entry["mtime_ns"] == stat_result.st_mtime_ns
+                        and os.path.exists(self.blob_path(known_entry["hash"]))):
+            return known_entry
+
+        content_hash = hash_file(file_path)
+        blob_path = self.blob_path(content_hash)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            tmp_path = "%s.%d.tmp" % (blob_path, threading.get_ident())
+            shutil.copyfile(file_path, tmp_path)
+            os.replace(tmp_path, blob_path)
+        return {"hash": content_hash, "size": stat_result.st_size,
+                "mtime_ns": stat_result.st_mtime_ns}
+
+    def create_snapshot(self, src, workers=HASH_WORKERS, silent=False):
+        """Records current state of src as a new snapshot. Returns snapshot name."""
+        if not os.path.exists(src):
+            raise Exception("Can't find src dir '%s'" % src)
+
+        snapshot_names = self.list_snapshots()
+        known_files = self.load_snapshot(snapshot_names[-1])["files"] if snapshot_names else dict()
+
+        source_files = []
+        for dirpath, dirnames, filenames in os.walk(src):
+            for filename in filenames:
+                file_path = os.path.join(dirpath, filename)
+                # Manifest paths always use "/" so snapshots restore on any OS.
+                rel_path = os.path.relpath(file_path, src).replace(os.sep, "/")
+                source_files.append((rel_path, file_path))
+
+        files = dict()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            future_paths = {executor.submit(self._store_file, file_path, os.stat(file_path),
+                                        known_files.get(rel_path)): rel_path
+                                        for rel_path, file_path in source_files}
+            for future in tqdm(concurrent.futures.as_completed(future_paths),
+                            total=len(future_paths), disable=silent, colour="#05e4ab"):
+                files[future_paths[future]] = future.result()
+
+        snapshot_name = datetime.now().strftime(SNAPSHOT_NAME_FORMAT)
+        if snapshot_name in snapshot_names:
+            raise Exception("Snapshot '%s' already exists." % snapshot_name)
+        snapshot_path = os.path.join(self.snapshot_root, snapshot_name + ".json")
+        with open(snapshot_path + ".tmp", "w") as snapshot_file:
+            json.dump({"source": os.path.abspath(src), "created": snapshot_name,
+                       "files": dict(sorted(files.items()))}, snapshot_file, indent=1)
+        os.replace(snapshot_path + ".tmp", snapshot_path)
+        # Manifest only written once all its blobs are stored.
+        return snapshot_name
+
+    def find_snapshot(self, date_str):
+        """Returns name of latest snapshot taken on or before date_str
+        (YYYYMMDD, or a full snapshot name), or None if none that old.
+        """
+        snapshot_names = [snapshot_name for snapshot_name in self.list_snapshots()
+                                                if snapshot_name[:len(date_str)] <= date_str]
+        return snapshot_names[-1] if snapshot_names else None
+
+    def restore(self, snapshot_name, dest, path_prefix=""):
+        """Writes files recorded in snapshot (optionally only those under
+        path_prefix) to dest, w/ original mtimes. Returns number of files restored.
+        """
+        files = self.load_snapshot(snapshot_name)["files"]
+        restore_count = 0
+        for rel_path, entry in files.items():
+            if not rel_path.startswith(path_prefix):
+                continue
+            dest_path = os.path.join(dest, *rel_path.split("/"))
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            # Copy (not link) so edits to restored files can't corrupt the store.
+            shutil.copyfile(self.blob_path(entry["hash"]), dest_path)
+            os.utime(dest_path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+            restore_count += 1
+        return restore_count
+
+    def store_stats(self):
+        """Returns (snapshot count, blob count, total blob bytes)."""
+        blob_count = 0
+        blob_bytes = 0
+        for dirpath, dirnames, filenames in os.walk(self.blob_root):
+            for filename in filenames:
+                blob_count += 1
+                blob_bytes += os.path.getsize(os.path.join(dirpath, filename))
+        return len(self.list_snapshots()), blob_count, blob_bytes
+
+    def __repr__(self):
+        return "SnapshotStore '%s'" % self.store_root
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create, list, or restore "
+                            "deduplicated point-in-time snapshots of a directory.")
+    parser.add_argument("-s", "--store", help="Specify snapshot store dir.",
+                                                        type=str, required=True)
+    parser.add_argument("-c", "--create", help="Snapshot this dir.", type=str)
+    parser.add_argument("-l", "--list", help="List snapshots in store.", action="store_true")
+    parser.add_argument("-r", "--restore", help="Restore latest snapshot taken on "
+                    "or before this date (YYYYMMDD) or snapshot name.", type=str)
+    parser.add_argument("-o", "--out", help="Specify dir to restore into.", type=str)
+    parser.add_argument("-p", "--prefix", help="Only restore files under this "
+                        "relative path (e.g. 'CDF Files/').", type=str, default="")
+    args = parser.parse_args()
+
+    Store = SnapshotStore(args.store)
+    if args.create:
+        snapshot_name = Store.create_snapshot(args.create)
+        print("Created snapshot %s" % snapshot_name)
+    if args.list:
+        for snapshot_name in Store.list_snapshots():
+            print("%s\t%d file(s)" % (snapshot_name, len(Store.load_snapshot(snapshot_name)["files"])))
+        snapshot_count, blob_count, blob_bytes = Store.store_stats()
+        print(Fore.MAGENTA + "%d snapshot(s) sharing %d unique file(s) (%.1f MB)"
+                % (snapshot_count, blob_count, blob_bytes / 1e6) + Style.RESET_ALL)
+    if args.restore:
+        if not args.out:
+            parser.error("--restore requires --out")
+        snapshot_name = Store.find_snapshot(args.restore)
+        if snapshot_name is None:
+            raise Exception("No snapshot taken on or before '%s'." % args.restore)
+        restore_count = Store.restore(snapshot_name, args.out, args.prefix)
+        print("Restored %d file(s) from snapshot %s to '%s'" % (restore_count, snapshot_name, args.out))
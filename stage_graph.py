@@ -0,0 +1,138 @@
+import time
+import traceback
+import concurrent.futures
+
+from colorama import Style, Fore
+
+
+STAGE_PENDING = "pending"
+STAGE_DONE = "done"
+STAGE_FAILED = "failed"
+STAGE_SKIPPED = "skipped" # A dependency failed or was skipped.
+
+
+class Stage(object):
+    """One step of a pipeline. func is called w/ no args.
+    deps: names of stages that must finish successfully first.
+    main_thread: run in the calling thread instead of the worker pool (e.g.
+        GUI automation and Excel COM calls, which expect the main thread).
+        Only one main-thread stage runs at a time.
+    """
+    def __init__(self, name, func, deps=(), main_thread=False):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.main_thread = main_thread
+        self.status = STAGE_PENDING
+        self.result = None
+        self.error = None
+        self.elapsed = None
+
+    def __repr__(self):
+        return "Stage '%s' (%s)" % (self.name, self.status)
+
+
+class StageGraph(object):
+    """Runs Stages in dependency order, each as soon as its deps are done.
+    Independent background stages run concurrently (up to max_workers) while
+    main-thread stages run one after another in the calling thread.
+    A failed stage doesn't stop the others. Only its dependents are skipped.
+    """
+    def __init__(self, stages, max_workers=4):
+        self.stages = {stage.name: stage for stage in stages}
+        self.order = [stage.name for stage in stages]
+        self.max_workers = max_workers
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise Exception("Stage '%s' depends on unknown stage '%s'" % (stage.name, dep))
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        visiting = set()
+        visited = set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise Exception("Stage dependency cycle through '%s'" % name)
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.remove(name)
+            visited.add(name)
+
+        for name in self.order:
+            visit(name)
+
+    def _ready(self, stage):
+        return all(self.stages[dep].status == STAGE_DONE for dep in stage.deps)
+
+    def _blocked(self, stage):
+        return any(self.stages[dep].status in (STAGE_FAILED, STAGE_SKIPPED) for dep in stage.deps)
+
+    def _run_stage(self, stage):
+        print(Fore.MAGENTA + Style.BRIGHT + "\n[%s] Starting stage '%s'"
+                % (time.strftime("%H:%M:%S"), stage.name) + Style.RESET_ALL)
+        start_time = time.monotonic()
+        try:
+            stage.result = stage.func()
+        except Exception as exception_text:
+            stage.status = STAGE_FAILED
+            stage.error = "%s\n%s" % (exception_text, traceback.format_exc())
+            print(Fore.RED + Style.BRIGHT + "[%s] Stage '%s' FAILED: %s" % (time.strftime("%H:%M:%S"),
+                                    stage.name, exception_text) + Style.RESET_ALL)
+        else:
+            stage.status = STAGE_DONE
+            print(Fore.MAGENTA + Style.BRIGHT + "[%s] Finished stage '%s'"
+                    % (time.strftime("%H:%M:%S"), stage.name) + Style.RESET_ALL)
+        stage.elapsed = time.monotonic() - start_time
+        return stage
+
+    def run(self):
+        """Runs all stages. Returns True if every stage succeeded."""
+        running = dict()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                main_thread_ready = None
+                for name in self.order:
+                    stage = self.stages[name]
+                    if stage.status != STAGE_PENDING or name in running.values():
+                        continue
+                    if self._blocked(stage):
+                        stage.status = STAGE_SKIPPED
+                        continue
+                    if not self._ready(stage):
+                        continue
+                    if stage.main_thread:
+                        if main_thread_ready is None:
+                            main_thread_ready = stage
+                    else:
+                        running[executor.submit(self._run_stage, stage)] = name
+
+                if main_thread_ready is not None:
+                    # Background stages keep running meanwhile.
+                    self._run_stage(main_thread_ready)
+                    continue
+                if not running:
+                    if any(stage.status == STAGE_PENDING for stage in self.stages.values()):
+                        continue # Dependents of just-skipped stages get marked next pass.
+                    break
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+                    future.result()
+
+        return all(stage.status == STAGE_DONE for stage in self.stages.values())
+
+    def print_summary(self):
+        print(Fore.MAGENTA + Style.BRIGHT + "\nPipeline summary:" + Style.RESET_ALL)
+        for name in self.order:
+            stage = self.stages[name]
+            color = {STAGE_DONE: Fore.GREEN, STAGE_FAILED: Fore.RED + Style.BRIGHT}.get(
+                                                        stage.status, Fore.YELLOW)
+            elapsed_str = " (%.0f s)" % stage.elapsed if stage.elapsed is not None else ""
+            print(color + "\t%-22s %s%s" % (name, stage.status, elapsed_str) + Style.RESET_ALL)
+            if stage.status == STAGE_FAILED:
+                print(Fore.RED + "\t\t" + stage.error.strip().replace("\n", "\n\t\t") + Style.RESET_ALL)
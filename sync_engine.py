@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import concurrent.futures
+
+from tqdm import tqdm
+from colorama import Style, Fore
+
+
+SYNC_WORKERS = 16 # Threads for listing/copying. High, since SMB time is mostly round-trip latency.
+COPY_CHUNK_SIZE = 1024 * 1024
+MTIME_TOLERANCE_NS = 2 * 10**9
+# Same size and mtime w/in 2 s counts as same file. FAT/exFAT backup drives store
+# mtimes at 2 s resolution (same allowance as robocopy /FFT).
+TMP_SUFFIX = ".synctmp"
+
+
+def state_filename(src, dest):
+    """Each src/dest pair gets its own state file."""
+    pair_key = "%s|%s" % (os.path.normcase(os.path.abspath(src)), os.path.normcase(os.path.abspath(dest)))
+    return "sync_state_%s.json" % hashlib.sha256(pair_key.encode()).hexdigest()[:16]
+
+
+def load_state(state_path):
+    if state_path is None or not os.path.exists(state_path):
+        return dict()
+    with open(state_path, "r") as state_file:
+        return json.load(state_file)["files"]
+
+
+def save_state(state_path, src, dest, files):
+    state_dir = os.path.dirname(state_path)
+    if state_dir and not os.path.exists(state_dir):
+        os.makedirs(state_dir, exist_ok=True)
+    with open(state_path + ".tmp", "w") as state_file:
+        json.dump({"src": src, "dest": dest, "files": files}, state_file)
+    os.replace(state_path + ".tmp", state_path)
+
+
+def _list_dir(dir_path):
+    """Returns ({file name: (size, mtime_ns)}, [subdir names]) for one dir."""
+    files = dict()
+    subdirs = []
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.name)
+            elif entry.is_file(follow_symlinks=False) and not entry.name.endswith(TMP_SUFFIX):
+                stat_result = entry.stat() # Cached from listing on Windows
+                files[entry.name] = (stat_result.st_size, stat_result.st_mtime_ns)
+    return files, subdirs
+
+
+def list_tree(root, executor, multilevel=True):
+    """Lists root (and, if multilevel, all dirs below it) w/ dirs listed concurrently.
+    Returns ({rel_path: (size, mtime_ns)}, set of rel dir paths). Paths use "/".
+    """
+    files = dict()
+    dirs = set()
+    if not os.path.exists(root):
+        return files, dirs
+    pending = {executor.submit(_list_dir, root): ""}
+    while pending:
+        done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            rel_dir = pending.pop(future)
+            dir_files, subdirs = future.result()
+            for name, file_stat in dir_files.items():
+                files[rel_dir + name] = file_stat
+            if not multilevel:
+                continue
+            for subdir in subdirs:
+                rel_subdir = rel_dir + subdir + "/"
+                dirs.add(rel_subdir)
+                pending[executor.submit(_list_dir, os.path.join(root, *rel_subdir.split("/")))] = rel_subdir
+    return files, dirs
+
+
+def hash_path(file_path):
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(COPY_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def copy_file(src_path, dest_path):
+    """Copies src_path to dest_path via a temp file, so dest is never left
+    partially written. Preserves mtime. Hashes content in the same pass.
+    Returns (bytes copied, content hash).
+    """
+    tmp_path = dest_path + TMP_SUFFIX
+    hasher = hashlib.sha256()
+    byte_count = 0
+    try:
+        with open(src_path, "rb") as src_file, open(tmp_path, "wb") as tmp_file:
+            for chunk in iter(lambda: src_file.read(COPY_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+                tmp_file.write(chunk)
+                byte_count += len(chunk)
+        shutil.copystat(src_path, tmp_path)
+        os.replace(tmp_path, dest_path)
+    except OSError:
+        # Listing hides temp files, so purge would never clean this one up.
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass # Never created, or still locked. Original error matters more.
+        raise
+    return byte_count, hasher.hexdigest()
+
+
+def _same_stat(stat_a, stat_b):
+    return stat_a[0] == stat_b[0] and abs(stat_a[1] - stat_b[1]) <= MTIME_TOLERANCE_NS
+
+
+def plan_sync(src_files, dest_files, state_files):
+    """Returns (to_copy [rel_path], to_check [rel_path]).
+    to_copy: missing from dest or different size.
+    to_check: same size but different mtime. If content hash still matches
+        last sync's (per state), only dest's mtime needs updating.
+    """
+    to_copy = []
+    to_check = []
+    for rel_path, src_stat in sorted(src_files.items()):
+        dest_stat = dest_files.get(rel_path)
+        if dest_stat is not None and _same_stat(src_stat, dest_stat):
+            continue
+        state_entry = state_files.get(rel_path)
+        if (dest_stat is not None and state_entry is not None and state_entry.get("hash")
+                            and src_stat[0] == dest_stat[0] == state_entry["size"]
+                            and _same_stat(dest_stat, (state_entry["size"], state_entry["mtime_ns"]))):
+            to_check.append(rel_path)
+        else:
+            to_copy.append(rel_path)
+    return to_copy, to_check
+
+
+def sync_tree(src, dest, multilevel=True, purge=False, silent=False,
+                                        state_path=None, workers=SYNC_WORKERS):
+    """Makes dest match src, like robocopy/rsync:
+        multilevel: include subdirs (otherwise only files directly in src).
+        purge: delete files (and dirs) in dest that aren't in src.
+        silent: no progress display or summary.
+    state_path (JSON) records each synced file's size, mtime, and content hash,
+    so a file whose mtime changed but content didn't is only re-stamped in dest.
+    Returns dict of counts, bytes, elapsed time, and list of per-file errors.
+    """
+    if not os.path.exists(src):
+        raise Exception("Can't find src dir '%s'" % src)
+    if not os.path.exists(dest):
+        raise Exception("Can't find dest dir '%s'" % dest)
+
+    start_time = time.monotonic()
+    state_files = load_state(state_path)
+    results = {"copied": 0, "copied_bytes": 0, "restamped": 0, "deleted": 0,
+               "unchanged": 0, "errors": []}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        src_files, src_dirs = list_tree(src, executor, multilevel)
+        dest_files, dest_dirs = list_tree(dest, executor, multilevel)
+
+        to_copy, to_check = plan_sync(src_files, dest_files, state_files)
+        results["unchanged"] = len(src_files) - len(to_copy) - len(to_check)
+        new_state = {rel_path: entry for rel_path, entry in state_files.items()
+                                                        if rel_path in src_files}
+
+        def src_path(rel_path):
+            return os.path.join(src, *rel_path.split("/"))
+
+        def dest_path(rel_path):
+            return os.path.join(dest, *rel_path.split("/"))
+
+        # Re-hash same-size files whose mtime moved. Copy only if content changed.
+        check_futures = {executor.submit(hash_path, src_path(rel_path)): rel_path
+                                                            for rel_path in to_check}
+        for future in concurrent.futures.as_completed(check_futures):
+            rel_path = check_futures[future]
+            try:
+                content_hash = future.result()
+            except OSError as exception_text:
+                results["errors"].append("%s: %s" % (rel_path, exception_text))
+                continue
+            if content_hash == state_files[rel_path]["hash"]:
+                mtime_ns = src_files[rel_path][1]
+                try:
+                    os.utime(dest_path(rel_path), ns=(mtime_ns, mtime_ns))
+                except OSError as exception_text:
+                    results["errors"].append("%s: %s" % (rel_path, exception_text))
+                    continue
+                new_state[rel_path] = {"size": src_files[rel_path][0], "mtime_ns": mtime_ns,
+                                                                    "hash": content_hash}
+                results["restamped"] += 1
+            else:
+                to_copy.append(rel_path)
+
+        for rel_dir in sorted(src_dirs - dest_dirs):
+            os.makedirs(dest_path(rel_dir), exist_ok=True)
+
+        total_bytes = sum(src_files[rel_path][0] for rel_path in to_copy)
+        copy_futures = {executor.submit(copy_file, src_path(rel_path), dest_path(rel_path)): rel_path
+                                                                    for rel_path in to_copy}
+        with tqdm(total=total_bytes, unit="B", unit_scale=True, disable=silent or not to_copy,
+                                                                colour="#05e4ab") as pbar:
+            for future in concurrent.futures.as_completed(copy_futures):
+                rel_path = copy_futures[future]
+                try:
+                    byte_count, content_hash = future.result()
+                except OSError as exception_text:
+                    results["errors"].append("%s: %s" % (rel_path, exception_text))
+                    continue
+                new_state[rel_path] = {"size": byte_count, "mtime_ns": src_files[rel_path][1],
+                                                                        "hash": content_hash}
+                results["copied"] += 1
+                results["copied_bytes"] += byte_count
+                pbar.update(byte_count)
+
+    if purge:
+        for rel_path in sorted(set(dest_files) - set(src_files)):
+            try:
+                os.remove(dest_path(rel_path))
+            except OSError as exception_text:
+                results["errors"].append("%s: %s" % (rel_path, exception_text))
+            else:
+                results["deleted"] += 1
+        # Deepest first so parents are empty by the time they're removed.
+        for rel_dir in sorted(dest_dirs - src_dirs, key=len, reverse=True):
+            try:
+                os.rmdir(dest_path(rel_dir))
+            except OSError as exception_text:
+                results["errors"].append("%s: %s" % (rel_dir, exception_text))
+
+    if state_path is not None:
+        save_state(state_path, src, dest, new_state)
+
+    results["elapsed"] = time.monotonic() - start_time
+    if not silent:
+        print_summary(results, dest)
+    return results
+
+
+def print_summary(results, dest):
+    elapsed = max(results["elapsed"], 1e-6)
+    print(Fore.MAGENTA + "Sync to '%s': %d copied (%.1f MB), %d re-stamped, %d deleted, "
+            "%d unchanged in %.1f s (%.1f files/s, %.2f MB/s)"
+            % (os.path.basename(os.path.normpath(dest)), results["copied"],
+                results["copied_bytes"] / 1e6, results["restamped"], results["deleted"],
+                results["unchanged"], results["elapsed"], results["copied"] / elapsed,
+                results["copied_bytes"] / 1e6 / elapsed) + Style.RESET_ALL)
+    if results["errors"]:
+        print(Fore.RED + Style.BRIGHT + "%d error(s):\n\t%s" % (len(results["errors"]),
+                                "\n\t".join(results["errors"])) + Style.RESET_ALL)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally sync one dir "
+                                                "to another (robocopy/rsync-style).")
+    parser.add_argument("src", help="Specify source dir.", type=str)
+    parser.add_argument("dest", help="Specify destination dir.", type=str)
+    parser.add_argument("--single-level", help="Only sync files directly in src.", action="store_true")
+    parser.add_argument("--purge", help="Delete files in dest not in src.", action="store_true")
+    parser.add_argument("--state", help="Specify state file path.", type=str)
+    parser.add_argument("-w", "--workers", help="Threads for listing/copying.",
+                                                    type=int, default=SYNC_WORKERS)
+    args = parser.parse_args()
+
+    sync_tree(args.src, args.dest, multilevel=not args.single_level, purge=args.purge,
+                                        state_path=args.state, workers=args.workers)
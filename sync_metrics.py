@@ -0,0 +1,262 @@
+import os
+import re
+import json
+import time
+import argparse
+import subprocess
+import collections
+import urllib.parse
+from datetime import datetime
+
+from tqdm import tqdm
+from colorama import Style, Fore
+
+
+METRICS_FILENAME = "sync_metrics.jsonl" # One JSON record per sync run, appended.
+OUTPUT_TAIL = 20 # Unparsed output lines kept per run to show on failure.
+
+# rsync --info=progress2 (w/ --no-h):  "  1234567  45%  12.34MB/s  0:00:05 (xfr#3, to-chk=10/20)"
+RSYNC_PROGRESS_REGEX = re.compile(r"^\s*([\d,]+)\s+(\d+)%\s+\S+\s+\d+:\d{2}:\d{2}"
+                                  r"(?:\s+\(xfr#(\d+), (?:ir|to)-chk=(\d+)/(\d+)\))?")
+RSYNC_STATS_REGEXES = {
+    "files_total": re.compile(r"^Number of files: ([\d,]+)"),
+    "files_done": re.compile(r"^Number of regular files transferred: ([\d,]+)"),
+    "bytes_total": re.compile(r"^Total file size: ([\d,]+) bytes"),
+    "bytes_done": re.compile(r"^Total transferred file size: ([\d,]+) bytes"),
+}
+
+# robocopy w/ /BYTES. Summary table columns: Total, Copied, Skipped, Mismatch, FAILED, Extras
+ROBOCOPY_SUMMARY_REGEX = re.compile(r"^\s*(Files|Bytes)\s*:\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)")
+ROBOCOPY_FILE_REGEX = re.compile(r"^\s*(New File|Newer|Older|Changed|Tweaked)\s+(\d+)\s")
+
+AZCOPY_PROGRESS_REGEX = re.compile(r"([\d.]+) %, (\d+) Done, (\d+) Failed, (\d+) Pending, "
+                                                        r"(\d+) Skipped, (\d+) Total")
+AZCOPY_SUMMARY_REGEXES = {
+    "files_total": re.compile(r"^Total Number of (?:Copy )?Transfers: (\d+)"),
+    "files_done": re.compile(r"^Number of (?:Copy )?Transfers Completed: (\d+)"),
+    "files_failed": re.compile(r"^Number of (?:Copy )?Transfers Failed: (\d+)"),
+    "bytes_done": re.compile(r"^Total Number of Bytes Transferred: (\d+)"),
+}
+
+
+def _to_int(number_str):
+    return int(number_str.replace(",", ""))
+
+
+def redact(path):
+    """Drops query (SAS token) from blob URLs so credentials never reach the log."""
+    if not path.startswith(("http://", "https://")):
+        return path
+    parsed_url = urllib.parse.urlsplit(path)
+    return urllib.parse.urlunsplit((parsed_url.scheme, parsed_url.netloc, parsed_url.path, "", ""))
+
+
+class SyncMetrics(object):
+    """Progress and outcome of one sync run (rsync, robocopy, azcopy, or built-in)."""
+    def __init__(self, tool, src, dest):
+        self.tool = tool
+        self.src = redact(src)
+        self.dest = redact(dest)
+        # robocopy exit codes < 8 all mean success.
+        self.success_codes = range(8) if tool == "robocopy" else (0,)
+        self.started = datetime.now().strftime("%Y-%m-%dT%H%M%S")
+        self.start_time = time.monotonic()
+        self.percent = 0.0
+        self.files_done = 0
+        self.files_failed = 0
+        self.files_total = None
+        self.bytes_done = 0
+        self.bytes_total = None
+        self.returncode = None
+        self.elapsed = None
+        self.output_tail = collections.deque(maxlen=OUTPUT_TAIL)
+
+    def succeeded(self):
+        return self.returncode in self.success_codes
+
+    def finish(self, returncode):
+        self.returncode = returncode
+        self.elapsed = time.monotonic() - self.start_time
+        if self.succeeded():
+            self.percent = 100.0
+
+    def as_record(self):
+        elapsed = self.elapsed or 0
+        return {"started": self.started, "tool": self.tool, "src": self.src, "dest": self.dest,
+                "elapsed_s": round(elapsed, 2), "returncode": self.returncode,
+                "success": self.succeeded(),
+                "files_done": self.files_done, "files_failed": self.files_failed,
+                "files_total": self.files_total, "bytes_done": self.bytes_done,
+                "bytes_total": self.bytes_total,
+                "files_per_s": round(self.files_done / elapsed, 2) if elapsed else None,
+                "mb_per_s": round(self.bytes_done / 1e6 / elapsed, 3) if elapsed else None}
+
+    def __repr__(self):
+        return "SyncMetrics %s '%s' -> '%s'" % (self.tool, self.src, self.dest)
+
+
+def parse_rsync_line(metrics, line):
+    """Updates metrics from one line of rsync --info=progress2,stats2 output.
+    Returns True if line was recognized.
+    """
+    progress_match = RSYNC_PROGRESS_REGEX.match(line)
+    if progress_match:
+        metrics.bytes_done = _to_int(progress_match.group(1))
+        metrics.percent = float(progress_match.group(2))
+        if progress_match.group(3):
+            metrics.files_done = int(progress_match.group(3))
+            metrics.files_total = int(progress_match.group(5))
+        return True
+    for field, stats_regex in RSYNC_STATS_REGEXES.items():
+        stats_match = stats_regex.match(line)
+        if stats_match:
+            setattr(metrics, field, _to_int(stats_match.group(1)))
+            return True
+    return False
+
+
+def parse_robocopy_line(metrics, line):
+    """Updates metrics from one line of robocopy output (run w/ /BYTES).
+    Per-file lines give running totals. Job summary gives final ones.
+    """
+    summary_match = ROBOCOPY_SUMMARY_REGEX.match(line)
+    if summary_match:
+        total, copied, failed = (int(summary_match.group(2)), int(summary_match.group(3)),
+                                                            int(summary_match.group(6)))
+        if summary_match.group(1) == "Files":
+            metrics.files_total, metrics.files_done, metrics.files_failed = total, copied, failed
+        else:
+            metrics.bytes_total, metrics.bytes_done = total, copied
+        return True
+    file_match = ROBOCOPY_FILE_REGEX.match(line)
+    if file_match:
+        metrics.files_done += 1
+        metrics.bytes_done += int(file_match.group(2))
+        return True
+    return False
+
+
+def parse_azcopy_line(metrics, line):
+    """Updates metrics from one line of azcopy job output."""
+    progress_match = AZCOPY_PROGRESS_REGEX.search(line)
+    if progress_match:
+        metrics.percent = float(progress_match.group(1))
+        metrics.files_done = int(progress_match.group(2))
+        metrics.files_failed = int(progress_match.group(3))
+        metrics.files_total = int(progress_match.group(6))
+        return True
+    for field, summary_regex in AZCOPY_SUMMARY_REGEXES.items():
+        summary_match = summary_regex.match(line)
+        if summary_match:
+            setattr(metrics, field, int(summary_match.group(1)))
+            return True
+    return False
+
+
+LINE_PARSERS = {"rsync": parse_rsync_line, "robocopy": parse_robocopy_line,
+                "azcopy": parse_azcopy_line}
+
+
+def run_and_capture(command, metrics, on_progress=None):
+    """Runs command, streaming its output through the parser for metrics.tool.
+    Unrecognized lines kept in metrics.output_tail. Returns return code.
+    """
+    parse_line = LINE_PARSERS[metrics.tool]
+    try:
+        # Text mode treats \r-terminated progress updates as lines.
+        Proc = subprocess.Popen(command, stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, text=True, errors="replace")
+    except OSError as exception_text:
+        # e.g. tool not installed
+        metrics.output_tail.append(str(exception_text))
+        metrics.finish(-1)
+        return metrics.returncode
+
+    for line in Proc.stdout:
+        line = line.rstrip()
+        if not line.strip():
+            continue
+        if parse_line(metrics, line):
+            if on_progress:
+                on_progress()
+        else:
+            metrics.output_tail.append(line.strip())
+    metrics.finish(Proc.wait())
+    if on_progress:
+        on_progress()
+    return metrics.returncode
+
+
+def progress_postfix(metrics):
+    postfix = "%d file(s)" % metrics.files_done
+    if metrics.bytes_done:
+        postfix += ", %.1f MB" % (metrics.bytes_done / 1e6)
+    return postfix
+
+
+def run_with_progress(command, metrics, desc=None, silent=False):
+    """run_and_capture() w/ one live progress bar (unless silent). Returns return code."""
+    with tqdm(total=100, desc=desc, disable=silent, colour="#05e4ab",
+                bar_format="{l_bar}{bar}| {elapsed} {postfix}") as pbar:
+        def on_progress():
+            pbar.n = round(metrics.percent, 1)
+            pbar.set_postfix_str(progress_postfix(metrics))
+        return run_and_capture(command, metrics, on_progress)
+
+
+def append_record(log_path, metrics):
+    """Appends metrics (SyncMetrics or record dict) to JSON-lines log."""
+    log_dir = os.path.dirname(log_path)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir, exist_ok=True)
+    record = metrics.as_record() if isinstance(metrics, SyncMetrics) else metrics
+    with open(log_path, "a") as log_file:
+        log_file.write(json.dumps(record) + "\n")
+
+
+def load_records(log_path, since=None):
+    """Returns logged records, optionally only those started on/after since (YYYYMMDD)."""
+    if not os.path.exists(log_path):
+        return []
+    records = []
+    with open(log_path, "r") as log_file:
+        for line in log_file:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if since is None or record["started"].replace("-", "")[:8] >= since:
+                records.append(record)
+    return records
+
+
+def print_report(records):
+    """Prints per-destination totals, slowest first, to show which sync is the bottleneck."""
+    by_dest = collections.defaultdict(list)
+    for record in records:
+        by_dest[(record["tool"], record["dest"])].append(record)
+
+    rows = []
+    for (tool, dest), dest_records in by_dest.items():
+        total_elapsed = sum(record["elapsed_s"] for record in dest_records)
+        total_bytes = sum(record["bytes_done"] or 0 for record in dest_records)
+        rows.append((total_elapsed, tool, dest, len(dest_records),
+                     sum(record["files_done"] or 0 for record in dest_records), total_bytes,
+                     sum(1 for record in dest_records if not record["success"])))
+    for total_elapsed, tool, dest, run_count, file_count, total_bytes, fail_count in sorted(rows, reverse=True):
+        print(Fore.MAGENTA + "%-8s %s\n\t%d run(s), %.0f s total (%.1f s avg), %d file(s), "
+                "%.1f MB (%.2f MB/s), %d failed" % (tool, dest, run_count, total_elapsed,
+                total_elapsed / run_count, file_count, total_bytes / 1e6,
+                total_bytes / 1e6 / total_elapsed if total_elapsed else 0, fail_count)
+                                                                    + Style.RESET_ALL)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize logged sync run metrics.")
+    parser.add_argument("-l", "--log", help="Specify metrics log path.", type=str,
+            default=os.path.join(os.path.expanduser("~"), ".ctrl_export_preprocessor",
+                                                                    METRICS_FILENAME))
+    parser.add_argument("-s", "--since", help="Only include runs on/after this "
+                                                "date (YYYYMMDD).", type=str)
+    args = parser.parse_args()
+
+    print_report(load_records(args.log, args.since))
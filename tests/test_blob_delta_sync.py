@@ -0,0 +1,141 @@
+import os
+import types
+
+import pytest
+
+import blob_delta_sync
+
+
+class FakeContainer(object):
+    """Stands in for azure ContainerClient. Keeps blobs in a dict."""
+    def __init__(self, blobs=None):
+        self.blobs = dict(blobs or {}) # name: (content, etag)
+        self.etag_count = 0
+
+    def upload_blob(self, name, file_obj, overwrite=False):
+        self.etag_count += 1
+        self.blobs[name] = (file_obj.read(), "etag%d" % self.etag_count)
+        return {"etag": self.blobs[name][1]}
+
+    def delete_blob(self, name):
+        if name not in self.blobs:
+            raise blob_delta_sync.ResourceNotFoundError("gone")
+        del self.blobs[name]
+
+    def list_blobs(self, name_starts_with=None):
+        return [types.SimpleNamespace(name=name, etag=etag) for name, (_, etag) in self.blobs.items()
+                                    if name.startswith(name_starts_with or "")]
+
+
+@pytest.mark.parametrize("dest_url, expected", [
+    ("https://acct.blob.core.windows.net/ctrl?sv=1&sig=x",
+        ("https://acct.blob.core.windows.net/ctrl?sv=1&sig=x", "")),
+    ("https://acct.blob.core.windows.net/ctrl/Converted/?sv=1",
+        ("https://acct.blob.core.windows.net/ctrl?sv=1", "Converted/")),
+    ("https://acct.blob.core.windows.net/ctrl/a/b",
+        ("https://acct.blob.core.windows.net/ctrl", "a/b/")),
+    ("http://127.0.0.1:10000/devstoreaccount1/ctrl/dir?sig=x",
+        ("http://127.0.0.1:10000/devstoreaccount1/ctrl?sig=x", "dir/")),
+])
+def test_split_blob_url(dest_url, expected):
+    assert blob_delta_sync.split_blob_url(dest_url) == expected
+
+
+def test_manifest_dest_key_drops_sas():
+    assert blob_delta_sync.manifest_dest_key("https://acct.blob.core.windows.net/ctrl/?sig=x") == \
+                                                        "https://acct.blob.core.windows.net/ctrl"
+    assert blob_delta_sync.manifest_dest_key(connection_string="AccountName=dev;AccountKey=k",
+                                                        container_name="ctrl") == "dev/ctrl"
+
+
+def stat(size, mtime_ns):
+    return types.SimpleNamespace(st_size=size, st_mtime_ns=mtime_ns)
+
+
+def entry(size, mtime_ns, content_hash="hash", etag="etag"):
+    return {"size": size, "mtime_ns": mtime_ns, "content_hash": content_hash, "etag": etag}
+
+
+def test_plan_delta(tmp_path):
+    (tmp_path / "touched.txt").write_bytes(b"same")
+    (tmp_path / "edited.txt").write_bytes(b"new!")
+    local_files = {"new.txt": stat(1, 1), "same.txt": stat(4, 5), "grown.txt": stat(9, 5),
+                   "touched.txt": stat(4, 6), "edited.txt": stat(4, 6)}
+    uploaded_entries = {"same.txt": entry(4, 5), "grown.txt": entry(4, 5),
+                        "touched.txt": entry(4, 5, blob_delta_sync.hash_file(str(tmp_path / "touched.txt"))),
+                        "edited.txt": entry(4, 5, "old hash"), "removed.txt": entry(1, 1)}
+
+    to_upload, to_delete, touched = blob_delta_sync.plan_delta(local_files, uploaded_entries, str(tmp_path))
+    assert to_upload == ["edited.txt", "grown.txt", "new.txt"]
+    assert to_delete == ["removed.txt"]
+    assert touched == {"touched.txt": 6}
+
+
+def test_plan_delta_reconcile():
+    local_files = {"kept.txt": stat(4, 5), "replaced.txt": stat(4, 5)}
+    uploaded_entries = {"kept.txt": entry(4, 5, etag="e1"), "replaced.txt": entry(4, 5, etag="e2")}
+    reconcile_etags = {"kept.txt": "e1", "replaced.txt": "changed", "stray.txt": "e3"}
+
+    to_upload, to_delete, _ = blob_delta_sync.plan_delta(local_files, uploaded_entries, "", reconcile_etags)
+    assert to_upload == ["replaced.txt"]
+    assert to_delete == ["stray.txt"]
+
+
+def test_delta_sync_uploads_only_changes(tmp_path):
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    (src / "tmp").mkdir()
+    (src / "a.txt").write_bytes(b"a")
+    (src / "sub" / "b.txt").write_bytes(b"b")
+    (src / "tmp" / "skipped.txt").write_bytes(b"x")
+    Container = FakeContainer()
+
+    with blob_delta_sync.UploadManifest(str(tmp_path / "upload.sqlite3")) as Manifest:
+        results = blob_delta_sync.delta_sync(str(src), Container, "Converted/", Manifest, "dest")
+        assert (results["uploaded"], results["deleted"], results["errors"]) == (2, 0, [])
+        assert sorted(Container.blobs) == ["Converted/a.txt", "Converted/sub/b.txt"]
+
+        results = blob_delta_sync.delta_sync(str(src), Container, "Converted/", Manifest, "dest")
+        assert (results["uploaded"], results["unchanged"]) == (0, 2)
+
+        os.remove(src / "a.txt")
+        (src / "sub" / "b.txt").write_bytes(b"bb")
+        results = blob_delta_sync.delta_sync(str(src), Container, "Converted/", Manifest, "dest")
+        assert (results["uploaded"], results["deleted"]) == (1, 1)
+        assert Container.blobs == {"Converted/sub/b.txt": (b"bb", "etag3")}
+        assert Manifest.get_entries("dest")["sub/b.txt"]["etag"] == "etag3"
+
+
+def test_delta_sync_records_stat_at_upload(tmp_path, monkeypatch):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.txt").write_bytes(b"a")
+    real_list_local_files = blob_delta_sync.list_local_files
+
+    def list_then_edit(src_dir):
+        # File changes after planning's listing but before upload.
+        local_files = real_list_local_files(src_dir)
+        (src / "a.txt").write_bytes(b"edited")
+        return local_files
+    monkeypatch.setattr(blob_delta_sync, "list_local_files", list_then_edit)
+
+    with blob_delta_sync.UploadManifest(str(tmp_path / "upload.sqlite3")) as Manifest:
+        blob_delta_sync.delta_sync(str(src), FakeContainer(), "", Manifest, "dest")
+        recorded = Manifest.get_entries("dest")["a.txt"]
+    stat_result = os.stat(src / "a.txt")
+    assert (recorded["size"], recorded["mtime_ns"]) == (stat_result.st_size, stat_result.st_mtime_ns)
+    assert recorded["content_hash"] == blob_delta_sync.hash_file(str(src / "a.txt"))
+
+
+def test_delta_sync_no_delete_stops_tracking(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.txt").write_bytes(b"a")
+    Container = FakeContainer()
+    with blob_delta_sync.UploadManifest(str(tmp_path / "upload.sqlite3")) as Manifest:
+        blob_delta_sync.delta_sync(str(src), Container, "", Manifest, "dest")
+        os.remove(src / "a.txt")
+        results = blob_delta_sync.delta_sync(str(src), Container, "", Manifest, "dest", delete=False)
+        assert results["deleted"] == 0
+        assert "a.txt" in Container.blobs
+        assert Manifest.get_entries("dest") == {}
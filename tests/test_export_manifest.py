@@ -0,0 +1,128 @@
+import os
+
+import export_manifest as manifest
+
+
+def make_files(tmp_path, content=b"source"):
+    source_path = tmp_path / "20240105_sn3000001.cdf"
+    source_path.write_bytes(content)
+    export_path = tmp_path / "20240105_sn3000001_CDF.xlsx"
+    export_path.write_bytes(b"export")
+    return str(source_path), str(export_path)
+
+
+def test_new_source(tmp_path):
+    source_path, _ = make_files(tmp_path)
+    with manifest.ExportManifest(str(tmp_path / "tmp" / "m.sqlite3")) as Manifest:
+        assert Manifest.source_status(source_path) == manifest.SOURCE_NEW
+        assert Manifest.get_entry(source_path) is None
+
+
+def test_recorded_source_unchanged(tmp_path):
+    source_path, export_path = make_files(tmp_path)
+    with manifest.ExportManifest(str(tmp_path / "m.sqlite3")) as Manifest:
+        Manifest.record(source_path, export_path, vehicle_sn="3000001", sw_pn="123456G01", cprj_rev="A")
+        assert Manifest.source_status(source_path) == manifest.SOURCE_UNCHANGED
+        entry = Manifest.get_entry(source_path)
+        assert entry["vehicle_sn"] == "3000001"
+        assert entry["content_hash"] == manifest.hash_file(source_path)
+
+
+def test_touched_source_unchanged_and_mtime_refreshed(tmp_path):
+    source_path, export_path = make_files(tmp_path)
+    with manifest.ExportManifest(str(tmp_path / "m.sqlite3")) as Manifest:
+        Manifest.record(source_path, export_path)
+        stat_result = os.stat(source_path)
+        os.utime(source_path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10**9))
+        assert Manifest.source_status(source_path) == manifest.SOURCE_UNCHANGED
+        assert Manifest.get_entry(source_path)["mtime_ns"] == stat_result.st_mtime_ns + 10**9
+
+
+def test_changed_source(tmp_path):
+    source_path, export_path = make_files(tmp_path)
+    with manifest.ExportManifest(str(tmp_path / "m.sqlite3")) as Manifest:
+        Manifest.record(source_path, export_path)
+        with open(source_path, "wb") as source_file:
+            source_file.write(b"SOURCE") # Same size, new content.
+        assert Manifest.source_status(source_path) == manifest.SOURCE_CHANGED
+
+
+def test_missing_export_counts_as_changed(tmp_path):
+    source_path, export_path = make_files(tmp_path)
+    with manifest.ExportManifest(str(tmp_path / "m.sqlite3")) as Manifest:
+        Manifest.record(source_path, export_path)
+        os.remove(export_path)
+        assert Manifest.source_status(source_path) == manifest.SOURCE_CHANGED
+
+
+def test_forget(tmp_path):
+    source_path, export_path = make_files(tmp_path)
+    with manifest.ExportManifest(str(tmp_path / "m.sqlite3")) as Manifest:
+        Manifest.record(source_path, export_path)
+        Manifest.forget(source_path)
+        assert Manifest.source_status(source_path) == manifest.SOURCE_NEW
+
+
+def test_update_vehicle_keeps_newest_file(tmp_path):
+    with manifest.ExportManifest(str(tmp_path / "m.sqlite3")) as Manifest:
+        assert Manifest.update_vehicle("3000001", "123456G01", "A", "20240105", "a.cdf")
+        assert not Manifest.update_vehicle("3000001", "123456G00", "Z", "20231201", "old.cdf")
+        assert not Manifest.update_vehicle("3000001", "123456G00", "Z", None, "undated.cdf")
+        assert Manifest.get_vehicle("3000001")["sw_pn"] == "123456G01"
+
+        assert Manifest.update_vehicle("3000001", "123456G02", "B", "20240105", "a2.cdf") # Same date
+        assert Manifest.update_vehicle("3000001", "123456G03", "C", "20240301", "b.cdf")
+        assert Manifest.get_vehicle("3000001")["cprj_rev"] == "C"
+        assert Manifest.vehicle_cprj_revs() == {"3000001": "C"}
+        assert Manifest.get_vehicle("5000002") is None
+
+
+def test_is_older(tmp_path):
+    with manifest.ExportManifest(str(tmp_path / "m.sqlite3")) as Manifest:
+        assert not Manifest._is_older("3000001", "20240105") # No entry yet.
+        Manifest.update_vehicle("3000001", "123456G01", "A", "20240105", "a.cdf")
+        assert Manifest._is_older("3000001", "20240104")
+        assert Manifest._is_older("3000001", None)
+        assert not Manifest._is_older("3000001", "20240105")
+        assert not Manifest._is_older("3000001", "20240106")
+
+        Manifest.update_vehicle("5000002", "123456G01", "A", None, "undated.cdf")
+        assert not Manifest._is_older("5000002", None) # Undated entry never blocks.
+
+
+def test_invalidate_vehicle(tmp_path):
+    with manifest.ExportManifest(str(tmp_path / "m.sqlite3")) as Manifest:
+        Manifest.update_vehicle("3000001", "123456G01", "A", "20240105", "a.cdf")
+        assert not Manifest.invalidate_vehicle("3000001", "20240101") # Older file: keep entry.
+        assert Manifest.invalidate_vehicle("3000001", "20240201")
+        assert Manifest.get_vehicle("3000001") is None
+        assert not Manifest.invalidate_vehicle("3000001", "20240201")
+
+
+def test_vehicles_backfilled_once_from_old_manifest(tmp_path):
+    manifest_path = str(tmp_path / "m.sqlite3")
+    source_a, export_a = make_files(tmp_path)
+    source_b = tmp_path / "20240301_sn3000001.cdf"
+    source_b.write_bytes(b"newer")
+    with manifest.ExportManifest(manifest_path) as Manifest:
+        Manifest.record(source_a, export_a, vehicle_sn="3000001", sw_pn="123456G01", cprj_rev="A")
+        Manifest.record(str(source_b), export_a, vehicle_sn="3000001", sw_pn="123456G02", cprj_rev="B")
+        source_c = tmp_path / "20240201_sn5000002.cdf"
+        source_c.write_bytes(b"no SW")
+        Manifest.record(str(source_c), export_a, vehicle_sn="5000002") # No SW found.
+        # Simulate manifest from before vehicles table existed.
+        with Manifest.connection:
+            Manifest.connection.execute("DELETE FROM vehicles")
+            Manifest.connection.execute("PRAGMA user_version = 0")
+
+    with manifest.ExportManifest(manifest_path) as Manifest:
+        vehicle = Manifest.get_vehicle("3000001")
+        assert (vehicle["sw_pn"], vehicle["file_date"]) == ("123456G02", "20240301")
+        assert Manifest.get_vehicle("5000002") is None
+        Manifest.invalidate_vehicle("3000001", "20240401")
+
+    # Reopening mustn't bring back invalidated entry.
+    with manifest.ExportManifest(manifest_path) as Manifest:
+        assert Manifest.get_vehicle("3000001") is None
+        assert Manifest.connection.execute("PRAGMA user_version").fetchone()[0] == \
+                                                        manifest.VEHICLES_SCHEMA_VERSION
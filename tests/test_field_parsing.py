@@ -0,0 +1,47 @@
+import pytest
+
+import field_parsing as parsing
+
+
+@pytest.mark.parametrize("item_name, expected", [
+    ("20240105_sn3000001", ("3000001", "20240105")),
+    ("sn5123456 2023-06-01 20230601", ("5123456", "20230601")),
+    ("8000001_2024023", ("8000001", None)),         # Too short for a datestamp.
+    ("20240105_20240106_sn3000001", ("3000001", None)), # Ambiguous date.
+    ("sn3000001_sn5000002_20240105", (None, None)),  # Ambiguous S/N.
+    ("20243000001", ("3000001", None)),             # S/N digits can't double as a date.
+    ("export", (None, None)),
+])
+def test_parse_filename_sn_and_date(item_name, expected):
+    assert parsing.parse_filename_sn_and_date(item_name) == expected
+
+
+@pytest.mark.parametrize("regex_pattern, string_to_search, date_target, expected", [
+    (parsing.SN_REGEX, "sn3000001", False, "3000001"),
+    (parsing.SN_REGEX, "3000001 and 5000002", False, None),  # Ambiguous.
+    (parsing.SN_REGEX, "1234567", False, None),
+    (parsing.DATE_REGEX_1, "report 20240229", True, "20240229"), # Leap day.
+    (parsing.DATE_REGEX_1, "report 20231131", True, None),   # Passes regex but not a real date.
+    (parsing.DATE_REGEX_1, "report 20231131", False, "20231131"),
+    (parsing.SW_PN_REGEX, "Project 12345678g02", False, "12345678g02"), # Case-insensitive.
+    (parsing.SW_PN_REGEX, "123456.01", False, None),
+    (parsing.CDF_SW_PN_REGEX, "123456.01", False, "123456.01"),
+])
+def test_find_single(regex_pattern, string_to_search, date_target, expected):
+    assert parsing.find_single(regex_pattern, string_to_search, date_target) == expected
+
+
+def test_find_candidates_date_target():
+    assert parsing.find_candidates(parsing.DATE_REGEX_1, "20231131 20231130") == ["20231131", "20231130"]
+    assert parsing.find_candidates(parsing.DATE_REGEX_1, "20231131 20231130", date_target=True) == ["20231130"]
+
+
+@pytest.mark.parametrize("date_str, expected", [
+    ("20240105", True), ("2024-01-05", True), ("01052024", True), ("13052024", False), ("20241305", False),
+])
+def test_is_valid_date(date_str, expected):
+    assert parsing.is_valid_date(date_str) == expected
+
+
+def test_patterns_compiled_once():
+    assert parsing.compiled(parsing.SN_REGEX) is parsing.compiled(parsing.SN_REGEX)
@@ -0,0 +1,91 @@
+import inspect
+
+import openpyxl
+import pytest
+
+import fix_cpf_export_format as fixcpf
+
+
+def write_exports(dir_path, count=3):
+    for export_num in range(count):
+        (dir_path / ("export%d.XLS" % export_num)).write_text(
+                "Group\tParameter\tValue\nVehicle\tVehicle Serial Number\t300000%d\n"
+                "Group 1\tParameter 1\t1.5\n" % export_num)
+
+
+def read_aggregate(dir_path):
+    aggregate_paths = list(dir_path.glob("CPF_exports_*.xlsx"))
+    assert len(aggregate_paths) == 1
+    workbook = openpyxl.load_workbook(aggregate_paths[0], read_only=True)
+    try:
+        return {worksheet.title: list(worksheet.iter_rows(values_only=True)) for worksheet in workbook}
+    finally:
+        workbook.close()
+
+
+def test_iter_export_rows_streams(tmp_path):
+    write_exports(tmp_path, count=1)
+    rows = fixcpf.iter_export_rows(str(tmp_path / "export0.XLS"))
+    assert inspect.isgenerator(rows)
+    assert list(rows) == fixcpf.read_export_rows(str(tmp_path / "export0.XLS"))
+
+
+def test_iter_export_rows_rejects_unknown_type(tmp_path):
+    (tmp_path / "bad.XLS").write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(64))
+    with pytest.raises(Exception, match="Filetype not recognized"):
+        list(fixcpf.iter_export_rows(str(tmp_path / "bad.XLS")))
+
+
+def test_serial_aggregate_doesnt_materialize_rows(tmp_path, monkeypatch):
+    write_exports(tmp_path)
+
+    def fail(cpf_export_path):
+        raise AssertionError("serial path should stream rows")
+    monkeypatch.setattr(fixcpf, "read_export_rows", fail)
+    fixcpf.convert_and_aggregate_exports(str(tmp_path), jobs=1)
+
+    sheets = read_aggregate(tmp_path)
+    assert list(sheets) == ["export0", "export1", "export2"]
+    assert sheets["export1"][1] == ("Vehicle", "Vehicle Serial Number", 3000001)
+    assert sheets["export1"][2] == ("Group 1", "Parameter 1", 1.5)
+
+
+def test_parallel_aggregate_matches_serial(tmp_path):
+    serial_dir = tmp_path / "serial"
+    parallel_dir = tmp_path / "parallel"
+    for dir_path in (serial_dir, parallel_dir):
+        dir_path.mkdir()
+        write_exports(dir_path, count=5)
+
+    fixcpf.convert_and_aggregate_exports(str(serial_dir), jobs=1)
+    fixcpf.convert_and_aggregate_exports(str(parallel_dir), jobs=2)
+    assert read_aggregate(serial_dir) == read_aggregate(parallel_dir)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("0", 0), ("42", 42), ("-7", -7), ("1.5", 1.5), ("-0.25", -0.25),
+    ("0123", "0123"),           # Leading zero: P/N-like, stays text.
+    ("1.10", "1.10"),           # Trailing decimal zero: version-like, stays text.
+    ("1.", "1."), ("", ""), ("On", "On"),
+    ("1234567890123456", "1234567890123456"), # Past Excel's precision.
+    (3, 3), (None, None),
+])
+def test_typed_cell(value, expected):
+    result = fixcpf.typed_cell(value)
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+def test_combined_export_has_typed_values_and_empty_faults_header(tmp_path):
+    params_path = tmp_path / "params.XLS"
+    params_path.write_text("Group\tParameter\tValue\nGroup 1\tParameter 1\t0123\nGroup 1\tParameter 2\t12\n")
+    combined_path = tmp_path / "combined_cpf.xlsx"
+    fixcpf.combine_param_and_fault_export(str(params_path), None, str(combined_path))
+
+    workbook = openpyxl.load_workbook(combined_path, read_only=True)
+    try:
+        assert list(workbook["Parameters"].iter_rows(values_only=True))[1:] == [
+                        ("Group 1", "Parameter 1", "0123"), ("Group 1", "Parameter 2", 12)]
+        assert list(workbook["Faults"].iter_rows(values_only=True)) == [("Error Text", "Error Description")]
+    finally:
+        workbook.close()
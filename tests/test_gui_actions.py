@@ -0,0 +1,79 @@
+import types
+
+import pytest
+
+import gui_actions
+
+
+def record_successes(runner, script_name, count):
+    for _ in range(count):
+        runner.pending_scripts.append(script_name)
+        runner.record_result(True)
+
+
+def test_streak_shortens_and_failure_resets(tmp_path):
+    runner = gui_actions.ActionScriptRunner(str(tmp_path / "profile.json"))
+    record_successes(runner, "open_cpf", gui_actions.TUNE_STREAK - 1)
+    assert runner.get_mult("open_cpf") == 1.0
+    record_successes(runner, "open_cpf", 1)
+    assert runner.get_mult("open_cpf") == pytest.approx(gui_actions.TUNE_FACTOR)
+
+    runner.pending_scripts.append("open_cpf")
+    runner.record_result(False)
+    assert runner.get_mult("open_cpf") == 1.0
+    # Never tunes back below failing value (w/ margin), capped at fallback.
+    assert runner.profile["open_cpf"]["floor"] == pytest.approx(
+                            min(1.0, gui_actions.TUNE_FACTOR * gui_actions.FLOOR_MARGIN))
+
+
+def test_untimed_result_doesnt_tune(tmp_path):
+    runner = gui_actions.ActionScriptRunner(str(tmp_path / "profile.json"))
+    runner.pending_scripts.append("close_cpf")
+    runner.record_result(None)
+    assert "close_cpf" not in runner.profile
+    assert runner.pending_scripts == []
+
+
+def test_tuned_profile_persists(tmp_path):
+    profile_path = str(tmp_path / "profile.json")
+    record_successes(gui_actions.ActionScriptRunner(profile_path), "open_cdf", gui_actions.TUNE_STREAK)
+    assert gui_actions.ActionScriptRunner(profile_path).get_mult("open_cdf") == pytest.approx(
+                                                                        gui_actions.TUNE_FACTOR)
+
+
+def test_slow_rescales_tuned_profile(tmp_path):
+    profile_path = str(tmp_path / "profile.json")
+    record_successes(gui_actions.ActionScriptRunner(profile_path), "open_cdf", gui_actions.TUNE_STREAK)
+
+    runner = gui_actions.ActionScriptRunner(profile_path, fallback_mult=2)
+    assert runner.get_mult("open_cdf") == pytest.approx(2 * gui_actions.TUNE_FACTOR)
+    runner.save()
+    # Rescaled once, not again on each load.
+    runner = gui_actions.ActionScriptRunner(profile_path, fallback_mult=2)
+    assert runner.get_mult("open_cdf") == pytest.approx(2 * gui_actions.TUNE_FACTOR)
+    assert gui_actions.ActionScriptRunner(profile_path).get_mult("open_cdf") == pytest.approx(
+                                                                        gui_actions.TUNE_FACTOR)
+
+
+def test_no_tune_uses_fallback(tmp_path):
+    runner = gui_actions.ActionScriptRunner(str(tmp_path / "profile.json"), fallback_mult=2, tune=False)
+    runner.profile["open_cpf"] = {"mult": 0.5, "floor": 0.1, "fallback_mult": 2}
+    assert runner.get_mult("open_cpf") == 2
+
+
+def test_run_substitutes_params_and_scales_pauses(tmp_path, monkeypatch):
+    calls = []
+    sleeps = []
+    monkeypatch.setattr(gui_actions, "gui", types.SimpleNamespace(
+                click=lambda *args: calls.append(("click",) + args),
+                hotkey=lambda *args: calls.append(("hotkey",) + args),
+                typewrite=lambda *args: calls.append(("typewrite",) + args),
+                press=lambda *args: calls.append(("press",) + args)), raising=False)
+    monkeypatch.setattr(gui_actions.time, "sleep", sleeps.append)
+
+    runner = gui_actions.ActionScriptRunner(str(tmp_path / "profile.json"), fallback_mult=2, tune=False)
+    runner.run("export_cpf_faults", x=10, y=20, dir_path="C:\\exports", filename="a.XLS")
+    assert calls[0] == ("click", 10, 20)
+    assert ("typewrite", "a.XLS") in calls and ("typewrite", "C:\\exports") in calls
+    assert sleeps == [2 * pause for _, _, pause in gui_actions.ACTION_SCRIPTS["export_cpf_faults"]]
+    assert runner.pending_scripts == ["export_cpf_faults"]
@@ -0,0 +1,74 @@
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+import blob_delta_sync
+import parquet_mirror
+
+
+SOURCE_NAME = "20240105_sn3000001"
+
+
+def write_tsvs(tmp_path, fault_rows):
+    params_path = tmp_path / "params.XLS"
+    params_path.write_text("Group\tParameter\tValue\nVehicle\tVehicle Serial Number\t3000001\n"
+                           "Group 1\tParameter 1\t1.0\n")
+    if fault_rows is None:
+        return str(params_path), None
+    faults_path = tmp_path / "faults.XLS"
+    faults_path.write_text("Error Text\tError Description\n"
+                            + "".join("%s\t%s\n" % fault_row for fault_row in fault_rows))
+    return str(params_path), str(faults_path)
+
+
+def source_files(table_root):
+    return sorted(path.relative_to(table_root).as_posix() for path in table_root.rglob("*.parquet"))
+
+
+def test_mirror_cpf_partitions_and_normalizes(tmp_path):
+    dataset_root = tmp_path / "parquet"
+    params_path, faults_path = write_tsvs(tmp_path, [("Fault 1", "First"), ("Fault 2", "Second")])
+    assert parquet_mirror.mirror_cpf_tsvs(params_path, faults_path, str(dataset_root), SOURCE_NAME,
+                            vehicle_sn="3000001", export_date="20240105", sw_pn="123456G01")
+
+    assert source_files(dataset_root / parquet_mirror.PARAM_TABLE_NAME) == [
+                                "date=20240105/sn=3000001/%s-0.parquet" % SOURCE_NAME]
+    params = pq.read_table(dataset_root / parquet_mirror.PARAM_TABLE_NAME).to_pylist()
+    assert {"variable_name": "Parameter 1", "value": "1.0"}.items() <= params[-1].items()
+    assert all(param["sw_pn"] == "123456G01" for param in params)
+
+    faults = pq.read_table(dataset_root / parquet_mirror.FAULT_TABLE_NAME).to_pylist()
+    assert [fault["error_text"] for fault in faults] == ["Fault 1", "Fault 2"] # Header skipped.
+
+
+def test_remirror_replaces_source_files(tmp_path):
+    dataset_root = tmp_path / "parquet"
+    other_params, other_faults = write_tsvs(tmp_path, [("Fault 9", "Other")])
+    parquet_mirror.mirror_cpf_tsvs(other_params, other_faults, str(dataset_root), "20240105_sn3000002",
+                                        vehicle_sn="3000002", export_date="20240105")
+    params_path, faults_path = write_tsvs(tmp_path, [("Fault 1", "First")])
+    parquet_mirror.mirror_cpf_tsvs(params_path, faults_path, str(dataset_root), SOURCE_NAME,
+                                        vehicle_sn="3000001", export_date="20240105")
+
+    # Fault history since cleared. Old faults file must not linger.
+    params_path, _ = write_tsvs(tmp_path, None)
+    parquet_mirror.mirror_cpf_tsvs(params_path, None, str(dataset_root), SOURCE_NAME,
+                                        vehicle_sn="3000001", export_date="20240105")
+
+    assert source_files(dataset_root / parquet_mirror.FAULT_TABLE_NAME) == [
+                                "date=20240105/sn=3000002/20240105_sn3000002-0.parquet"]
+    assert len(source_files(dataset_root / parquet_mirror.PARAM_TABLE_NAME)) == 2
+
+
+def test_cdf_param_records_without_alias_column():
+    rows = [("Variable Name", "Application Default"), ("user200", 5.0), (None, "skipped")]
+    records = parquet_mirror.cdf_param_records(rows, SOURCE_NAME, "3000001", "20240105")
+    assert records == [{"variable_name": "user200", "vcl_alias": None, "value": "5",
+                        "sw_pn": None, "source_file": SOURCE_NAME, "date": "20240105", "sn": "3000001"}]
+
+
+def test_mirror_dir_excluded_from_uploads(tmp_path):
+    (tmp_path / parquet_mirror.PARQUET_DIR_NAME).mkdir()
+    (tmp_path / parquet_mirror.PARQUET_DIR_NAME / "part.parquet").write_bytes(b"x")
+    (tmp_path / "20240105_sn3000001_cpf.xlsx").write_bytes(b"x")
+    assert list(blob_delta_sync.list_local_files(str(tmp_path))) == ["20240105_sn3000001_cpf.xlsx"]
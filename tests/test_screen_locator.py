@@ -0,0 +1,164 @@
+import json
+
+import pytest
+
+import screen_locator
+
+
+SCREEN = (0, 0, 1920, 1080)
+
+
+class FakeScreen(object):
+    """Stands in for pyautogui. Each template name shows at most one box on screen.
+    A box w/ the pointer over it doesn't match (hover changes its look).
+    """
+    def __init__(self, shown):
+        self.shown = dict(shown) # template name: (left, top, width, height)
+        self.regions = []        # region of each screenshot, None = full screen
+        self.pointer = (0, 0)
+        self.ImageNotFoundException = LookupError
+
+    def screenshot(self, region=None):
+        self.regions.append(region)
+        return region or SCREEN
+
+    def locate(self, template, screen_shot):
+        box = self.shown.get(template)
+        if box is None:
+            return None
+        left, top, width, height = screen_shot
+        if box[0] <= self.pointer[0] <= box[0] + box[2] and box[1] <= self.pointer[1] <= box[1] + box[3]:
+            raise LookupError("hovered")
+        if not (left <= box[0] and top <= box[1] and box[0] + box[2] <= left + width
+                                                and box[1] + box[3] <= top + height):
+            raise LookupError("not found") # Newer pyscreeze raises instead of returning None.
+        return (box[0] - left, box[1] - top, box[2], box[3])
+
+    def size(self):
+        return SCREEN[2], SCREEN[3]
+
+    def position(self):
+        return self.pointer
+
+    def moveTo(self, x, y):
+        self.pointer = (x, y)
+
+
+@pytest.fixture
+def screen(monkeypatch):
+    fake_screen = FakeScreen({"save": (500, 300, 20, 20)})
+    monkeypatch.setattr(screen_locator, "gui", fake_screen, raising=False)
+    monkeypatch.setattr(screen_locator, "NOT_FOUND_EXCEPTIONS", (LookupError,), raising=False)
+    return fake_screen
+
+
+def load_state(state_path):
+    with open(state_path, "r") as state_file:
+        return json.load(state_file)
+
+
+def make_locator(state_path, region=None):
+    Locator = screen_locator.TemplateLocator(state_path)
+    # Template "images" are just names here, matched by FakeScreen.locate().
+    Locator.templates = {"save": ("save", region), "blank": ("blank", region)}
+    return Locator
+
+
+def test_full_screen_then_cached_box(tmp_path, screen):
+    state_path = str(tmp_path / "locations.json")
+    Locator = make_locator(state_path)
+    assert Locator.locate_any(["save", "blank"]) == ("save", (500, 300, 20, 20))
+    assert screen.regions == [None]
+
+    screen.regions = []
+    # Fresh locator (e.g. next run) loads saved location and only checks that box.
+    Locator = make_locator(state_path)
+    assert Locator.locate_any(["save", "blank"]) == ("save", (500, 300, 20, 20))
+    assert screen.regions == [(500, 300, 20, 20)]
+    assert load_state(state_path) == {"save": [500, 300, 20, 20]}
+
+
+def test_moved_element_found_near_last_location(tmp_path, screen):
+    Locator = make_locator(None)
+    Locator.locate_any(["save", "blank"])
+    screen.shown["save"] = (540, 330, 20, 20)
+    screen.regions = []
+
+    assert Locator.locate_any(["save", "blank"]) == ("save", (540, 330, 20, 20))
+    margin = screen_locator.SEARCH_MARGIN
+    assert screen.regions[-1] == (500 - margin, 300 - margin, 20 + 2 * margin, 20 + 2 * margin)
+    assert None not in screen.regions
+
+
+def test_alternate_look_found_near_other_names_location(screen):
+    Locator = make_locator(None)
+    Locator.locate_any(["save", "blank"])
+    screen.shown = {"blank": (505, 300, 20, 20)} # Greyed-out icon in save icon's place.
+    screen.regions = []
+
+    assert Locator.locate_any(["save", "blank"]) == ("blank", (505, 300, 20, 20))
+    assert None not in screen.regions
+
+
+def test_region_of_interest_before_full_screen(screen):
+    Locator = make_locator(None, region=(400, 200, 300, 300))
+    assert Locator.locate("save") == (500, 300, 20, 20)
+    assert screen.regions == [(400, 200, 300, 300)]
+
+
+def test_not_found(screen):
+    screen.shown = {}
+    Locator = make_locator(None)
+    assert Locator.locate_any(["save", "blank"]) == (None, None)
+    assert Locator.locations == {}
+
+
+def test_pointer_moved_off_cached_target(screen):
+    Locator = make_locator(None)
+    Locator.locate("save")
+    screen.pointer = (510, 310)
+    assert Locator.verify("save")
+    assert screen.pointer == (510, 300 + 20 + screen_locator.POINTER_CLEARANCE)
+
+
+def test_forget(tmp_path, screen):
+    state_path = str(tmp_path / "locations.json")
+    Locator = make_locator(state_path)
+    Locator.locate("save")
+    Locator.forget()
+    assert not Locator.verify("save")
+    assert load_state(state_path) == {}
+
+
+def test_center():
+    assert screen_locator.TemplateLocator.center((500, 300, 20, 21)) == (510, 310)
+
+
+def test_pointer_cleared_before_region_searches(screen):
+    Locator = make_locator(None, region=(400, 200, 300, 300))
+    screen.pointer = (510, 310) # Still on icon from last click (cache cold, e.g. after --reset-tuning).
+    assert Locator.locate("save") == (500, 300, 20, 20)
+    assert screen.regions == [(400, 200, 300, 300)]
+
+
+def test_pointer_cleared_before_near_search(screen):
+    Locator = make_locator(None)
+    Locator.locate("save")
+    screen.shown["save"] = (600, 300, 20, 20) # Moved out of cached box's clearance...
+    screen.pointer = (610, 310)               # ...but under pointer.
+    assert Locator.locate("save") == (600, 300, 20, 20)
+    assert screen.pointer[1] > 320
+
+
+def test_shared_region_of_interest_searched_once(screen):
+    screen.shown = {}
+    Locator = make_locator(None, region=(400, 200, 300, 300))
+    Locator.locate_any(["save", "blank"])
+    assert screen.regions == [(400, 200, 300, 300)] * 2 + [None] * 2 # One screenshot per name.
+
+
+def test_pointer_cleared_above_region_at_screen_bottom(screen):
+    Locator = make_locator(None, region=(0, 540, 960, 540))
+    screen.pointer = (100, 1000)
+    Locator.locate("save")
+    assert screen.pointer == (100, 540 - screen_locator.POINTER_CLEARANCE)
@@ -0,0 +1,77 @@
+import os
+import types
+from datetime import datetime
+
+import pytest
+
+import snapshot_store
+
+
+@pytest.fixture
+def src_tree(tmp_path):
+    src = tmp_path / "src"
+    (src / "CDF Files").mkdir(parents=True)
+    (src / "CDF Files" / "a.cdf").write_bytes(b"same content")
+    (src / "CPF Files").mkdir()
+    (src / "CPF Files" / "b.cpf").write_bytes(b"same content") # Duplicate of a.cdf
+    (src / "c.txt").write_bytes(b"other")
+    return src
+
+
+def create(Store, src, name, monkeypatch):
+    # Snapshot names are timestamps to the second. Pin them so tests don't wait.
+    fixed_time = datetime.strptime(name, snapshot_store.SNAPSHOT_NAME_FORMAT)
+    monkeypatch.setattr(snapshot_store, "datetime", types.SimpleNamespace(now=lambda: fixed_time))
+    return Store.create_snapshot(str(src), silent=True)
+
+
+def test_create_dedupes_and_restores(tmp_path, src_tree, monkeypatch):
+    Store = snapshot_store.SnapshotStore(str(tmp_path / "store"))
+    snapshot_name = create(Store, src_tree, "20240105T120000", monkeypatch)
+
+    files = Store.load_snapshot(snapshot_name)["files"]
+    assert sorted(files) == ["CDF Files/a.cdf", "CPF Files/b.cpf", "c.txt"]
+    assert files["CDF Files/a.cdf"]["hash"] == files["CPF Files/b.cpf"]["hash"]
+    assert Store.store_stats() == (1, 2, len(b"same content") + len(b"other"))
+
+    out = tmp_path / "out"
+    assert Store.restore(snapshot_name, str(out)) == 3
+    assert (out / "CPF Files" / "b.cpf").read_bytes() == b"same content"
+    assert os.stat(out / "c.txt").st_mtime_ns == os.stat(src_tree / "c.txt").st_mtime_ns
+
+
+def test_restore_prefix_and_point_in_time(tmp_path, src_tree, monkeypatch):
+    Store = snapshot_store.SnapshotStore(str(tmp_path / "store"))
+    create(Store, src_tree, "20240105T120000", monkeypatch)
+    (src_tree / "CDF Files" / "a.cdf").write_bytes(b"edited")
+    (src_tree / "c.txt").unlink()
+    create(Store, src_tree, "20240107T120000", monkeypatch)
+
+    assert Store.find_snapshot("20240104") is None
+    assert Store.find_snapshot("20240106") == "20240105T120000"
+    assert Store.find_snapshot("20240107") == "20240107T120000"
+
+    out = tmp_path / "out"
+    assert Store.restore("20240105T120000", str(out), path_prefix="CDF Files/") == 1
+    assert (out / "CDF Files" / "a.cdf").read_bytes() == b"same content"
+    assert not (out / "c.txt").exists()
+    assert Store.store_stats()[1] == 3 # Only the edited file added a blob.
+
+
+def test_unchanged_files_not_rehashed(tmp_path, src_tree, monkeypatch):
+    Store = snapshot_store.SnapshotStore(str(tmp_path / "store"))
+    create(Store, src_tree, "20240105T120000", monkeypatch)
+
+    hashed = []
+    real_hash_file = snapshot_store.hash_file
+    monkeypatch.setattr(snapshot_store, "hash_file", lambda path: hashed.append(path) or real_hash_file(path))
+    (src_tree / "c.txt").write_bytes(b"changed")
+    create(Store, src_tree, "20240106T120000", monkeypatch)
+    assert hashed == [str(src_tree / "c.txt")]
+
+
+def test_duplicate_snapshot_name_rejected(tmp_path, src_tree, monkeypatch):
+    Store = snapshot_store.SnapshotStore(str(tmp_path / "store"))
+    create(Store, src_tree, "20240105T120000", monkeypatch)
+    with pytest.raises(Exception, match="already exists"):
+        create(Store, src_tree, "20240105T120000", monkeypatch)
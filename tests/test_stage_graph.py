@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+import stage_graph
+
+
+def test_runs_in_dependency_order():
+    order = []
+    lock = threading.Lock()
+
+    def step(name):
+        def func():
+            with lock:
+                order.append(name)
+            return name
+        return func
+
+    graph = stage_graph.StageGraph([
+        stage_graph.Stage("report", step("report"), deps=["convert", "upload"]),
+        stage_graph.Stage("convert", step("convert"), deps=["backup"], main_thread=True),
+        stage_graph.Stage("upload", step("upload"), deps=["backup"]),
+        stage_graph.Stage("backup", step("backup")),
+    ])
+    assert graph.run()
+    assert order[0] == "backup" and order[-1] == "report"
+    assert sorted(order[1:3]) == ["convert", "upload"]
+    assert graph.stages["convert"].result == "convert"
+
+
+def test_main_thread_stages_run_in_caller():
+    threads = {}
+
+    def record(name):
+        return lambda: threads.__setitem__(name, threading.current_thread())
+
+    graph = stage_graph.StageGraph([stage_graph.Stage("gui", record("gui"), main_thread=True),
+                                    stage_graph.Stage("sync", record("sync"))])
+    assert graph.run()
+    assert threads["gui"] is threading.current_thread()
+    assert threads["sync"] is not threading.current_thread()
+
+
+def test_background_stage_overlaps_main_thread_stage():
+    sync_started = threading.Event()
+
+    def gui():
+        # Would time out if background stage had to wait for this one.
+        assert sync_started.wait(timeout=5)
+
+    graph = stage_graph.StageGraph([stage_graph.Stage("gui", gui, main_thread=True),
+                                    stage_graph.Stage("sync", sync_started.set)])
+    assert graph.run()
+
+
+def test_failure_skips_only_dependents():
+    def fail():
+        raise Exception("share offline")
+
+    ran = []
+    graph = stage_graph.StageGraph([
+        stage_graph.Stage("share_raw", fail),
+        stage_graph.Stage("import_sync", lambda: ran.append("import_sync"), deps=["share_raw"]),
+        stage_graph.Stage("convert", lambda: ran.append("convert"), deps=["import_sync"]),
+        stage_graph.Stage("azure_batt", lambda: ran.append("azure_batt")),
+    ])
+    assert not graph.run()
+    assert ran == ["azure_batt"]
+    assert graph.stages["share_raw"].status == stage_graph.STAGE_FAILED
+    assert "share offline" in graph.stages["share_raw"].error
+    assert graph.stages["import_sync"].status == stage_graph.STAGE_SKIPPED
+    assert graph.stages["convert"].status == stage_graph.STAGE_SKIPPED
+    graph.print_summary()
+
+
+def test_rejects_unknown_dep_and_cycle():
+    with pytest.raises(Exception, match="unknown stage"):
+        stage_graph.StageGraph([stage_graph.Stage("a", lambda: None, deps=["missing"])])
+    with pytest.raises(Exception, match="cycle"):
+        stage_graph.StageGraph([stage_graph.Stage("a", lambda: None, deps=["b"]),
+                                stage_graph.Stage("b", lambda: None, deps=["a"])])
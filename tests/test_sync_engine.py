@@ -0,0 +1,120 @@
+import os
+
+import sync_engine
+
+
+SECOND_NS = 10**9
+
+
+def test_plan_sync():
+    src_files = {"new.txt": (1, 0), "same.txt": (4, 10 * SECOND_NS),
+                 "fat_mtime.txt": (4, 11 * SECOND_NS), "grown.txt": (9, 10 * SECOND_NS),
+                 "touched.txt": (4, 20 * SECOND_NS), "touched_unknown.txt": (4, 20 * SECOND_NS)}
+    dest_files = {"same.txt": (4, 10 * SECOND_NS), "fat_mtime.txt": (4, 10 * SECOND_NS),
+                  "grown.txt": (4, 10 * SECOND_NS), "touched.txt": (4, 10 * SECOND_NS),
+                  "touched_unknown.txt": (4, 10 * SECOND_NS), "extra.txt": (1, 0)}
+    state_files = {"touched.txt": {"size": 4, "mtime_ns": 10 * SECOND_NS, "hash": "abc"}}
+
+    to_copy, to_check = sync_engine.plan_sync(src_files, dest_files, state_files)
+    # fat_mtime.txt: w/in MTIME_TOLERANCE_NS, so unchanged.
+    assert to_copy == ["grown.txt", "new.txt", "touched_unknown.txt"]
+    assert to_check == ["touched.txt"]
+
+
+def test_plan_sync_stale_state_copies():
+    # Dest changed since last sync, so state's hash says nothing about it.
+    src_files = {"a.txt": (4, 20 * SECOND_NS)}
+    dest_files = {"a.txt": (4, 30 * SECOND_NS)}
+    state_files = {"a.txt": {"size": 4, "mtime_ns": 10 * SECOND_NS, "hash": "abc"}}
+    assert sync_engine.plan_sync(src_files, dest_files, state_files) == (["a.txt"], [])
+
+
+def write(path, content, mtime_s=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file_obj:
+        file_obj.write(content)
+    if mtime_s is not None:
+        os.utime(path, ns=(mtime_s * SECOND_NS, mtime_s * SECOND_NS))
+
+
+def test_sync_tree_copy_restamp_purge(tmp_path):
+    src, dest = str(tmp_path / "src"), str(tmp_path / "dest")
+    os.makedirs(dest)
+    state_path = str(tmp_path / "state" / "sync_state.json")
+    write(os.path.join(src, "a.txt"), b"aaaa", 1000)
+    write(os.path.join(src, "sub", "b.txt"), b"b", 1000)
+    write(os.path.join(dest, "old", "c.txt"), b"c")
+
+    results = sync_engine.sync_tree(src, dest, purge=True, silent=True, state_path=state_path)
+    assert (results["copied"], results["deleted"], results["errors"]) == (2, 1, [])
+    assert not os.path.exists(os.path.join(dest, "old"))
+    assert os.stat(os.path.join(dest, "a.txt")).st_mtime_ns == 1000 * SECOND_NS
+
+    # Touched, not changed: only dest's mtime updated.
+    os.utime(os.path.join(src, "a.txt"), ns=(2000 * SECOND_NS, 2000 * SECOND_NS))
+    results = sync_engine.sync_tree(src, dest, silent=True, state_path=state_path)
+    assert (results["copied"], results["restamped"], results["unchanged"]) == (0, 1, 1)
+    assert os.stat(os.path.join(dest, "a.txt")).st_mtime_ns == 2000 * SECOND_NS
+
+    # Same size, new content.
+    write(os.path.join(src, "a.txt"), b"AAAA", 3000)
+    results = sync_engine.sync_tree(src, dest, silent=True, state_path=state_path)
+    assert (results["copied"], results["restamped"]) == (1, 0)
+    with open(os.path.join(dest, "a.txt"), "rb") as file_obj:
+        assert file_obj.read() == b"AAAA"
+
+
+def test_sync_tree_single_level(tmp_path):
+    src, dest = str(tmp_path / "src"), str(tmp_path / "dest")
+    os.makedirs(dest)
+    write(os.path.join(src, "a.txt"), b"a")
+    write(os.path.join(src, "sub", "b.txt"), b"b")
+    write(os.path.join(dest, "sub", "keep.txt"), b"k")
+
+    results = sync_engine.sync_tree(src, dest, multilevel=False, purge=True, silent=True)
+    assert results["copied"] == 1
+    assert sorted(os.listdir(dest)) == ["a.txt", "sub"]
+    assert os.path.exists(os.path.join(dest, "sub", "keep.txt"))
+
+
+def test_state_filename_per_pair(tmp_path):
+    assert sync_engine.state_filename("a", "b") == sync_engine.state_filename("a", "b")
+    assert sync_engine.state_filename("a", "b") != sync_engine.state_filename("a", "c")
+
+
+def test_failed_copy_leaves_no_temp_file(tmp_path, monkeypatch):
+    src, dest = str(tmp_path / "src"), str(tmp_path / "dest")
+    os.makedirs(dest)
+    write(os.path.join(src, "a.txt"), b"aaaa")
+
+    def fail_copystat(src_path, dest_path):
+        raise OSError("drive removed")
+    monkeypatch.setattr(sync_engine.shutil, "copystat", fail_copystat)
+
+    results = sync_engine.sync_tree(src, dest, silent=True)
+    assert results["copied"] == 0 and len(results["errors"]) == 1
+    assert os.listdir(dest) == []
+
+
+def test_restamp_error_recorded_not_raised(tmp_path, monkeypatch):
+    src, dest = str(tmp_path / "src"), str(tmp_path / "dest")
+    os.makedirs(dest)
+    state_path = str(tmp_path / "sync_state.json")
+    write(os.path.join(src, "a.txt"), b"aaaa", 1000)
+    write(os.path.join(src, "b.txt"), b"b", 1000)
+    sync_engine.sync_tree(src, dest, silent=True, state_path=state_path)
+    os.utime(os.path.join(src, "a.txt"), ns=(2000 * SECOND_NS, 2000 * SECOND_NS))
+    write(os.path.join(src, "b.txt"), b"bb", 2000)
+
+    real_utime = os.utime
+
+    def fail_utime(path, *args, **kwargs):
+        if str(path) == os.path.join(dest, "a.txt"):
+            raise OSError("read-only")
+        return real_utime(path, *args, **kwargs)
+    monkeypatch.setattr(sync_engine.os, "utime", fail_utime)
+
+    results = sync_engine.sync_tree(src, dest, silent=True, state_path=state_path)
+    assert results["restamped"] == 0 and results["copied"] == 1
+    assert [error.split(":")[0] for error in results["errors"]] == ["a.txt"]
+    assert "b.txt" in sync_engine.load_state(state_path) # State still saved.
@@ -0,0 +1,104 @@
+import sys
+
+import sync_metrics
+
+
+def parse(tool, lines):
+    metrics = sync_metrics.SyncMetrics(tool, "src", "dest")
+    unparsed = [line for line in lines if not sync_metrics.LINE_PARSERS[tool](metrics, line)]
+    return metrics, unparsed
+
+
+def test_rsync_progress_and_stats():
+    metrics, unparsed = parse("rsync", [
+        "      1,234,567  45%   12.34MB/s    0:00:05 (xfr#3, to-chk=10/20)",
+        "sending incremental file list",
+        "Number of files: 20 (reg: 18, dir: 2)",
+        "Number of regular files transferred: 7",
+        "Total file size: 9,876,543 bytes",
+        "Total transferred file size: 2,345,678 bytes",
+    ])
+    assert unparsed == ["sending incremental file list"]
+    assert metrics.percent == 45.0
+    assert (metrics.files_done, metrics.files_total) == (7, 20)
+    assert (metrics.bytes_done, metrics.bytes_total) == (2345678, 9876543)
+
+
+def test_robocopy_summary_overrides_running_totals():
+    metrics, _ = parse("robocopy", [
+        "\t    New File  \t\t    1024\tC:\\src\\a.cdf",
+        "\t    Newer     \t\t    2048\tC:\\src\\b.cdf",
+    ])
+    assert (metrics.files_done, metrics.bytes_done) == (2, 3072)
+
+    parse_line = sync_metrics.LINE_PARSERS["robocopy"]
+    parse_line(metrics, "    Files :        10         2         8         0         1         0")
+    parse_line(metrics, "    Bytes :     50000      3072     46928         0         0         0")
+    assert (metrics.files_total, metrics.files_done, metrics.files_failed) == (10, 2, 1)
+    assert (metrics.bytes_total, metrics.bytes_done) == (50000, 3072)
+
+
+def test_azcopy_progress_and_summary():
+    metrics, _ = parse("azcopy", [
+        "52.5 %, 21 Done, 1 Failed, 18 Pending, 0 Skipped, 40 Total, 2-sec Throughput (Mb/s): 8.1",
+        "Total Number of Copy Transfers: 40",
+        "Number of Copy Transfers Completed: 39",
+        "Number of Copy Transfers Failed: 1",
+        "Total Number of Bytes Transferred: 123456",
+    ])
+    assert metrics.percent == 52.5
+    assert (metrics.files_total, metrics.files_done, metrics.files_failed) == (40, 39, 1)
+    assert metrics.bytes_done == 123456
+
+
+def test_success_codes():
+    robocopy_metrics = sync_metrics.SyncMetrics("robocopy", "src", "dest")
+    robocopy_metrics.finish(3) # Files copied and extras found: still success.
+    assert robocopy_metrics.succeeded() and robocopy_metrics.percent == 100.0
+    robocopy_metrics.finish(8)
+    assert not robocopy_metrics.succeeded()
+
+    rsync_metrics = sync_metrics.SyncMetrics("rsync", "src", "dest")
+    rsync_metrics.finish(23)
+    assert not rsync_metrics.succeeded()
+
+
+def test_redact_drops_sas_token():
+    assert sync_metrics.redact("https://acct.blob.core.windows.net/ctrl?sv=1&sig=secret") == \
+                                                "https://acct.blob.core.windows.net/ctrl"
+    assert sync_metrics.redact("C:\\exports") == "C:\\exports"
+    metrics = sync_metrics.SyncMetrics("azcopy", "C:\\exports", "https://acct.blob.core.windows.net/c?sig=s")
+    assert "sig" not in str(metrics.as_record())
+
+
+def test_run_and_capture_streams_output():
+    script = ("import sys\n"
+              "print('      100  50%    1.00MB/s    0:00:01 (xfr#1, to-chk=1/2)', flush=True)\n"
+              "print('rsync: some warning')\n"
+              "sys.exit(23)\n")
+    metrics = sync_metrics.SyncMetrics("rsync", "src", "dest")
+    progress_calls = []
+    returncode = sync_metrics.run_and_capture([sys.executable, "-c", script], metrics,
+                                    on_progress=lambda: progress_calls.append(metrics.percent))
+    assert returncode == 23 and not metrics.succeeded()
+    assert list(metrics.output_tail) == ["rsync: some warning"]
+    assert progress_calls[0] == 50.0
+
+
+def test_missing_tool_fails_cleanly():
+    metrics = sync_metrics.SyncMetrics("rsync", "src", "dest")
+    assert sync_metrics.run_and_capture(["no-such-sync-tool-xyz"], metrics) == -1
+    assert not metrics.succeeded() and metrics.output_tail
+
+
+def test_log_roundtrip_and_since(tmp_path):
+    log_path = str(tmp_path / "logs" / sync_metrics.METRICS_FILENAME)
+    for started in ("2024-01-05T120000", "2024-01-07T120000"):
+        metrics = sync_metrics.SyncMetrics("rsync", "src", "dest")
+        metrics.started = started
+        metrics.finish(0)
+        sync_metrics.append_record(log_path, metrics)
+    assert len(sync_metrics.load_records(log_path)) == 2
+    assert [record["started"] for record in sync_metrics.load_records(log_path, since="20240106")] == \
+                                                                            ["2024-01-07T120000"]
+    assert sync_metrics.load_records(str(tmp_path / "none.jsonl")) == []